@@ -80,6 +80,10 @@ class TableInfo(BaseModel):
     table_name: str = Field(description="Name of the table")
     column_count: int = Field(description="Number of columns in the table")
     row_count: Optional[int] = Field(description="Number of rows in the table")
+    row_count_is_estimate: bool = Field(
+        default=False,
+        description="Whether row_count is an approximate catalog statistic"
+    )
     columns: List[Dict[str, Any]] = Field(description="Column information")
     sample_data: Optional[List[Dict[str, Any]]] = Field(description="Sample rows from the table")
     foreign_keys: Optional[List[Dict[str, str]]] = Field(description="Foreign key relationships")
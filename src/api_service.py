@@ -293,6 +293,7 @@ class APIService:
                 table_name=table_name,
                 column_count=stats.get('column_count', len(columns)),
                 row_count=stats.get('row_count'),
+                row_count_is_estimate=stats.get('row_count_is_estimate', False),
                 columns=columns,
                 sample_data=sample_data,
                 foreign_keys=foreign_keys
@@ -318,6 +319,9 @@ class APIService:
                     table_stats.append({
                         "table_name": table_name,
                         "row_count": stats.get('row_count', 0),
+                        "row_count_is_estimate": stats.get(
+                            'row_count_is_estimate', False
+                        ),
                         "column_count": stats.get('column_count', 0)
                     })
                 except:
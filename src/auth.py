@@ -4,8 +4,12 @@ Authentication and security utilities for DB RAG API
 
 import os
 import secrets
+import time
+import threading
+from types import SimpleNamespace
+from collections import deque
+from functools import lru_cache
 from typing import Optional
-from datetime import datetime, timedelta
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
@@ -44,6 +48,24 @@ auth_config = APIKeyConfig()
 # Security scheme for FastAPI
 security = HTTPBearer(auto_error=False)
 
+# 401 response bodies never change after startup, so build them once
+_MISSING_AUTH_DETAIL = {
+    "error": "Missing authentication",
+    "error_code": "MISSING_AUTH",
+    "details": {
+        "message": "Authorization header with Bearer token required",
+        "example": f"Authorization: Bearer {auth_config.get_development_key()}"
+    }
+}
+_INVALID_KEY_DETAIL = {
+    "error": "Invalid API key",
+    "error_code": "INVALID_API_KEY",
+    "details": {
+        "message": "The provided API key is not valid",
+        "hint": "Check your API key or contact support"
+    }
+}
+
 
 async def verify_api_key(
     credentials: Optional[HTTPAuthorizationCredentials] = Security(security)
@@ -56,97 +78,120 @@ async def verify_api_key(
     if not auth_config.require_auth:
         return "development-mode"
     
+    # A fresh exception per request: raising a shared instance would share
+    # its traceback and context between concurrent requests
     if not credentials:
-        raise HTTPException(
-            status_code=401,
-            detail={
-                "error": "Missing authentication",
-                "error_code": "MISSING_AUTH",
-                "details": {
-                    "message": "Authorization header with Bearer token required",
-                    "example": f"Authorization: Bearer {auth_config.get_development_key()}"
-                }
-            }
-        )
+        raise HTTPException(status_code=401, detail=_MISSING_AUTH_DETAIL)
     
     if not auth_config.is_valid_key(credentials.credentials):
-        raise HTTPException(
-            status_code=401,
-            detail={
-                "error": "Invalid API key",
-                "error_code": "INVALID_API_KEY",
-                "details": {
-                    "message": "The provided API key is not valid",
-                    "hint": "Check your API key or contact support"
-                }
-            }
-        )
+        raise HTTPException(status_code=401, detail=_INVALID_KEY_DETAIL)
     
     return credentials.credentials
 
 
-class AuthModels:
-    """Pydantic models for authentication"""
-    
-    class APIKeyInfo(BaseModel):
-        """Information about API key authentication"""
-        required: bool
-        development_mode: bool
-        development_key: Optional[str] = None
-        
-    class AuthError(BaseModel):
-        """Authentication error response"""
-        error: str
-        error_code: str
-        details: dict
+class APIKeyInfo(BaseModel):
+    """Information about API key authentication"""
+    required: bool
+    development_mode: bool
+    development_key: Optional[str] = None
 
 
-def get_auth_info() -> AuthModels.APIKeyInfo:
-    """Get current authentication configuration info"""
-    return AuthModels.APIKeyInfo(
-        required=auth_config.require_auth,
-        development_mode=not auth_config.require_auth,
-        development_key=auth_config.get_development_key() if not auth_config.require_auth else None
+class AuthError(BaseModel):
+    """Authentication error response"""
+    error: str
+    error_code: str
+    details: dict
+
+
+# Backward-compatible namespace for code using AuthModels.<Model>
+AuthModels = SimpleNamespace(APIKeyInfo=APIKeyInfo, AuthError=AuthError)
+
+
+@lru_cache(maxsize=None)
+def _build_auth_info(
+    require_auth: bool, development_key: Optional[str]
+) -> APIKeyInfo:
+    """Build (once per distinct configuration) the auth info model"""
+    return APIKeyInfo(
+        required=require_auth,
+        development_mode=not require_auth,
+        development_key=development_key
     )
 
 
+def get_auth_info() -> APIKeyInfo:
+    """Get current authentication configuration info"""
+    # Only two shapes are possible, so reuse the cached instance instead
+    # of building a new pydantic model on every call
+    if auth_config.require_auth:
+        return _build_auth_info(True, None)
+    return _build_auth_info(False, auth_config.get_development_key())
+
+
 def generate_api_key() -> str:
     """Generate a secure API key"""
     return f"dbrag-{secrets.token_urlsafe(32)}"
 
 
 # Rate limiting (basic implementation)
+class _BucketWindow:
+    """Sliding window of per-minute request counters for one API key"""
+    
+    __slots__ = ("buckets", "last_bucket", "total")
+    
+    def __init__(self, size: int, current_bucket: int):
+        self.buckets = deque([0] * size)
+        self.last_bucket = current_bucket
+        self.total = 0
+    
+    def advance(self, current_bucket: int):
+        """Drop the counters of minutes that left the window"""
+        elapsed = min(current_bucket - self.last_bucket, len(self.buckets))
+        for _ in range(elapsed):
+            self.total -= self.buckets.popleft()
+            self.buckets.append(0)
+        self.last_bucket = current_bucket
+
+
 class RateLimiter:
     """Simple in-memory rate limiter"""
     
+    # Number of independently locked shards (must be a power of two)
+    NUM_SHARDS = 16
+    # Width of a single counter bucket
+    BUCKET_NS = 60 * 1_000_000_000
+    
     def __init__(self, max_requests: int = 100, window_minutes: int = 60):
         self.max_requests = max_requests
         self.window_minutes = window_minutes
-        self.requests = {}  # {api_key: [(timestamp, count), ...]}
+        # Each shard is ({api_key: _BucketWindow}, lock) so that concurrent
+        # requests for different keys rarely contend
+        self._shards = [({}, threading.Lock()) for _ in range(self.NUM_SHARDS)]
+    
+    def _get_shard(self, api_key: str):
+        """Return the (requests, lock) shard responsible for api_key"""
+        return self._shards[hash(api_key) & (self.NUM_SHARDS - 1)]
     
     def is_allowed(self, api_key: str) -> bool:
         """Check if request is allowed under rate limit"""
-        now = datetime.now()
-        window_start = now - timedelta(minutes=self.window_minutes)
-        
-        if api_key not in self.requests:
-            self.requests[api_key] = []
-        
-        # Clean old requests
-        self.requests[api_key] = [
-            (timestamp, count) for timestamp, count in self.requests[api_key]
-            if timestamp > window_start
-        ]
-        
-        # Count current requests
-        current_count = sum(count for _, count in self.requests[api_key])
-        
-        if current_count >= self.max_requests:
-            return False
+        current_bucket = time.monotonic_ns() // self.BUCKET_NS
+        requests, lock = self._get_shard(api_key)
         
-        # Add current request
-        self.requests[api_key].append((now, 1))
-        return True
+        with lock:
+            window = requests.get(api_key)
+            if window is None:
+                window = requests[api_key] = _BucketWindow(
+                    self.window_minutes, current_bucket
+                )
+            elif current_bucket > window.last_bucket:
+                window.advance(current_bucket)
+            
+            if window.total >= self.max_requests:
+                return False
+            
+            window.buckets[-1] += 1
+            window.total += 1
+            return True
 
 
 # Global rate limiter instance
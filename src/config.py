@@ -6,11 +6,21 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class DatabaseConfig:
     """Database configuration"""
     url: str
     type: str = "postgresql"
+    # Connection pool / statement cache tuning (ignored by SQLite pools)
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_pre_ping: bool = True
+    pool_recycle: int = 1800
+    query_cache_size: int = 1200
+    # Directory for the persistent reflection cache (disabled when None)
+    schema_cache_dir: Optional[str] = None
+    # Seconds the schema/table-name caches (in-process and on disk) stay valid
+    schema_cache_ttl: int = 300
 
     @classmethod
     def from_env(cls) -> "DatabaseConfig":
@@ -19,10 +29,22 @@ class DatabaseConfig:
         if not url:
             raise ValueError("DATABASE_URL not found in environment variables")
         db_type = os.getenv("DATABASE_TYPE", "postgresql")
-        return cls(url=url, type=db_type)
+        return cls(
+            url=url,
+            type=db_type,
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            pool_pre_ping=(
+                os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+            ),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            query_cache_size=int(os.getenv("DB_QUERY_CACHE_SIZE", "1200")),
+            schema_cache_dir=os.getenv("SCHEMA_CACHE_DIR") or None,
+            schema_cache_ttl=int(os.getenv("SCHEMA_CACHE_TTL", "300")),
+        )
 
 
-@dataclass
+@dataclass(slots=True)
 class OpenAIConfig:
     """OpenAI configuration"""
     api_key: str
@@ -81,12 +103,23 @@ class OpenAIConfig:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class RAGConfig:
     """RAG system configuration"""
     vector_store_path: Optional[str] = None
     similarity_search_k: int = 5
     table_sample_limit: int = 1000
+    # SQLite file caching document embeddings across rebuilds (None disables)
+    embedding_cache_path: Optional[str] = None
+    # Cosine similarity above which a question reuses a recent answer
+    # (None disables the answer cache), and how long answers stay valid
+    query_cache_threshold: Optional[float] = None
+    query_cache_ttl: Optional[float] = None
+    # Memory-map index.faiss on load instead of reading it into RAM
+    mmap_faiss: bool = False
+    # Neighbours per node of the HNSW index built for new stores
+    # (0 builds an exact flat index instead)
+    hnsw_m: int = 32
 
     def __post_init__(self):
         """Validate configuration parameters"""
@@ -136,6 +169,23 @@ class RAGConfig:
                     "vector_store_path cannot be empty string"
                 )
 
+        # Validate hnsw_m
+        if not isinstance(self.hnsw_m, int):
+            raise TypeError(
+                f"hnsw_m must be an integer, got {type(self.hnsw_m).__name__}"
+            )
+        if self.hnsw_m < 0:
+            raise ValueError(f"hnsw_m must be >= 0, got {self.hnsw_m}")
+
+        # Validate query_cache_threshold if provided
+        if self.query_cache_threshold is not None and not (
+            0 < self.query_cache_threshold <= 1
+        ):
+            raise ValueError(
+                f"query_cache_threshold must be in (0, 1], got "
+                f"{self.query_cache_threshold}"
+            )
+
     @classmethod
     def from_env(cls) -> "RAGConfig":
         """Create config from environment variables"""
@@ -155,8 +205,32 @@ class RAGConfig:
                 f"Invalid TABLE_SAMPLE_LIMIT in environment: {e}"
             )
             
+        try:
+            hnsw_m = int(os.getenv("FAISS_HNSW_M", "32"))
+        except ValueError as e:
+            raise ValueError(f"Invalid FAISS_HNSW_M in environment: {e}")
+
+        try:
+            query_cache_threshold = (
+                float(os.getenv("QUERY_CACHE_THRESHOLD"))
+                if os.getenv("QUERY_CACHE_THRESHOLD") else None
+            )
+            query_cache_ttl = (
+                float(os.getenv("QUERY_CACHE_TTL"))
+                if os.getenv("QUERY_CACHE_TTL") else None
+            )
+        except ValueError as e:
+            raise ValueError(
+                f"Invalid QUERY_CACHE_THRESHOLD/QUERY_CACHE_TTL in environment: {e}"
+            )
+            
         return cls(
             vector_store_path=vector_store_path,
             similarity_search_k=similarity_search_k,
             table_sample_limit=table_sample_limit,
+            embedding_cache_path=os.getenv("EMBEDDING_CACHE_PATH") or None,
+            query_cache_threshold=query_cache_threshold,
+            query_cache_ttl=query_cache_ttl,
+            mmap_faiss=os.getenv("FAISS_MMAP", "false").lower() == "true",
+            hnsw_m=hnsw_m,
         )
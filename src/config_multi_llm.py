@@ -8,7 +8,7 @@ incluindo OpenAI, Ollama e APIs customizadas.
 
 import os
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from enum import Enum
 from dotenv import load_dotenv
 
@@ -30,12 +30,22 @@ class EmbeddingProvider(Enum):
     CUSTOM = "custom"
 
 
-@dataclass
+@dataclass(slots=True)
 class DatabaseConfig:
     """Configuração do banco de dados"""
     database_type: str = "sqlite"
     database_url: Optional[str] = None
     database_path: Optional[str] = None
+    # Pool de conexões / cache de statements (ignorado pelo SQLite)
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_pre_ping: bool = True
+    pool_recycle: int = 1800
+    query_cache_size: int = 1200
+    # Diretório do cache persistente de reflexão (desativado quando None)
+    schema_cache_dir: Optional[str] = None
+    # Validade (segundos) do cache em memória de schema/nomes de tabelas
+    schema_cache_ttl: int = 300
     
     @classmethod
     def from_env(cls) -> 'DatabaseConfig':
@@ -43,16 +53,27 @@ class DatabaseConfig:
         return cls(
             database_type=os.getenv('DATABASE_TYPE', 'sqlite'),
             database_url=os.getenv('DATABASE_URL'),
-            database_path=os.getenv('DATABASE_PATH', './data/example.db')
+            database_path=os.getenv('DATABASE_PATH', './data/example.db'),
+            pool_size=int(os.getenv('DB_POOL_SIZE', 10)),
+            max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 20)),
+            pool_pre_ping=os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+            pool_recycle=int(os.getenv('DB_POOL_RECYCLE', 1800)),
+            query_cache_size=int(os.getenv('DB_QUERY_CACHE_SIZE', 1200)),
+            schema_cache_dir=os.getenv('SCHEMA_CACHE_DIR') or None,
+            schema_cache_ttl=int(os.getenv('SCHEMA_CACHE_TTL', 300))
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class RAGConfig:
     """RAG system configuration"""
     vector_store_path: Optional[str] = None
     similarity_search_k: int = 5
     table_sample_limit: int = 1000
+    max_in_flight: int = 8
+    # Concurrent sample-row queries while vectorizing; keep it within the
+    # engine pool (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    scan_parallelism: int = 16
 
     def __post_init__(self):
         """Validate configuration parameters"""
@@ -90,6 +111,28 @@ class RAGConfig:
                 f"{self.table_sample_limit}"
             )
 
+        # Validate max_in_flight (concurrent embedding requests)
+        if not isinstance(self.max_in_flight, int):
+            raise TypeError(
+                f"max_in_flight must be an integer, got "
+                f"{type(self.max_in_flight).__name__}"
+            )
+        if self.max_in_flight <= 0:
+            raise ValueError(
+                f"max_in_flight must be positive, got {self.max_in_flight}"
+            )
+
+        # Validate scan_parallelism (concurrent sample queries)
+        if not isinstance(self.scan_parallelism, int):
+            raise TypeError(
+                f"scan_parallelism must be an integer, got "
+                f"{type(self.scan_parallelism).__name__}"
+            )
+        if self.scan_parallelism <= 0:
+            raise ValueError(
+                f"scan_parallelism must be positive, got {self.scan_parallelism}"
+            )
+
         # Validate vector_store_path if provided
         if self.vector_store_path is not None:
             if not isinstance(self.vector_store_path, str):
@@ -121,10 +164,26 @@ class RAGConfig:
                 f"Invalid TABLE_SAMPLE_LIMIT in environment: {e}"
             )
         
+        try:
+            max_in_flight = int(os.getenv("EMBEDDING_MAX_IN_FLIGHT", "8"))
+        except ValueError as e:
+            raise ValueError(
+                f"Invalid EMBEDDING_MAX_IN_FLIGHT in environment: {e}"
+            )
+        
+        try:
+            scan_parallelism = int(os.getenv("SCAN_PARALLELISM", "16"))
+        except ValueError as e:
+            raise ValueError(
+                f"Invalid SCAN_PARALLELISM in environment: {e}"
+            )
+        
         config = cls(
             vector_store_path=vector_store_path,
             similarity_search_k=similarity_search_k,
-            table_sample_limit=table_sample_limit
+            table_sample_limit=table_sample_limit,
+            max_in_flight=max_in_flight,
+            scan_parallelism=scan_parallelism
         )
         
         # Trigger validation
@@ -133,7 +192,7 @@ class RAGConfig:
         return config
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMConfig:
     """Configuração base para provedores de LLM"""
     provider: LLMProvider
@@ -149,7 +208,7 @@ class LLMConfig:
             self.provider = LLMProvider(self.provider)
 
 
-@dataclass
+@dataclass(slots=True)
 class EmbeddingConfig:
     """Configuração base para provedores de embedding"""
     provider: EmbeddingProvider
@@ -166,7 +225,7 @@ class EmbeddingConfig:
             self.provider = EmbeddingProvider(self.provider)
 
 
-@dataclass
+@dataclass(slots=True)
 class OpenAIConfig:
     """Configuração específica do OpenAI"""
     api_key: str
@@ -193,7 +252,7 @@ class OpenAIConfig:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class OllamaConfig:
     """Configuração específica do Ollama"""
     base_url: str = "http://localhost:11434"
@@ -218,7 +277,7 @@ class OllamaConfig:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class CustomConfig:
     """Configuração para APIs customizadas"""
     api_base: str
@@ -270,7 +329,7 @@ class CustomConfig:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class MultiLLMConfig:
     """Configuração completa do sistema Multi-LLM"""
     database: DatabaseConfig
@@ -282,6 +341,30 @@ class MultiLLMConfig:
     api_key: str = "dev-multi-llm-key-12345"
     log_level: str = "INFO"
     enable_provider_logging: bool = False
+    _available_llm: Tuple[LLMProvider, ...] = field(
+        init=False, repr=False, compare=False, default=()
+    )
+    _available_embedding: Tuple[EmbeddingProvider, ...] = field(
+        init=False, repr=False, compare=False, default=()
+    )
+    
+    def __post_init__(self):
+        # A configuração não é alterada após a construção, então os
+        # provedores disponíveis são calculados uma única vez
+        self._available_llm = tuple(
+            provider for provider, config in (
+                (LLMProvider.OPENAI, self.openai),
+                (LLMProvider.OLLAMA, self.ollama),
+                (LLMProvider.CUSTOM, self.custom),
+            ) if config
+        )
+        self._available_embedding = tuple(
+            provider for provider, config in (
+                (EmbeddingProvider.OPENAI, self.openai),
+                (EmbeddingProvider.OLLAMA, self.ollama),
+                (EmbeddingProvider.CUSTOM, self.custom),
+            ) if config
+        )
     
     @classmethod
     def from_env(cls) -> 'MultiLLMConfig':
@@ -322,27 +405,13 @@ class MultiLLMConfig:
             enable_provider_logging=os.getenv('ENABLE_PROVIDER_LOGGING', 'false').lower() == 'true'
         )
     
-    def get_available_llm_providers(self) -> List[LLMProvider]:
-        """Retorna lista de provedores LLM disponíveis"""
-        providers = []
-        if self.openai:
-            providers.append(LLMProvider.OPENAI)
-        if self.ollama:
-            providers.append(LLMProvider.OLLAMA)
-        if self.custom:
-            providers.append(LLMProvider.CUSTOM)
-        return providers
+    def get_available_llm_providers(self) -> Tuple[LLMProvider, ...]:
+        """Retorna os provedores LLM disponíveis (pré-calculados)"""
+        return self._available_llm
     
-    def get_available_embedding_providers(self) -> List[EmbeddingProvider]:
-        """Retorna lista de provedores de embedding disponíveis"""
-        providers = []
-        if self.openai:
-            providers.append(EmbeddingProvider.OPENAI)
-        if self.ollama:
-            providers.append(EmbeddingProvider.OLLAMA)
-        if self.custom:
-            providers.append(EmbeddingProvider.CUSTOM)
-        return providers
+    def get_available_embedding_providers(self) -> Tuple[EmbeddingProvider, ...]:
+        """Retorna os provedores de embedding disponíveis (pré-calculados)"""
+        return self._available_embedding
     
     def has_any_provider(self) -> bool:
         """Verifica se há pelo menos um provedor configurado"""
@@ -2,77 +2,314 @@
 Database scanner for extracting metadata from different database systems.
 Refactored to use SQLAlchemy introspection instead of manual SQL queries.
 """
-from typing import List, Dict, Any
-from sqlalchemy import MetaData, create_engine, inspect, Table, func
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import (
+    MetaData, create_engine, inspect, Table, bindparam, func, select, text
+)
+from sqlalchemy.engine import make_url
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import SingletonThreadPool
+from sqlalchemy.sql import Select
 import pandas as pd
 from config import DatabaseConfig
 from models import DatabaseSchema, TableInfo, ColumnInfo, ForeignKeyInfo
 
+try:
+    # Optional: native (Rust) reader that fills pandas blocks directly
+    import connectorx as cx
+except ImportError:
+    cx = None
+try:
+    # Optional: PostgreSQL driver whose pipeline mode batches sample queries
+    import psycopg
+except ImportError:
+    psycopg = None
+
+# Backends whose drivers support server-side (streaming) cursors
+_STREAMING_BACKENDS = frozenset({"postgresql", "mysql"})
+# Rows fetched per round-trip when streaming sample queries
+_SAMPLE_CHUNK_SIZE = 10_000
+
+# Cheap probes returning a value that changes whenever the schema changes,
+# including dropped tables, altered columns and foreign keys
+_SCHEMA_VERSION_QUERIES = {
+    "sqlite": "PRAGMA schema_version",
+    # Every DDL rewrites the catalog rows it touches, giving them a new xmin;
+    # hashing oid:xmin of all user relations, columns and constraints also
+    # changes when a row disappears
+    "postgresql": (
+        "SELECT md5(string_agg(entry, ',' ORDER BY entry)) FROM ("
+        " SELECT 'r' || c.oid || ':' || c.xmin AS entry"
+        " FROM pg_catalog.pg_class c"
+        " JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace"
+        " WHERE n.nspname !~ '^pg_' AND n.nspname <> 'information_schema'"
+        " UNION ALL"
+        " SELECT 'a' || a.attrelid || '.' || a.attnum || ':' || a.xmin"
+        " FROM pg_catalog.pg_attribute a"
+        " JOIN pg_catalog.pg_class c ON c.oid = a.attrelid"
+        " JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace"
+        " WHERE n.nspname !~ '^pg_' AND n.nspname <> 'information_schema'"
+        " UNION ALL"
+        " SELECT 'k' || k.oid || ':' || k.xmin"
+        " FROM pg_catalog.pg_constraint k"
+        " JOIN pg_catalog.pg_namespace n ON n.oid = k.connamespace"
+        " WHERE n.nspname !~ '^pg_' AND n.nspname <> 'information_schema'"
+        ") AS catalog"
+    ),
+    # information_schema has no change counter; checksum every column and
+    # key definition (SUM of CRC32 avoids the GROUP_CONCAT length limit)
+    "mysql": (
+        "SELECT CONCAT(COUNT(*), ':', COALESCE(SUM(CRC32(CONCAT_WS(':',"
+        " table_name, column_name, ordinal_position, column_type,"
+        " is_nullable, column_key, COALESCE(column_default, '')))), 0), ':',"
+        " (SELECT COALESCE(SUM(CRC32(CONCAT_WS(':', constraint_name,"
+        " table_name, column_name, COALESCE(referenced_table_name, ''),"
+        " COALESCE(referenced_column_name, '')))), 0)"
+        " FROM information_schema.key_column_usage"
+        " WHERE table_schema = DATABASE()))"
+        " FROM information_schema.columns WHERE table_schema = DATABASE()"
+    ),
+}
+
+# Catalog-based row estimates (no table scan); SQLite has no equivalent
+_ROW_ESTIMATE_QUERIES = {
+    "postgresql": (
+        "SELECT reltuples::bigint FROM pg_catalog.pg_class "
+        "WHERE oid = to_regclass(quote_ident(:table_name))"
+    ),
+    "mysql": (
+        "SELECT table_rows FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = :table_name"
+    ),
+}
+
+# Backends ConnectorX can read from a plain connection string
+_CONNECTORX_BACKENDS = frozenset(
+    {"postgresql", "mysql", "sqlite", "mssql", "oracle"}
+)
+
 
 class DatabaseScanner:
     """Database scanner using SQLAlchemy introspection"""
 
     def __init__(self, config: DatabaseConfig):
         self.config = config
+        # Accept both config.DatabaseConfig (url/type) and
+        # config_multi_llm.DatabaseConfig (database_url/database_type/path)
+        database_url = getattr(config, "database_url", None) or getattr(
+            config, "url", None
+        )
+        database_type = getattr(config, "database_type", None) or getattr(
+            config, "type", None
+        )
+        database_path = getattr(config, "database_path", None)
         # Use database_url if available, otherwise construct from database_path and type
-        if config.database_url:
-            db_url = config.database_url
-        elif config.database_type == "sqlite" and config.database_path:
-            db_url = f"sqlite:///{config.database_path}"
+        if database_url:
+            db_url = database_url
+        elif database_type == "sqlite" and database_path:
+            db_url = f"sqlite:///{database_path}"
         else:
             raise ValueError("Database configuration incomplete. Need database_url or database_path")
         
-        self.engine = create_engine(db_url)
+        self.engine = create_engine(db_url, **self._engine_options(db_url))
         # Use inspect() instead of deprecated Inspector.from_engine()
         self.inspector = inspect(self.engine)
         self.metadata = MetaData()
-        # Cache table names to avoid repeated introspection calls
+        # Cache introspection results for schema_cache_ttl seconds
+        self._cache_ttl = getattr(config, "schema_cache_ttl", 300)
         self._cached_table_names = None
+        self._table_names_cached_at = 0.0
+        # frozenset mirror of the table-name list for O(1) validation
+        self._table_name_set: frozenset = frozenset()
+        self._table_name_set_source: Optional[List[str]] = None
+        self._cached_schema: Optional[DatabaseSchema] = None
+        self._schema_cached_at = 0.0
+        # Per-table introspection results keyed by (kind, table_name)
+        self._table_metadata_cache: Dict[Tuple[str, str], Any] = {}
+        # Reflected Table objects reused by sample/stats queries
+        self._tables: Dict[str, Table] = {}
+        self._tables_lock = threading.Lock()
+        # Driver-level sample SQL compiled once per table
+        self._sample_sql: Dict[str, Tuple[str, Optional[Tuple[str, ...]], Dict[str, Any]]] = {}
+        # Base sample SELECT per table; the limit is applied per call
+        self._sample_selects: Dict[str, Select] = {}
+
+    def _engine_options(self, db_url: str) -> Dict[str, Any]:
+        """Pooling and compiled-statement cache options for create_engine"""
+        options = {
+            "pool_pre_ping": getattr(self.config, "pool_pre_ping", True),
+            "pool_recycle": getattr(self.config, "pool_recycle", 1800),
+            "query_cache_size": getattr(self.config, "query_cache_size", 1200),
+        }
+        # SQLite uses SingletonThreadPool/QueuePool defaults tuned for files
+        if make_url(db_url).get_backend_name() != "sqlite":
+            options["pool_size"] = getattr(self.config, "pool_size", 10)
+            options["max_overflow"] = getattr(self.config, "max_overflow", 20)
+        return options
+
+    def _is_fresh(self, cached_at: float) -> bool:
+        """Whether a cache entry stored at cached_at is within the TTL"""
+        return time.monotonic() - cached_at < self._cache_ttl
 
     def get_table_names(self) -> List[str]:
         """Return list of table names using SQLAlchemy introspection"""
+        if self._cached_table_names is not None and not self._is_fresh(
+            self._table_names_cached_at
+        ):
+            self._invalidate_table_cache()
         if self._cached_table_names is None:
             try:
                 self._cached_table_names = self.inspector.get_table_names()
             except SQLAlchemyError as e:
                 raise RuntimeError(f"Error getting table names: {e}")
+            self._table_names_cached_at = time.monotonic()
         return self._cached_table_names
 
     def _invalidate_table_cache(self):
-        """Invalidate cached table names (useful if schema changes)"""
+        """Invalidate cached introspection results (useful if schema changes)"""
         self._cached_table_names = None
+        self._cached_schema = None
+        self._table_metadata_cache.clear()
+        with self._tables_lock:
+            self._tables.clear()
+            self._sample_sql.clear()
+            self._sample_selects.clear()
+            self.metadata.clear()
+        # The inspector memoizes its own results; drop them as well
+        info_cache = getattr(self.inspector, "info_cache", None)
+        if info_cache is not None:
+            info_cache.clear()
+
+    def _get_table_object(self, table_name: str) -> Table:
+        """Return the reflected Table, reflecting it only on first use"""
+        table_obj = self._tables.get(table_name)
+        if table_obj is None:
+            with self._tables_lock:
+                table_obj = self._tables.get(table_name)
+                if table_obj is None:
+                    table_obj = Table(
+                        table_name, self.metadata, autoload_with=self.engine
+                    )
+                    self._tables[table_name] = table_obj
+        return table_obj
+
+    def _cached_table_lookup(
+        self, kind: str, table_name: str, loader: Callable[[], Any]
+    ) -> Any:
+        """Return a per-table introspection result, loading it once"""
+        key = (kind, table_name)
+        if key not in self._table_metadata_cache:
+            self._table_metadata_cache[key] = loader()
+        return self._table_metadata_cache[key]
 
     def refresh_schema(self):
         """Refresh schema information by invalidating caches"""
+        # Also drops reflected Table objects and forces metadata reload
         self._invalidate_table_cache()
-        # Force reload of metadata
-        self.metadata.clear()
+        self._remove_schema_cache()
         return self.get_table_names()
 
+    def _schema_cache_path(self) -> Optional[str]:
+        """Location of the persistent reflection cache for this DSN"""
+        cache_dir = getattr(self.config, "schema_cache_dir", None)
+        url = self.engine.url
+        if not cache_dir or url.database in (None, "", ":memory:"):
+            return None
+        dsn = url.render_as_string(hide_password=True)
+        digest = hashlib.sha256(dsn.encode("utf-8")).hexdigest()
+        return os.path.join(os.path.expanduser(cache_dir), f"{digest}.json")
+
+    def _schema_version(self) -> Optional[str]:
+        """Probe the catalog for a value that changes with the schema"""
+        query = _SCHEMA_VERSION_QUERIES.get(self.engine.url.get_backend_name())
+        if query is None:
+            return None
+        try:
+            with self.engine.connect() as conn:
+                return str(conn.execute(text(query)).scalar())
+        except SQLAlchemyError as e:
+            logging.warning(f"Could not probe schema version: {e}")
+            return None
+
+    def _load_schema_cache(self, version: str) -> Optional[DatabaseSchema]:
+        """Return the persisted schema if it matches the current version"""
+        path = self._schema_cache_path()
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("schema_version") != version:
+                return None
+            # Bound staleness by the TTL in case the probe misses a change
+            if not 0 <= time.time() - cached.get("stored_at", 0) < self._cache_ttl:
+                return None
+            return DatabaseSchema(
+                tables=[TableInfo.from_dict(t) for t in cached["tables"]]
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable schema cache {path}: {e}")
+            return None
+
+    def _store_schema_cache(self, version: str, schema: DatabaseSchema):
+        """Persist the reflected schema (JSON, never pickle) for next start"""
+        path = self._schema_cache_path()
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "schema_version": version,
+                        "stored_at": time.time(),
+                        "tables": [t.to_dict() for t in schema.tables],
+                    },
+                    f,
+                )
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not write schema cache {path}: {e}")
+
+    def _remove_schema_cache(self):
+        """Delete the persisted schema so the next scan reflects again"""
+        path = self._schema_cache_path()
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging.warning(f"Could not remove schema cache {path}: {e}")
+
     def _get_column_info(self, table_name: str) -> List[ColumnInfo]:
         """Get column information using SQLAlchemy introspection"""
+        return self._cached_table_lookup(
+            "columns", table_name,
+            lambda: self._load_column_info(table_name)
+        )
+
+    def _load_column_info(self, table_name: str) -> List[ColumnInfo]:
         try:
             columns = self.inspector.get_columns(table_name)
             pk_constraint = self.inspector.get_pk_constraint(table_name)
-            pk_columns = set(pk_constraint.get('constrained_columns', []))
-            
-            column_info_list = []
-            for col in columns:
-                column_info = ColumnInfo(
-                    name=col['name'],
-                    data_type=str(col['type']),
-                    is_nullable=col['nullable'],
-                    is_primary_key=col['name'] in pk_columns
-                )
-                column_info_list.append(column_info)
-            
-            return column_info_list
+            return self._build_column_info(columns, pk_constraint)
         except SQLAlchemyError as e:
             raise RuntimeError(f"Error getting columns for {table_name}: {e}")
 
     def _get_primary_keys(self, table_name: str) -> List[str]:
         """Get primary key columns using SQLAlchemy introspection"""
+        return self._cached_table_lookup(
+            "primary_keys", table_name,
+            lambda: self._load_primary_keys(table_name)
+        )
+
+    def _load_primary_keys(self, table_name: str) -> List[str]:
         try:
             pk_constraint = self.inspector.get_pk_constraint(table_name)
             return pk_constraint.get('constrained_columns', [])
@@ -83,126 +320,489 @@ class DatabaseScanner:
 
     def _get_foreign_keys(self, table_name: str) -> List[ForeignKeyInfo]:
         """Get foreign key information using SQLAlchemy introspection"""
+        return self._cached_table_lookup(
+            "foreign_keys", table_name,
+            lambda: self._load_foreign_keys(table_name)
+        )
+
+    def _load_foreign_keys(self, table_name: str) -> List[ForeignKeyInfo]:
         try:
             fk_constraints = self.inspector.get_foreign_keys(table_name)
-            foreign_keys = []
-            
-            for fk in fk_constraints:
-                # SQLAlchemy returns foreign keys as list of columns
-                for i, col in enumerate(fk['constrained_columns']):
-                    fk_info = ForeignKeyInfo(
-                        column=col,
-                        references_table=fk['referred_table'],
-                        references_column=fk['referred_columns'][i]
-                    )
-                    foreign_keys.append(fk_info)
-            
-            return foreign_keys
+            return self._build_foreign_keys(fk_constraints)
         except SQLAlchemyError as e:
             raise RuntimeError(
                 f"Error getting foreign keys for {table_name}: {e}"
             )
 
+    @staticmethod
+    def _build_column_info(
+        columns: List[Dict[str, Any]], pk_constraint: Dict[str, Any]
+    ) -> List[ColumnInfo]:
+        """Build ColumnInfo objects from raw inspector results"""
+        pk_columns = set(pk_constraint.get('constrained_columns', []))
+        return [
+            ColumnInfo(
+                name=col['name'],
+                data_type=str(col['type']),
+                is_nullable=col['nullable'],
+                is_primary_key=col['name'] in pk_columns
+            )
+            for col in columns
+        ]
+
+    @staticmethod
+    def _build_foreign_keys(
+        fk_constraints: List[Dict[str, Any]]
+    ) -> List[ForeignKeyInfo]:
+        """Build ForeignKeyInfo objects from raw inspector results"""
+        foreign_keys = []
+        for fk in fk_constraints:
+            # SQLAlchemy returns foreign keys as list of columns
+            for i, col in enumerate(fk['constrained_columns']):
+                foreign_keys.append(ForeignKeyInfo(
+                    column=col,
+                    references_table=fk['referred_table'],
+                    references_column=fk['referred_columns'][i]
+                ))
+        return foreign_keys
+
     def scan_database(self) -> DatabaseSchema:
         """Scan database using SQLAlchemy introspection"""
+        if self._cached_schema is not None and self._is_fresh(
+            self._schema_cached_at
+        ):
+            return self._cached_schema
+        
         try:
-            table_names = self.get_table_names()
-            tables = []
-            
-            for table_name in table_names:
-                columns = self._get_column_info(table_name)
-                primary_keys = self._get_primary_keys(table_name)
-                foreign_keys = self._get_foreign_keys(table_name)
-                
-                table = TableInfo(
-                    name=table_name,
-                    columns=columns,
-                    primary_keys=primary_keys,
-                    foreign_keys=foreign_keys
-                )
-                tables.append(table)
+            version = (
+                self._schema_version() if self._schema_cache_path() else None
+            )
+            if version is not None:
+                cached = self._load_schema_cache(version)
+                if cached is not None:
+                    return self._remember_schema(cached)
             
-            return DatabaseSchema(tables=tables)
+            schema = DatabaseSchema(
+                tables=self._scan_tables(self.get_table_names())
+            )
+            if version is not None:
+                self._store_schema_cache(version, schema)
+            return self._remember_schema(schema)
             
         except SQLAlchemyError as e:
             raise RuntimeError(f"Error scanning database: {e}")
 
+    def get_table_schema(self, table_name: str) -> TableInfo:
+        """Introspect a single table without scanning the whole database"""
+        sanitized_table = self._sanitize_table_name(table_name)
+        
+        if self._cached_schema is not None and self._is_fresh(
+            self._schema_cached_at
+        ):
+            table = self._cached_schema.get_table(sanitized_table)
+            if table is not None:
+                return table
+        
+        try:
+            return TableInfo(
+                name=sanitized_table,
+                columns=self._get_column_info(sanitized_table),
+                primary_keys=self._get_primary_keys(sanitized_table),
+                foreign_keys=self._get_foreign_keys(sanitized_table)
+            )
+        except SQLAlchemyError as e:
+            raise RuntimeError(f"Error scanning table {table_name}: {e}")
+
+    def _scan_tables(self, table_names: List[str]) -> List[TableInfo]:
+        """Introspect all tables using as few round-trips as possible"""
+        if not hasattr(self.inspector, "get_multi_columns"):
+            # SQLAlchemy < 2.0: reflect every table in a single pass instead
+            self.metadata.reflect(
+                bind=self.engine, only=table_names, views=False
+            )
+            with self._tables_lock:
+                self._tables.update(
+                    (name, self.metadata.tables[name]) for name in table_names
+                )
+            return [
+                self._table_info_from_reflected(self._tables[name])
+                for name in table_names
+            ]
+        
+        # SQLAlchemy 2.0 bulk inspector APIs: one query per kind covering
+        # every table, keyed by (schema, table_name)
+        columns_by_table = self.inspector.get_multi_columns(
+            filter_names=table_names
+        )
+        pks_by_table = self.inspector.get_multi_pk_constraint(
+            filter_names=table_names
+        )
+        fks_by_table = self.inspector.get_multi_foreign_keys(
+            filter_names=table_names
+        )
+        
+        tables = []
+        for table_name in table_names:
+            key = (None, table_name)
+            pk_constraint = pks_by_table.get(key) or {}
+            columns = self._build_column_info(
+                columns_by_table.get(key, []), pk_constraint
+            )
+            primary_keys = list(pk_constraint.get('constrained_columns', []))
+            foreign_keys = self._build_foreign_keys(fks_by_table.get(key, []))
+            
+            # Share the results with the single-table lookups
+            self._table_metadata_cache[("columns", table_name)] = columns
+            self._table_metadata_cache[("primary_keys", table_name)] = (
+                primary_keys
+            )
+            self._table_metadata_cache[("foreign_keys", table_name)] = (
+                foreign_keys
+            )
+            
+            tables.append(TableInfo(
+                name=table_name,
+                columns=columns,
+                primary_keys=primary_keys,
+                foreign_keys=foreign_keys
+            ))
+        return tables
+
+    def _remember_schema(self, schema: DatabaseSchema) -> DatabaseSchema:
+        """Keep the scanned schema in memory for the cache TTL"""
+        self._cached_schema = schema
+        self._schema_cached_at = time.monotonic()
+        return schema
+
+    @staticmethod
+    def _table_info_from_reflected(table_obj: Table) -> TableInfo:
+        """Build TableInfo from an already reflected Table object"""
+        columns = []
+        foreign_keys = []
+        for col in table_obj.columns:
+            columns.append(ColumnInfo(
+                name=col.name,
+                data_type=str(col.type),
+                is_nullable=col.nullable,
+                is_primary_key=col.primary_key
+            ))
+            for fk in col.foreign_keys:
+                foreign_keys.append(ForeignKeyInfo(
+                    column=col.name,
+                    references_table=fk.column.table.name,
+                    references_column=fk.column.name
+                ))
+        
+        return TableInfo(
+            name=table_obj.name,
+            columns=columns,
+            primary_keys=[col.name for col in table_obj.primary_key.columns],
+            foreign_keys=foreign_keys
+        )
+
+    def _get_table_name_set(self) -> frozenset:
+        """Return the known table names as a frozenset (rebuilt on change)"""
+        table_names = self.get_table_names()
+        if table_names is not self._table_name_set_source:
+            self._table_name_set = frozenset(table_names)
+            self._table_name_set_source = table_names
+        return self._table_name_set
+
     def _sanitize_table_name(self, table_name: str) -> str:
         """Validate table name against known tables"""
         if not table_name or not isinstance(table_name, str):
             raise ValueError("Table name must be a non-empty string")
         
-        table_name = table_name.strip()
-        if not table_name:
-            raise ValueError("Table name must be a non-empty string")
-        
         # Verify table exists using introspection (safer than manual queries)
         try:
-            valid_tables = self.get_table_names()
-            if table_name not in valid_tables:
-                raise ValueError(f"Invalid table: {table_name}")
+            valid_tables = self._get_table_name_set()
         except Exception as e:
             raise ValueError(f"Error validating table: {e}")
         
+        # Fast path: an exact known table name needs no further checks
+        if table_name in valid_tables:
+            return table_name
+        
+        table_name = table_name.strip()
+        if not table_name:
+            raise ValueError("Table name must be a non-empty string")
+        if table_name not in valid_tables:
+            raise ValueError(
+                f"Error validating table: Invalid table: {table_name}"
+            )
+        
         return table_name
 
+    def _is_in_memory_sqlite(self) -> bool:
+        """Whether the engine points at a private in-memory SQLite database"""
+        url = self.engine.url
+        return (
+            url.get_backend_name() == "sqlite"
+            and url.database in (None, "", ":memory:")
+        )
+
+    def supports_concurrent_queries(self) -> bool:
+        """Whether queries from other threads see this same database
+        
+        In-memory SQLite and SingletonThreadPool hand each thread its own
+        connection, which for :memory: is a separate, empty database.
+        """
+        return not (
+            self._is_in_memory_sqlite()
+            or isinstance(self.engine.pool, SingletonThreadPool)
+        )
+
+    def _connectorx_url(self) -> Optional[str]:
+        """Connection string for ConnectorX, or None if it can't be used"""
+        if cx is None:
+            return None
+        url = self.engine.url
+        backend = url.get_backend_name()
+        if backend not in _CONNECTORX_BACKENDS:
+            return None
+        # ConnectorX opens its own connection: in-memory SQLite is invisible
+        if self._is_in_memory_sqlite():
+            return None
+        return url.set(drivername=backend).render_as_string(
+            hide_password=False
+        )
+
     def query_table_sample(
         self, table_name: str, limit: int = 100
     ) -> pd.DataFrame:
         """Return a sample of table data using SQLAlchemy Table object"""
         try:
-            # Validate table name
-            sanitized_table = self._sanitize_table_name(table_name)
+            table_obj = self._sample_table(table_name, limit)
+            # Build query using SQLAlchemy Core (100% safe)
+            query = self._sample_select(table_obj, limit)
             
-            # Validate limit
-            if not isinstance(limit, int) or limit <= 0:
-                raise ValueError("Limit must be a positive integer")
+            # ConnectorX opens its own connection, so try it before
+            # checking one out of the pool
+            cx_url = self._connectorx_url()
+            if cx_url:
+                sql = str(query.compile(
+                    dialect=self.engine.dialect,
+                    compile_kwargs={"literal_binds": True}
+                ))
+                try:
+                    return cx.read_sql(cx_url, sql, return_type="pandas")
+                except BaseException as e:
+                    # Unsupported column types surface as RuntimeError,
+                    # ValueError/TypeError or a pyo3 PanicException (a
+                    # BaseException); the SQLAlchemy path is always safe
+                    if not isinstance(e, Exception) and type(e).__name__ != "PanicException":
+                        raise
+                    logging.warning(
+                        f"ConnectorX could not read {table_name}, "
+                        f"falling back to SQLAlchemy: {e}"
+                    )
             
             with self.engine.connect() as conn:
-                # Use SQLAlchemy Table object for safe construction
-                table_obj = Table(
-                    sanitized_table,
-                    self.metadata,
-                    autoload_with=conn
-                )
+                if self.engine.url.get_backend_name() in _STREAMING_BACKENDS:
+                    return self._read_sql_streaming(query, conn, table_obj)
                 
-                # Build query using SQLAlchemy Core (100% safe)
-                query = table_obj.select().limit(limit)
+                result = self._execute_sample(conn, table_obj, limit)
+                return pd.DataFrame.from_records(
+                    result.fetchall(), columns=list(result.keys()),
+                    coerce_float=True
+                )
                 
-                return pd.read_sql(query, conn)
+        except SQLAlchemyError as e:
+            raise RuntimeError(f"Error querying table {table_name}: {e}")
+
+    def query_table_rows(
+        self, table_name: str, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Return a sample of table data as a list of row dictionaries
+        
+        Skips the pandas DataFrame for callers that only need
+        JSON-ready rows, such as the API responses.
+        """
+        try:
+            table_obj = self._sample_table(table_name, limit)
+            
+            with self.engine.connect() as conn:
+                result = self._execute_sample(conn, table_obj, limit)
+                return [dict(row) for row in result.mappings()]
                 
         except SQLAlchemyError as e:
             raise RuntimeError(f"Error querying table {table_name}: {e}")
 
+    def query_tables_rows(
+        self, table_names: List[str], limit: int = 100
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Return row samples for several tables over a single connection
+        
+        On psycopg 3 the SELECTs are sent in pipeline mode, so all the
+        samples cost one server round-trip.
+        """
+        try:
+            tables = {
+                name: self._sample_table(name, limit) for name in table_names
+            }
+            
+            with self.engine.connect() as conn:
+                if self.engine.dialect.driver == "psycopg":
+                    return self._query_rows_pipelined(conn, tables, limit)
+                return {
+                    name: [
+                        dict(row) for row in
+                        self._execute_sample(conn, table_obj, limit).mappings()
+                    ]
+                    for name, table_obj in tables.items()
+                }
+                
+        except SQLAlchemyError as e:
+            raise RuntimeError(f"Error querying tables {table_names}: {e}")
+
+    def _query_rows_pipelined(
+        self, conn, tables: Dict[str, Table], limit: int
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Queue every sample SELECT in a psycopg pipeline, then fetch
+        
+        Driver errors bypass SQLAlchemy here, so they are translated to the
+        same RuntimeError the other query methods raise.
+        """
+        driver_conn = conn.connection.driver_connection
+        try:
+            cursors = {}
+            with driver_conn.pipeline():
+                for name, table_obj in tables.items():
+                    cursor = driver_conn.cursor()
+                    cursor.execute(*self._sample_statement(table_obj, limit))
+                    cursors[name] = cursor
+            
+            samples = {}
+            for name, cursor in cursors.items():
+                columns = [column.name for column in cursor.description]
+                samples[name] = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                cursor.close()
+            return samples
+        except psycopg.Error as e:
+            raise RuntimeError(f"Error querying tables {list(tables)}: {e}")
+
+    def _sample_table(self, table_name: str, limit: int) -> Table:
+        """Validate sample arguments and return the table object"""
+        # Validate table name
+        sanitized_table = self._sanitize_table_name(table_name)
+        
+        # Validate limit
+        if not isinstance(limit, int) or limit <= 0:
+            raise ValueError("Limit must be a positive integer")
+        
+        # Use SQLAlchemy Table object for safe construction
+        return self._get_table_object(sanitized_table)
+
+    def _sample_select(self, table_obj: Table, limit: int) -> Select:
+        """Return the sample SELECT statement for a table and limit.
+
+        The base statement is built once per table. SQLAlchemy renders the
+        limit as a bound parameter, so every limit shares one entry in its
+        compiled-statement cache, and the statements are dropped with the
+        reflected tables they were built on.
+        """
+        with self._tables_lock:
+            query = self._sample_selects.get(table_obj.name)
+            if query is None:
+                query = self._sample_selects[table_obj.name] = table_obj.select()
+        return query.limit(limit)
+
+    def _execute_sample(self, conn, table_obj: Table, limit: int):
+        """Run the sample SELECT through SQLAlchemy
+        
+        Unlike raw driver SQL this keeps the column result processors, so
+        e.g. SQLite DATETIME and BOOLEAN values come back typed; the
+        compiled-statement cache still avoids recompiling it.
+        """
+        return conn.execute(self._sample_select(table_obj, limit))
+
+    def _sample_statement(self, table_obj: Table, limit: int) -> Tuple[str, Any]:
+        """Return the pre-compiled sample SQL and its driver parameters
+        
+        Only for driver-level execution (the psycopg pipeline), where the
+        driver itself converts the column types.
+        """
+        compiled = self._sample_sql.get(table_obj.name)
+        if compiled is None:
+            stmt = select(table_obj).limit(bindparam("lim"))
+            sql = stmt.compile(
+                dialect=self.engine.dialect,
+                compile_kwargs={"render_postcompile": True}
+            )
+            positions = tuple(sql.positiontup) if sql.positiontup else None
+            compiled = (str(sql), positions, sql.construct_params({"lim": 0}))
+            self._sample_sql[table_obj.name] = compiled
+        
+        statement, positions, defaults = compiled
+        params = dict(defaults, lim=limit)
+        if positions is not None:
+            params = tuple(params[name] for name in positions)
+        return statement, params
+
+    @staticmethod
+    def _read_sql_streaming(query, conn, table_obj: Table) -> pd.DataFrame:
+        """Read a query through a server-side cursor in bounded chunks.
+
+        Drivers such as psycopg2 otherwise buffer the whole result set
+        client-side before pandas copies it again into the DataFrame.
+        """
+        stream_conn = conn.execution_options(
+            stream_results=True, max_row_buffer=_SAMPLE_CHUNK_SIZE
+        )
+        frames = list(
+            pd.read_sql(query, stream_conn, chunksize=_SAMPLE_CHUNK_SIZE)
+        )
+        if not frames:
+            return pd.DataFrame(columns=[col.name for col in table_obj.columns])
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True)
+
     def get_table_stats(self, table_name: str) -> Dict[str, Any]:
-        """Get table statistics using SQLAlchemy"""
+        """Get table statistics using SQLAlchemy.
+
+        On PostgreSQL and MySQL the row count comes from catalog statistics
+        (``row_count_is_estimate`` is True) instead of a full COUNT(*) scan.
+        """
         try:
             sanitized_table = self._sanitize_table_name(table_name)
             
+            table_obj = self._get_table_object(sanitized_table)
+            
             with self.engine.connect() as conn:
-                table_obj = Table(
-                    sanitized_table,
-                    self.metadata,
-                    autoload_with=conn
-                )
-                
-                # Count using SQLAlchemy
-                count_query = table_obj.select().with_only_columns(
-                    func.count().label('total_rows')
-                )
-                
-                result = conn.execute(count_query)
-                row_count = result.scalar()
+                row_count = self._estimate_row_count(conn, sanitized_table)
+                is_estimate = row_count is not None
+                if not is_estimate:
+                    # Count using SQLAlchemy
+                    count_query = select(
+                        func.count().label('total_rows')
+                    ).select_from(table_obj)
+                    row_count = conn.execute(count_query).scalar()
                 
                 return {
                     'table_name': sanitized_table,
                     'row_count': row_count,
+                    'row_count_is_estimate': is_estimate,
                     'column_count': len(table_obj.columns)
                 }
                 
         except SQLAlchemyError as e:
             raise RuntimeError(f"Error getting stats for {table_name}: {e}")
 
+    def _estimate_row_count(self, conn, table_name: str) -> Optional[int]:
+        """Approximate row count from catalog statistics, if available"""
+        query = _ROW_ESTIMATE_QUERIES.get(self.engine.url.get_backend_name())
+        if query is None:
+            return None
+        estimate = conn.execute(
+            text(query), {"table_name": table_name}
+        ).scalar()
+        # Never-analyzed tables report -1 on PostgreSQL 14+ but 0 before
+        # (and stale MySQL stats can also say 0): count those exactly
+        if estimate is None or estimate <= 0:
+            return None
+        return int(estimate)
+
     def close(self):
         """Dispose SQLAlchemy engine and clear caches"""
         if hasattr(self, "engine"):
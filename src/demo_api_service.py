@@ -2,10 +2,15 @@
 Demo API Service - Simplified version without OpenAI dependency
 """
 
+import asyncio
+import re
 import time
 import os
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+from functools import lru_cache
+
+from sqlalchemy.pool import QueuePool
 
 from api_models import (
     QueryResponse, SchemaResponse, TableInfo, 
@@ -13,6 +18,39 @@ from api_models import (
 )
 from config import DatabaseConfig, RAGConfig
 from database_scanner import DatabaseScanner
+from models import TableInfo as SchemaTableInfo
+
+
+# Demo natural language routes, compiled into a single anchored alternation.
+# Each route is a set of lookaheads ("contains X and Y"); alternatives are
+# tried in order, so the first matching route wins like an if/elif chain.
+_NL_ROUTER = re.compile(
+    r"^(?:"
+    r"(?P<top_customers_by_revenue>(?=.*top)(?=.*customer)(?=.*revenue))"
+    r"|(?P<recent_orders>(?=.*order)(?=.*(?:last|recent)))"
+    r"|(?P<products_by_price>(?=.*product)(?=.*price))"
+    r"|(?P<all_customers>(?=.*customer)(?=.*all))"
+    r"|(?P<all_products>(?=.*product)(?=.*all))"
+    r")",
+    re.IGNORECASE | re.DOTALL
+)
+
+_NL_ROUTE_SQL = {
+    "top_customers_by_revenue": (
+        "SELECT * FROM customers ORDER BY total_revenue DESC LIMIT 5"
+    ),
+    "recent_orders": "SELECT * FROM orders ORDER BY order_date DESC LIMIT 10",
+    "products_by_price": "SELECT * FROM products ORDER BY price DESC LIMIT 10",
+    "all_customers": "SELECT * FROM customers LIMIT 10",
+    "all_products": "SELECT * FROM products LIMIT 10",
+}
+
+
+@lru_cache(maxsize=1024)
+def _route_natural_language(normalized_query: str) -> Optional[str]:
+    """Return the demo SQL for a normalized query (first matching route)"""
+    match = _NL_ROUTER.match(normalized_query)
+    return _NL_ROUTE_SQL[match.lastgroup] if match else None
 
 
 class DemoAPIService:
@@ -24,6 +62,8 @@ class DemoAPIService:
         self.rag_config: Optional[RAGConfig] = None
         self._initialized = False
         self._initialization_error = None
+        # Bounds concurrent scanner calls; None means run them inline
+        self._db_semaphore: Optional[asyncio.Semaphore] = None
     
     async def initialize(self, force_rebuild: bool = False) -> InitializeResponse:
         """Initialize the demo system"""
@@ -36,9 +76,10 @@ class DemoAPIService:
             
             # Initialize scanner only
             self.scanner = DatabaseScanner(self.db_config)
+            self._db_semaphore = self._create_db_semaphore()
             
             # Test database connection
-            table_names = self.scanner.get_table_names()
+            table_names = await self._run_db(self.scanner.get_table_names)
             
             self._initialized = True
             self._initialization_error = None
@@ -64,6 +105,26 @@ class DemoAPIService:
                 error=str(e)
             )
     
+    def _create_db_semaphore(self) -> Optional[asyncio.Semaphore]:
+        """Size scanner concurrency to the engine's connection pool"""
+        pool = self.scanner.engine.pool
+        # Only QueuePool hands out independent connections to each thread;
+        # Singleton/Static pools (e.g. in-memory SQLite) must stay inline
+        if not isinstance(pool, QueuePool) or pool.size() <= 1:
+            return None
+        return asyncio.Semaphore(pool.size())
+    
+    async def _run_db(self, func, *args, **kwargs):
+        """Run a blocking scanner call in a worker thread.
+
+        The scanner is synchronous (SQLAlchemy + pandas); running it via
+        asyncio.to_thread keeps the event loop free to serve other requests.
+        """
+        if self._db_semaphore is None:
+            return func(*args, **kwargs)
+        async with self._db_semaphore:
+            return await asyncio.to_thread(func, *args, **kwargs)
+    
     def _ensure_initialized(self):
         """Ensure the system is initialized"""
         if not self._initialized or not self.scanner:
@@ -91,11 +152,9 @@ class DemoAPIService:
                 
                 if sql_query:
                     try:
-                        results = self.scanner.query_table_sample(sql_query, limit=limit)
-                        if isinstance(results, dict) and 'data' in results:
-                            result_data = results['data']
-                        else:
-                            result_data = results if isinstance(results, list) else []
+                        result_data = await self._run_db(
+                            self.scanner.query_table_rows, sql_query, limit=limit
+                        )
                     except Exception as e:
                         # If SQL fails, return demo data
                         result_data = self._get_demo_data(query)
@@ -115,11 +174,9 @@ class DemoAPIService:
             elif query_type == "sql":
                 # Direct SQL execution
                 try:
-                    results = self.scanner.query_table_sample(query, limit=limit)
-                    if isinstance(results, dict) and 'data' in results:
-                        result_data = results['data']
-                    else:
-                        result_data = results if isinstance(results, list) else []
+                    result_data = await self._run_db(
+                        self.scanner.query_table_rows, query, limit=limit
+                    )
                     
                     return QueryResponse(
                         success=True,
@@ -157,24 +214,11 @@ class DemoAPIService:
     
     def _demo_natural_language_to_sql(self, query: str) -> Optional[str]:
         """Demo: Simple natural language to SQL conversion"""
-        query_lower = query.lower()
-        
-        # Simple pattern matching for demo
-        if "top" in query_lower and "customer" in query_lower:
-            if "revenue" in query_lower:
-                return "SELECT * FROM customers ORDER BY total_revenue DESC LIMIT 5"
-        
-        if "order" in query_lower and ("last" in query_lower or "recent" in query_lower):
-            return "SELECT * FROM orders ORDER BY order_date DESC LIMIT 10"
-        
-        if "product" in query_lower and "price" in query_lower:
-            return "SELECT * FROM products ORDER BY price DESC LIMIT 10"
-        
-        if "customer" in query_lower and "all" in query_lower:
-            return "SELECT * FROM customers LIMIT 10"
-        
-        if "product" in query_lower and "all" in query_lower:
-            return "SELECT * FROM products LIMIT 10"
+        # Normalize case/whitespace once so equivalent queries share a cache
+        # entry; the routes only look for single words, so this is lossless
+        sql_query = _route_natural_language(" ".join(query.lower().split()))
+        if sql_query:
+            return sql_query
         
         # Default fallback
         return "SELECT * FROM customers LIMIT 5"
@@ -202,21 +246,40 @@ class DemoAPIService:
             tables_info = []
             
             if table_name:
-                # Get specific table info
+                # Get specific table info, introspecting only that table
+                try:
+                    table_schema = await self._run_db(
+                        self.scanner.get_table_schema, table_name
+                    )
+                except ValueError:
+                    table_schema = None
                 table_info = await self._get_table_info(
-                    table_name, include_sample_data, sample_limit
+                    table_name, table_schema,
+                    include_sample_data, sample_limit
                 )
                 if table_info:
                     tables_info.append(table_info)
             else:
-                # Get all tables
-                table_names = self.scanner.get_table_names()
-                for name in table_names:
-                    table_info = await self._get_table_info(
-                        name, include_sample_data, sample_limit
+                # Reflect the schema once; get_table is an indexed lookup
+                schema = await self._run_db(self.scanner.scan_database)
+                
+                # Get all tables, fetching per-table details concurrently
+                table_names = await self._run_db(self.scanner.get_table_names)
+                samples = {}
+                if include_sample_data:
+                    samples = await self._fetch_samples(
+                        [name for name in table_names if schema.get_table(name)],
+                        sample_limit
+                    )
+                results = await asyncio.gather(*(
+                    self._get_table_info(
+                        name, schema.get_table(name),
+                        include_sample_data, sample_limit,
+                        sample_rows=samples.get(name)
                     )
-                    if table_info:
-                        tables_info.append(table_info)
+                    for name in table_names
+                ))
+                tables_info.extend(info for info in results if info)
             
             return SchemaResponse(
                 success=True,
@@ -234,29 +297,34 @@ class DemoAPIService:
                 error=str(e)
             )
     
+    async def _fetch_samples(
+        self, table_names: List[str], sample_limit: int
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch sample rows for many tables in one batched scanner call"""
+        try:
+            return await self._run_db(
+                self.scanner.query_tables_rows, table_names, limit=sample_limit
+            )
+        except Exception:
+            # Fall back to per-table sampling in _get_table_info
+            return {}
+    
     async def _get_table_info(
         self, 
         table_name: str, 
+        table_schema: Optional[SchemaTableInfo],
         include_sample_data: bool = False,
-        sample_limit: int = 5
+        sample_limit: int = 5,
+        sample_rows: Optional[List[Dict[str, Any]]] = None
     ) -> Optional[TableInfo]:
-        """Get information for a specific table"""
+        """Get information for a specific table from its scanned schema"""
         try:
-            # Get table stats
-            stats = self.scanner.get_table_stats(table_name)
-            
-            # Get column info from scanner
-            schema = self.scanner.scan_database()
-            table_schema = None
-            
-            for table in schema.tables:
-                if table.name == table_name:
-                    table_schema = table
-                    break
-            
             if not table_schema:
                 return None
             
+            # Get table stats
+            stats = await self._run_db(self.scanner.get_table_stats, table_name)
+            
             # Format column information
             columns = []
             for col in table_schema.columns:
@@ -271,22 +339,21 @@ class DemoAPIService:
             foreign_keys = []
             for fk in table_schema.foreign_keys:
                 foreign_keys.append({
-                    "column": fk.column_name,
-                    "referenced_table": fk.referenced_table,
-                    "referenced_column": fk.referenced_column
+                    "column": fk.column,
+                    "referenced_table": fk.references_table,
+                    "referenced_column": fk.references_column
                 })
             
             # Get sample data if requested
             sample_data = None
-            if include_sample_data:
+            if include_sample_data and sample_rows is not None:
+                sample_data = sample_rows
+            elif include_sample_data:
                 try:
-                    sample_result = self.scanner.query_table_sample(
+                    sample_data = await self._run_db(
+                        self.scanner.query_table_rows,
                         table_name, limit=sample_limit
                     )
-                    if isinstance(sample_result, dict) and 'data' in sample_result:
-                        sample_data = sample_result['data']
-                    elif isinstance(sample_result, list):
-                        sample_data = sample_result
                 except:
                     sample_data = []
             
@@ -294,6 +361,7 @@ class DemoAPIService:
                 table_name=table_name,
                 column_count=stats.get('column_count', len(columns)),
                 row_count=stats.get('row_count'),
+                row_count_is_estimate=stats.get('row_count_is_estimate', False),
                 columns=columns,
                 sample_data=sample_data,
                 foreign_keys=foreign_keys
@@ -307,23 +375,33 @@ class DemoAPIService:
         try:
             self._ensure_initialized()
             
-            table_names = self.scanner.get_table_names()
+            table_names = await self._run_db(self.scanner.get_table_names)
             total_tables = len(table_names)
             total_columns = 0
             table_stats = []
             
-            for table_name in table_names:
-                try:
-                    stats = self.scanner.get_table_stats(table_name)
-                    total_columns += stats.get('column_count', 0)
-                    table_stats.append({
-                        "table_name": table_name,
-                        "row_count": stats.get('row_count', 0),
-                        "column_count": stats.get('column_count', 0)
-                    })
-                except:
+            # Stats queries are latency bound, so issue them concurrently
+            results = await asyncio.gather(
+                *(
+                    self._run_db(self.scanner.get_table_stats, table_name)
+                    for table_name in table_names
+                ),
+                return_exceptions=True
+            )
+            
+            for table_name, stats in zip(table_names, results):
+                if isinstance(stats, Exception):
                     # Skip tables that can't be analyzed
                     continue
+                total_columns += stats.get('column_count', 0)
+                table_stats.append({
+                    "table_name": table_name,
+                    "row_count": stats.get('row_count', 0),
+                    "row_count_is_estimate": stats.get(
+                        'row_count_is_estimate', False
+                    ),
+                    "column_count": stats.get('column_count', 0)
+                })
             
             return DatabaseStatsResponse(
                 success=True,
@@ -350,7 +428,7 @@ class DemoAPIService:
             database_connected = False
             if self.scanner:
                 try:
-                    self.scanner.get_table_names()
+                    await self._run_db(self.scanner.get_table_names)
                     database_connected = True
                 except:
                     database_connected = False
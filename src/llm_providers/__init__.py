@@ -4,8 +4,41 @@ LLM Provider abstraction layer for supporting multiple LLM backends.
 This module provides a flexible interface for integrating various LLM providers
 including OpenAI, Anthropic, Ollama, Hugging Face, and custom enterprise models.
 """
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import ssl
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ContextDecorator
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+import certifi
+import numpy as np
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # Optional: faster JSON for large embedding payloads
+    orjson = None
+try:
+    import httpx
+    import h2  # noqa: F401 - required by httpx for http2=True
+except ImportError:  # Optional: HTTP/2 multiplexing for https provider APIs
+    httpx = None
 from dataclasses import dataclass
 from enum import Enum
 
@@ -19,7 +52,7 @@ class LLMProvider(Enum):
     CUSTOM = "custom"  # For enterprise/custom endpoints
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LLMConfig:
     """Base configuration for LLM providers"""
     provider: LLMProvider
@@ -40,7 +73,7 @@ class LLMConfig:
     extra_params: Optional[Dict[str, Any]] = None
 
 
-@dataclass 
+@dataclass(slots=True, frozen=True)
 class EmbeddingConfig:
     """Configuration for embedding models"""
     provider: LLMProvider
@@ -50,14 +83,380 @@ class EmbeddingConfig:
     custom_headers: Optional[Dict[str, str]] = None
     batch_size: int = 100
     extra_params: Optional[Dict[str, Any]] = None
+    # SQLite file for a persistent embedding cache (disabled when None)
+    cache_path: Optional[str] = None
+
+
+_httpx_clients: Dict[Tuple[Any, Any, Optional[str]], "httpx.Client"] = {}
+_httpx_client_lock = threading.Lock()
+
+
+def _ssl_context(verify: Union[bool, str], cert: Any) -> Union[bool, ssl.SSLContext]:
+    """TLS settings equivalent to requests' verify/cert arguments"""
+    if verify is True and cert is None:
+        return True
+    if isinstance(verify, str):
+        # A CA bundle file or a directory of certificates, as in requests
+        context = ssl.create_default_context(
+            **{"capath" if os.path.isdir(verify) else "cafile": verify}
+        )
+    else:
+        context = ssl.create_default_context(cafile=certifi.where())
+    if verify is False:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    if cert:
+        context.load_cert_chain(*((cert,) if isinstance(cert, str) else cert))
+    return context
+
+
+def _shared_httpx_client(
+    verify: Union[bool, str] = True,
+    cert: Any = None,
+    proxy: Optional[str] = None
+) -> "httpx.Client":
+    """Process-wide HTTP/2 client per TLS/proxy setting
+    
+    Calls with the same settings share one client, so one connection per
+    host is multiplexed.
+    """
+    key = (verify, cert, proxy)
+    with _httpx_client_lock:
+        client = _httpx_clients.get(key)
+        if client is None:
+            # Proxies come resolved from requests (including the
+            # environment), so httpx must not apply its own
+            client = _httpx_clients[key] = httpx.Client(
+                transport=httpx.HTTPTransport(
+                    verify=_ssl_context(verify, cert),
+                    proxy=proxy,
+                    trust_env=False,
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=32,
+                        max_connections=64
+                    ),
+                    retries=2
+                ),
+                trust_env=False
+            )
+        return client
+
+
+class _HTTPXBody:
+    """File-like view of a streamed httpx response for requests.Response.raw"""
+    
+    def __init__(self, response: "httpx.Response"):
+        self._response = response
+        self._chunks = response.iter_bytes()
+    
+    def read(self, amt: Optional[int] = None) -> bytes:
+        if amt is None:
+            return b"".join(self._chunks)
+        for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b""
+    
+    def close(self) -> None:
+        self._response.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """requests transport adapter that sends through a shared HTTP/2 client
+    
+    Keeps the requests API (and its exceptions) at every call site while
+    concurrent calls to the same host share one multiplexed connection.
+    The session's verify/cert/proxy settings select the client, and
+    max_retries retries statuses like the urllib3 adapter does.
+    """
+    
+    def __init__(self, max_retries: Optional[Retry] = None):
+        super().__init__()
+        self.max_retries = max_retries or Retry(0, read=False)
+    
+    def send(self, request, stream=False, timeout=None, verify=True,
+             cert=None, proxies=None):
+        client = _shared_httpx_client(
+            verify, cert, select_proxy(request.url, proxies or {})
+        )
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = httpx.Timeout(read, connect=connect)
+        
+        retries = self.max_retries
+        while True:
+            upstream = self._send_once(client, request, timeout)
+            if not retries.is_retry(
+                request.method, upstream.status_code,
+                "Retry-After" in upstream.headers
+            ):
+                break
+            try:
+                retries = retries.increment(request.method, request.url)
+            except MaxRetryError:
+                break
+            upstream.close()
+            retry_after = (
+                retries.get_retry_after(upstream)
+                if retries.respect_retry_after_header else None
+            )
+            time.sleep(max(retries.get_backoff_time(), retry_after or 0))
+        
+        response = requests.Response()
+        response.status_code = upstream.status_code
+        response.reason = upstream.reason_phrase
+        # Bodies arrive already decoded by httpx
+        response.headers = CaseInsensitiveDict(upstream.headers)
+        response.headers.pop("Content-Encoding", None)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _HTTPXBody(upstream)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        
+        if not stream:
+            try:
+                response.content
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.Timeout(e, request=request)
+            finally:
+                upstream.close()
+        return response
+    
+    @staticmethod
+    def _send_once(client, request, timeout) -> "httpx.Response":
+        try:
+            return client.send(
+                client.build_request(
+                    request.method,
+                    request.url,
+                    headers=dict(request.headers),
+                    content=request.body,
+                    timeout=timeout
+                ),
+                stream=True
+            )
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+    
+    def close(self) -> None:
+        # The shared clients outlive individual sessions
+        pass
+
+
+def create_http_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """Create a pooled keep-alive HTTP session for provider API calls"""
+    session = requests.Session()
+    # Ask for every compression urllib3 can decode here: gzip/deflate,
+    # plus zstd and br when zstandard/brotli are installed
+    session.headers["Accept-Encoding"] = ", ".join(ACCEPT_ENCODING.split(","))
+    if headers:
+        session.headers.update(headers)
+    # Only idempotent requests are retried; status codes are still
+    # returned to the caller instead of raising
+    retries = Retry(
+        total=2,
+        backoff_factor=0.2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retries)
+    session.mount("http://", adapter)
+    # HTTPS APIs negotiate HTTP/2 via ALPN when httpx[http2] is installed
+    session.mount(
+        "https://", HTTP2Adapter(retries) if httpx is not None else adapter
+    )
+    return session
+
+
+def post_json(
+    session: requests.Session,
+    url: str,
+    payload: Any,
+    timeout: float,
+    **kwargs
+) -> requests.Response:
+    """POST a JSON payload, serialized with orjson when it is installed"""
+    if orjson is None:
+        return session.post(url, json=payload, timeout=timeout, **kwargs)
+    return session.post(
+        url,
+        data=orjson.dumps(payload),
+        headers={"Content-Type": "application/json"},
+        timeout=timeout,
+        **kwargs
+    )
+
+
+def parse_json(response: requests.Response) -> Any:
+    """Decode a JSON response body, with orjson when it is installed"""
+    if orjson is None:
+        return response.json()
+    return orjson.loads(response.content)
+
+
+def read_json(response: requests.Response, chunk_size: int = 65536) -> Any:
+    """Decode a stream=True JSON response straight from a preallocated buffer
+    
+    Avoids the chunk list and joined copy behind ``response.content``; the
+    buffer is sized from Content-Length and grows if the body is larger
+    (e.g. after decompression).
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    with response:
+        buffer = bytearray(int(response.headers.get("Content-Length") or 0))
+        offset = 0
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            end = offset + len(chunk)
+            buffer[offset:end] = chunk
+            offset = end
+        del buffer[offset:]
+    return loads(buffer)
+
+
+def iter_json_lines(response: requests.Response) -> Iterator[Any]:
+    """Decode a streamed NDJSON response one object at a time"""
+    loads = orjson.loads if orjson is not None else json.loads
+    for line in response.iter_lines(chunk_size=8192):
+        if line:
+            yield loads(line)
+
+
+class provider_errors(ContextDecorator):
+    """Translate transport and unexpected errors into LLMProviderError types
+    
+    Usable as a decorator or, inside generators, as a ``with`` block;
+    LLMProviderError subclasses pass through unchanged.
+    """
+    
+    def __init__(self, service: str, operation: str):
+        self.service = service
+        self.operation = operation
+    
+    def __enter__(self) -> "provider_errors":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None or not issubclass(exc_type, Exception):
+            return False
+        if issubclass(exc_type, LLMProviderError):
+            return False
+        if issubclass(exc_type, requests.exceptions.Timeout):
+            raise LLMProviderTimeoutError(f"{self.service} request timeout") from exc
+        if issubclass(exc_type, requests.exceptions.RequestException):
+            raise LLMProviderAPIError(f"{self.service} request error: {exc}") from exc
+        raise LLMProviderError(f"{self.service} {self.operation} error: {exc}") from exc
+
+
+# Process-wide circuit breaker: base URL -> monotonic time it stays open until
+_open_circuits: Dict[str, float] = {}
+CIRCUIT_BREAKER_COOLDOWN = 30.0
+
+
+def circuit_open(base_url: str) -> bool:
+    """True while a recently unreachable endpoint should not be retried"""
+    return time.monotonic() < _open_circuits.get(base_url, float("-inf"))
+
+
+def record_health(base_url: str, healthy: bool) -> None:
+    """Close the circuit on success, open it for the cooldown on failure"""
+    if healthy:
+        _open_circuits.pop(base_url, None)
+    else:
+        _open_circuits[base_url] = time.monotonic() + CIRCUIT_BREAKER_COOLDOWN
+
+
+def quantize_embedding(vector: np.ndarray) -> Tuple[np.ndarray, np.float32]:
+    """Quantize a float vector to int8 with a single per-vector scale"""
+    peak = float(np.max(np.abs(vector))) if vector.size else 0.0
+    scale = np.float32(peak / 127.0 or 1.0)
+    return np.round(vector / scale).astype(np.int8), scale
+
+
+def dequantize_embedding(quantized: np.ndarray, scale: np.float32) -> np.ndarray:
+    """Restore a float32 vector from quantize_embedding output"""
+    return quantized.astype(np.float32) * scale
+
+
+class EmbeddingDiskCache:
+    """Persistent SQLite store of int8-quantized embeddings
+    
+    Values are the float32 scale followed by the int8 vector, as produced by
+    quantize_embedding, so the on-disk and in-memory caches share one format.
+    """
+    
+    # Keys per SELECT, below SQLite's bound-parameter limit
+    LOOKUP_CHUNK = 500
+    
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS emb (k BLOB PRIMARY KEY, v BLOB NOT NULL)"
+        )
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, Tuple[np.ndarray, np.float32]]:
+        """Return the stored (int8 vector, scale) entries for keys"""
+        rows = []
+        with self._lock:
+            for i in range(0, len(keys), self.LOOKUP_CHUNK):
+                chunk = keys[i:i + self.LOOKUP_CHUNK]
+                rows += self._db.execute(
+                    f"SELECT k, v FROM emb WHERE k IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+        return {
+            key: (
+                np.frombuffer(value, dtype=np.int8, offset=4),
+                np.frombuffer(value, dtype=np.float32, count=1)[0]
+            )
+            for key, value in rows
+        }
+    
+    def put_many(self, entries: Dict[bytes, Tuple[np.ndarray, np.float32]]) -> None:
+        """Store (int8 vector, scale) entries, replacing existing keys"""
+        rows = [
+            (key, np.float32(scale).tobytes() + quantized.tobytes())
+            for key, (quantized, scale) in entries.items()
+        ]
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO emb VALUES (?, ?)", rows)
+                self._db.execute("COMMIT")
+            except BaseException:
+                # Never leave the transaction open for the next put_many
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                raise
+    
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._db.close()
 
 
 class BaseLLMProvider(ABC):
     """Abstract base class for LLM providers"""
     
+    # Default number of in-flight requests for batch generation
+    MAX_CONCURRENCY = 8
+    
     def __init__(self, config: LLMConfig):
         self.config = config
         self.client = None
+        # Config is frozen, so the model info never changes
+        self._model_info = MappingProxyType({
+            "provider": config.provider.value,
+            "model": config.model_name,
+            "temperature": config.temperature,
+            "max_tokens": config.max_tokens
+        })
         
     @abstractmethod
     def initialize(self) -> None:
@@ -88,22 +487,90 @@ class BaseLLMProvider(ABC):
         """Check if provider is available and configured"""
         pass
     
-    def get_model_info(self) -> Dict[str, Any]:
-        """Get information about the model"""
-        return {
-            "provider": self.config.provider.value,
-            "model": self.config.model_name,
-            "temperature": self.config.temperature,
-            "max_tokens": self.config.max_tokens
-        }
+    async def agenerate_text(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """Async variant of generate_text, run in a worker thread"""
+        return await asyncio.to_thread(
+            self.generate_text, prompt, system_prompt, **kwargs
+        )
+    
+    async def achat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> str:
+        """Async variant of chat_completion, run in a worker thread"""
+        return await asyncio.to_thread(self.chat_completion, messages, **kwargs)
+    
+    async def abatch_generate(
+        self,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        **kwargs
+    ) -> List[str]:
+        """Generate completions for many prompts with bounded concurrency"""
+        semaphore = asyncio.Semaphore(max_concurrency or self.MAX_CONCURRENCY)
+        
+        async def generate(prompt: str) -> str:
+            async with semaphore:
+                return await self.agenerate_text(prompt, system_prompt, **kwargs)
+        
+        return list(await asyncio.gather(*(generate(p) for p in prompts)))
+    
+    def batch_generate(
+        self,
+        prompts: List[str],
+        system_prompt: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        **kwargs
+    ) -> List[str]:
+        """Generate completions for many prompts concurrently (sync callers)"""
+        if not prompts:
+            return []
+        
+        workers = min(max_concurrency or self.MAX_CONCURRENCY, len(prompts))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda prompt: self.generate_text(prompt, system_prompt, **kwargs),
+                prompts
+            ))
+    
+    def get_model_info(self) -> Mapping[str, Any]:
+        """Get information about the model (read-only)"""
+        return self._model_info
 
 
 class BaseEmbeddingProvider(ABC):
     """Abstract base class for embedding providers"""
     
+    # Concurrent batch requests and retry policy for embed_documents
+    MAX_WORKERS = 8
+    # Per-request caps on top of config.batch_size (None means uncapped)
+    MAX_BATCH_INPUTS: Optional[int] = None
+    MAX_BATCH_BYTES: Optional[int] = None
+    # Group texts of similar length so concurrent batches cost about the same
+    SORT_BY_LENGTH = False
+    MAX_RETRIES = 3
+    RETRY_BACKOFF = 0.5
+    # Statuses worth retrying; timeouts and dropped connections are retried too
+    RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+    # Embeddings kept in the in-memory LRU cache, stored as int8 + scale
+    EMBEDDING_CACHE_SIZE = 10_000
+    
     def __init__(self, config: EmbeddingConfig):
         self.config = config
         self.client = None
+        self._embedding_cache: "OrderedDict[bytes, Tuple[np.ndarray, np.float32]]" = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
+        # Optional L2 cache that survives restarts
+        self._disk_cache = (
+            EmbeddingDiskCache(config.cache_path) if config.cache_path else None
+        )
         
     @abstractmethod
     def initialize(self) -> None:
@@ -111,15 +578,304 @@ class BaseEmbeddingProvider(ABC):
         pass
     
     @abstractmethod
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple documents"""
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for one batch in a single request"""
         pass
     
     @abstractmethod
-    def embed_query(self, text: str) -> List[float]:
-        """Generate embedding for a single query"""
+    def _embed_query(self, text: str) -> List[float]:
+        """Generate embedding for a single query in one request"""
         pass
     
+    def embed_documents(
+        self, texts: List[str], max_in_flight: Optional[int] = None
+    ) -> np.ndarray:
+        """Generate embeddings for multiple documents
+        
+        Repeated texts are embedded once and only texts missing from the
+        caches are sent to the provider; returns a float32 matrix with one
+        row per text, in input order. Cache hits are int8 reconstructions
+        of the original vectors. max_in_flight caps concurrent requests
+        (default MAX_WORKERS).
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        
+        keys, rows, found, missing = self._lookup_documents(texts)
+        if missing:
+            fresh = dict(zip(
+                missing, self._embed_uncached(list(missing.values()), max_in_flight)
+            ))
+            self._cache_store(fresh)
+            found.update(fresh)
+        return self._stack_documents(keys, rows, found)
+    
+    async def aembed_documents(
+        self, texts: List[str], max_in_flight: Optional[int] = None
+    ) -> np.ndarray:
+        """Async variant of embed_documents; batches are awaited concurrently"""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        
+        keys, rows, found, missing = self._lookup_documents(texts)
+        if missing:
+            fresh = dict(zip(
+                missing,
+                await self._aembed_uncached(list(missing.values()), max_in_flight)
+            ))
+            self._cache_store(fresh)
+            found.update(fresh)
+        return self._stack_documents(keys, rows, found)
+    
+    def _lookup_documents(self, texts: List[str]) -> Tuple[
+        List[bytes], Optional[List[int]], Dict[bytes, np.ndarray], Dict[bytes, str]
+    ]:
+        """Deduplicate texts and split their cache keys into hits and misses"""
+        # Deduplicate before hashing so repeats cost neither lookups nor tokens
+        positions: Dict[str, int] = {}
+        rows = [positions.setdefault(text, len(positions)) for text in texts]
+        unique_texts = list(positions)
+        
+        keys = [self._cache_key("document", text) for text in unique_texts]
+        found = self._cache_lookup(keys)
+        if self._disk_cache and len(found) < len(keys):
+            found.update(self._disk_lookup([key for key in keys if key not in found]))
+        missing = {
+            key: text for key, text in zip(keys, unique_texts) if key not in found
+        }
+        return keys, rows if len(unique_texts) < len(texts) else None, found, missing
+    
+    @staticmethod
+    def _stack_documents(
+        keys: List[bytes],
+        rows: Optional[List[int]],
+        found: Dict[bytes, np.ndarray]
+    ) -> np.ndarray:
+        """One row per unique key, expanded back to input order if deduplicated"""
+        embeddings = np.stack([found[key] for key in keys])
+        return embeddings if rows is None else embeddings[rows]
+    
+    def embed_query(self, text: str) -> np.ndarray:
+        """Generate a float32 embedding for a single query (LRU cached)"""
+        key = self._cache_key("query", text)
+        cached = self._cached_query(key)
+        if cached is not None:
+            return cached
+        
+        embedding = np.asarray(self._with_retry(self._embed_query, text), dtype=np.float32)
+        self._cache_store({key: embedding})
+        return embedding
+    
+    async def aembed_query(self, text: str) -> np.ndarray:
+        """Async variant of embed_query"""
+        key = self._cache_key("query", text)
+        cached = self._cached_query(key)
+        if cached is not None:
+            return cached
+        
+        embedding = np.asarray(
+            await self._awith_retry(self._aembed_query, text), dtype=np.float32
+        )
+        self._cache_store({key: embedding})
+        return embedding
+    
+    def _cached_query(self, key: bytes) -> Optional[np.ndarray]:
+        cached = self._cache_get(key)
+        if cached is None and self._disk_cache:
+            cached = self._disk_lookup([key]).get(key)
+        return cached
+    
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Async single-request batch; providers without an async client use a thread"""
+        return await asyncio.to_thread(self._embed_batch, texts)
+    
+    async def _aembed_query(self, text: str) -> List[float]:
+        """Async single query request; runs _embed_query in a thread by default"""
+        return await asyncio.to_thread(self._embed_query, text)
+    
+    def _split_batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into batches bounded by input count and UTF-8 size"""
+        batch_size = max(1, self.config.batch_size)
+        if self.MAX_BATCH_INPUTS:
+            batch_size = min(batch_size, self.MAX_BATCH_INPUTS)
+        if not self.MAX_BATCH_BYTES:
+            return [
+                texts[i:i + batch_size] for i in range(0, len(texts), batch_size)
+            ]
+        
+        batches = []
+        batch: List[str] = []
+        batch_bytes = 0
+        for text in texts:
+            size = len(text.encode("utf-8"))
+            if batch and (
+                len(batch) == batch_size
+                or batch_bytes + size > self.MAX_BATCH_BYTES
+            ):
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+            batch.append(text)
+            batch_bytes += size
+        batches.append(batch)
+        return batches
+    
+    def _embed_uncached(
+        self, texts: List[str], max_in_flight: Optional[int] = None
+    ) -> np.ndarray:
+        """Send size-bounded batches concurrently, keeping input order"""
+        order, texts = self._length_order(texts)
+        batches = self._split_batches(texts)
+        if len(batches) == 1:
+            embeddings = np.asarray(self._embed_with_retry(batches[0]), dtype=np.float32)
+        else:
+            workers = min(max_in_flight or self.MAX_WORKERS, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(self._embed_with_retry, batches)
+                embeddings = np.concatenate([
+                    np.asarray(batch, dtype=np.float32) for batch in results
+                ])
+        return self._restore_order(embeddings, order)
+    
+    async def _aembed_uncached(
+        self, texts: List[str], max_in_flight: Optional[int] = None
+    ) -> np.ndarray:
+        """Await size-bounded batches with at most max_in_flight in flight"""
+        order, texts = self._length_order(texts)
+        semaphore = asyncio.Semaphore(max_in_flight or self.MAX_WORKERS)
+        
+        async def embed(batch: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._aembed_with_retry(batch)
+        
+        results = await asyncio.gather(*map(embed, self._split_batches(texts)))
+        embeddings = np.concatenate([
+            np.asarray(batch, dtype=np.float32) for batch in results
+        ])
+        return self._restore_order(embeddings, order)
+    
+    def _length_order(self, texts: List[str]) -> Tuple[Optional[List[int]], List[str]]:
+        """Permutation grouping similar lengths when SORT_BY_LENGTH is set"""
+        if not self.SORT_BY_LENGTH or len(texts) < 2:
+            return None, texts
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        return order, [texts[i] for i in order]
+    
+    @staticmethod
+    def _restore_order(embeddings: np.ndarray, order: Optional[List[int]]) -> np.ndarray:
+        if order is None:
+            return embeddings
+        restored = np.empty_like(embeddings)
+        restored[order] = embeddings
+        return restored
+    
+    def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch, backing off on transient errors and halving oversize payloads"""
+        try:
+            return self._with_retry(self._embed_batch, texts)
+        except LLMProviderAPIError as e:
+            if e.status_code != 413 or len(texts) < 2:
+                raise
+            middle = len(texts) // 2
+            return (
+                self._embed_with_retry(texts[:middle])
+                + self._embed_with_retry(texts[middle:])
+            )
+    
+    async def _aembed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        """Async counterpart of _embed_with_retry"""
+        try:
+            return await self._awith_retry(self._aembed_batch, texts)
+        except LLMProviderAPIError as e:
+            if e.status_code != 413 or len(texts) < 2:
+                raise
+            middle = len(texts) // 2
+            return (
+                await self._aembed_with_retry(texts[:middle])
+                + await self._aembed_with_retry(texts[middle:])
+            )
+    
+    def _with_retry(self, call, *args):
+        """Run call(*args), retrying transient failures with jittered backoff"""
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                return call(*args)
+            except LLMProviderError as e:
+                if not self._is_transient(e) or attempt == self.MAX_RETRIES:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+    
+    async def _awith_retry(self, call, *args):
+        """Async counterpart of _with_retry"""
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                return await call(*args)
+            except LLMProviderError as e:
+                if not self._is_transient(e) or attempt == self.MAX_RETRIES:
+                    raise
+                await asyncio.sleep(self._retry_delay(attempt))
+    
+    def _is_transient(self, error: "LLMProviderError") -> bool:
+        if isinstance(error, (LLMProviderTimeoutError, LLMProviderConnectionError)):
+            return True
+        return (
+            isinstance(error, LLMProviderAPIError)
+            and error.status_code in self.RETRY_STATUSES
+        )
+    
+    def _retry_delay(self, attempt: int) -> float:
+        # Jitter keeps concurrent batches from retrying in lockstep
+        return self.RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5)
+    
+    def _cache_key(self, kind: str, text: str) -> bytes:
+        """Cache key for a text under this provider and model"""
+        return hashlib.sha256(
+            f"{kind}\0{self.config.provider.value}\0{self.config.model_name}\0{text}"
+            .encode("utf-8")
+        ).digest()
+    
+    def _cache_get(self, key: bytes) -> Optional[np.ndarray]:
+        """Return one cached embedding, marking it recently used"""
+        with self._embedding_cache_lock:
+            entry = self._embedding_cache.get(key)
+            if entry is None:
+                return None
+            self._embedding_cache.move_to_end(key)
+        return dequantize_embedding(*entry)
+    
+    def _cache_lookup(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Return cached embeddings for keys, marking them recently used"""
+        found = {}
+        with self._embedding_cache_lock:
+            for key in keys:
+                entry = self._embedding_cache.get(key)
+                if entry is not None:
+                    self._embedding_cache.move_to_end(key)
+                    found[key] = entry
+        return {key: dequantize_embedding(*entry) for key, entry in found.items()}
+    
+    def _cache_store(self, embeddings: Dict[bytes, np.ndarray]) -> None:
+        """Add embeddings to the caches, evicting the least recently used"""
+        quantized = {
+            key: quantize_embedding(embedding)
+            for key, embedding in embeddings.items()
+        }
+        self._cache_insert(quantized)
+        if self._disk_cache:
+            self._disk_cache.put_many(quantized)
+    
+    def _disk_lookup(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Read keys from the on-disk cache, promoting hits into memory"""
+        entries = self._disk_cache.get_many(list(dict.fromkeys(keys)))
+        self._cache_insert(entries)
+        return {key: dequantize_embedding(*entry) for key, entry in entries.items()}
+    
+    def _cache_insert(self, quantized: Dict[bytes, Tuple[np.ndarray, np.float32]]) -> None:
+        """Insert quantized entries into the in-memory LRU"""
+        with self._embedding_cache_lock:
+            self._embedding_cache.update(quantized)
+            while len(self._embedding_cache) > self.EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+    
     @abstractmethod
     def is_available(self) -> bool:
         """Check if embedding provider is available"""
@@ -148,4 +904,12 @@ class LLMProviderTimeoutError(LLMProviderError):
 
 class LLMProviderAPIError(LLMProviderError):
     """Raised when a provider API returns an error"""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMProviderConnectionError(LLMProviderAPIError):
+    """Raised when a provider cannot be reached or drops the connection"""
     pass
@@ -0,0 +1,206 @@
+"""
+Response caches used by LLMProviderManager
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from . import quantize_embedding
+
+
+class ResponseCache:
+    """Thread-safe exact-match LRU cache with optional TTL and hit statistics"""
+
+    def __init__(self, capacity: int = 256, ttl: Optional[float] = None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss or expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries"""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries and reset statistics"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "capacity": self.capacity
+            }
+
+
+class SemanticCache:
+    """Embedding-similarity cache for paraphrased prompts
+    
+    Embeddings are normalized, quantized to int8 with a per-row scale (a
+    quarter of float32 memory) and kept in one preallocated matrix, so a
+    lookup is a single int32-accumulated matrix-vector product, rescaled to
+    cosine similarity. Entries only match within the same namespace
+    (provider, model, prompt kind, ...).
+    """
+
+    GROWTH = 64
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        capacity: int = 1000,
+        ttl: Optional[float] = None
+    ):
+        self.threshold = threshold
+        self.capacity = capacity
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._clock = itertools.count()
+        self._namespaces: Dict[Hashable, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._scales = np.empty(0, dtype=np.float32)
+        self._namespace_ids = np.empty(0, dtype=np.int32)
+        self._stored_at = np.empty(0)
+        self._last_used = np.empty(0, dtype=np.int64)
+        self._responses: List[Any] = []
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: Any) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def get(self, namespace: Hashable, embedding: Any) -> Optional[Any]:
+        """Return the response of the most similar prompt above the threshold"""
+        query = self._normalize(embedding)
+        with self._lock:
+            namespace_id = self._namespaces.get(namespace)
+            if (
+                query is None or namespace_id is None
+                or query.shape[0] != self._vectors.shape[1]
+            ):
+                self.misses += 1
+                return None
+            
+            size = self._size
+            quantized, scale = quantize_embedding(query)
+            similarities = (
+                np.matmul(self._vectors[:size], quantized, dtype=np.int32)
+                * (self._scales[:size] * scale)
+            )
+            valid = self._namespace_ids[:size] == namespace_id
+            if self.ttl is not None:
+                valid &= time.monotonic() - self._stored_at[:size] < self.ttl
+            similarities[~valid] = -np.inf
+            
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            self._last_used[best] = next(self._clock)
+            self.hits += 1
+            return self._responses[best]
+
+    def put(self, namespace: Hashable, embedding: Any, response: Any) -> None:
+        """Store a response, replacing the least recently used entry when full"""
+        vector = self._normalize(embedding)
+        if vector is None or self.capacity <= 0:
+            return
+        with self._lock:
+            if self._vectors is None or vector.shape[0] != self._vectors.shape[1]:
+                # First entry, or the embedding model changed dimension
+                self._reset(vector.shape[0])
+            
+            if self._size < self.capacity:
+                row = self._size
+                if row == len(self._vectors):
+                    self._grow()
+                self._size += 1
+                self._responses.append(response)
+            else:
+                row = int(np.argmin(self._last_used))
+                self._responses[row] = response
+            
+            self._vectors[row], self._scales[row] = quantize_embedding(vector)
+            self._namespace_ids[row] = self._namespaces.setdefault(
+                namespace, len(self._namespaces)
+            )
+            self._stored_at[row] = time.monotonic()
+            self._last_used[row] = next(self._clock)
+
+    def _reset(self, dimension: int) -> None:
+        rows = min(self.GROWTH, self.capacity)
+        self._vectors = np.empty((rows, dimension), dtype=np.int8)
+        self._scales = np.empty(rows, dtype=np.float32)
+        self._namespace_ids = np.empty(rows, dtype=np.int32)
+        self._stored_at = np.empty(rows)
+        self._last_used = np.empty(rows, dtype=np.int64)
+        self._namespaces.clear()
+        self._responses = []
+        self._size = 0
+
+    def _grow(self) -> None:
+        rows = min(2 * len(self._vectors), self.capacity)
+        for name in ("_vectors", "_scales", "_namespace_ids", "_stored_at", "_last_used"):
+            current = getattr(self, name)
+            grown = np.empty((rows,) + current.shape[1:], dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+    def clear(self) -> None:
+        """Drop all entries and reset statistics"""
+        with self._lock:
+            self._vectors = None
+            self._namespaces.clear()
+            self._responses = []
+            self._size = 0
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": self._size,
+                "capacity": self.capacity,
+                "threshold": self.threshold
+            }
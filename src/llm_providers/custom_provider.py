@@ -1,9 +1,10 @@
 """
 Custom LLM Provider for enterprise/custom API endpoints
 """
+import logging
 import requests
-import json
-from typing import List, Dict, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Union
 from langchain.llms.base import LLM
 from langchain_core.embeddings import Embeddings
 
@@ -14,10 +15,78 @@ from . import (
     EmbeddingConfig,
     LLMProviderError,
     LLMProviderAPIError,
-    LLMProviderTimeoutError,
-    LLMProviderNotAvailableError
+    LLMProviderNotAvailableError,
+    circuit_open,
+    create_http_session,
+    parse_json,
+    post_json,
+    provider_errors,
+    read_json,
+    record_health
 )
 
+logger = logging.getLogger(__name__)
+
+
+def _extract_openai(result: Dict[str, Any]) -> str:
+    """OpenAI-like format"""
+    return result["choices"][0]["message"]["content"]
+
+
+def _extract_ollama(result: Dict[str, Any]) -> str:
+    """Ollama-like format"""
+    return result["response"]
+
+
+def _extract_text(result: Dict[str, Any]) -> str:
+    """Simple text format"""
+    return result["text"]
+
+
+_EXTRACTORS = (
+    ("choices", _extract_openai),
+    ("response", _extract_ollama),
+    ("text", _extract_text),
+)
+_GENERIC_KEYS = ("output", "completion", "generated_text", "content")
+
+# Prompt labels for the usual chat roles, so they skip str.title()
+_ROLE_TITLES = {
+    "user": "User",
+    "assistant": "Assistant",
+    "system": "System",
+    "tool": "Tool",
+}
+
+
+def _role_title(role: str) -> str:
+    """Prompt label for a chat role"""
+    title = _ROLE_TITLES.get(role)
+    return title if title is not None else role.title()
+
+
+def _select_extractor(result: Any) -> Optional[Callable[[Dict[str, Any]], str]]:
+    """Pick the extractor matching a response body, if it is a known format"""
+    if isinstance(result, dict):
+        for key, extractor in _EXTRACTORS:
+            if key in result:
+                return extractor
+    return None
+
+
+def _extract_generic(result: Dict[str, Any]) -> str:
+    """Handle any supported response format (used until the format is known)"""
+    extractor = _select_extractor(result)
+    if extractor:
+        return extractor(result)
+    
+    # Try to extract any string response
+    for key in _GENERIC_KEYS:
+        if key in result:
+            return str(result[key])
+    
+    raise LLMProviderError(f"Unknown response format: {result}")
+
 
 class CustomLLM(LLM):
     """LangChain-compatible wrapper for custom LLM APIs"""
@@ -42,15 +111,17 @@ class CustomEmbeddings(Embeddings):
         self.provider = provider
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        return self.provider.embed_documents(texts)
+        return self.provider.embed_documents(texts).tolist()
     
     def embed_query(self, text: str) -> List[float]:
-        return self.provider.embed_query(text)
+        return self.provider.embed_query(text).tolist()
 
 
 class CustomProvider(BaseLLMProvider):
     """Custom/Enterprise LLM provider for proprietary APIs"""
     
+    HEALTH_CHECK_TIMEOUT = 2
+    
     def __init__(self, config: LLMConfig):
         super().__init__(config)
         self.headers = {
@@ -58,8 +129,35 @@ class CustomProvider(BaseLLMProvider):
         }
         if config.custom_headers:
             self.headers.update(config.custom_headers)
+        self.session = create_http_session(self.headers)
         self.langchain_llm = None
         
+        # Config is frozen, so the request format, URL and payload
+        # skeleton are resolved once instead of on every call
+        extra_params = config.extra_params or {}
+        self._is_openai_format = extra_params.get("format") == "openai"
+        if self._is_openai_format:
+            endpoint = "/v1/chat/completions"
+        else:
+            endpoint = extra_params.get("endpoint", "/generate")
+        self._url = f"{config.api_base}{endpoint}"
+        self._chat_url = f"{config.api_base}/v1/chat/completions"
+        # Narrowed by the endpoint probe when the format is not configured
+        self._extract = _extract_openai if self._is_openai_format else _extract_generic
+        
+        self._base_payload = {
+            "model": config.model_name,
+            "temperature": config.temperature
+        }
+        if config.max_tokens:
+            self._base_payload["max_tokens"] = config.max_tokens
+        self._chat_payload = dict(self._base_payload)
+        
+        # Add any extra parameters
+        for key, value in extra_params.items():
+            if key not in ["format", "endpoint"]:
+                self._base_payload[key] = value
+        
     def initialize(self) -> None:
         """Initialize custom provider"""
         if not self.config.api_base:
@@ -67,26 +165,38 @@ class CustomProvider(BaseLLMProvider):
                 "API base URL is required for custom provider"
             )
             
+        if circuit_open(self.config.api_base):
+            raise LLMProviderNotAvailableError(
+                f"Custom API at {self.config.api_base} was unreachable recently; "
+                "not retrying until the cooldown expires"
+            )
+            
         try:
-            # Test connection to the API
+            # Test connection to the API, without a body where HEAD is supported
             health_endpoint = f"{self.config.api_base}/health"
-            test_response = requests.get(
+            test_response = self.session.head(
                 health_endpoint,
-                headers=self.headers,
-                timeout=5
+                timeout=self.HEALTH_CHECK_TIMEOUT
             )
+            if test_response.status_code in [405, 501]:
+                test_response = self.session.get(
+                    health_endpoint,
+                    timeout=self.HEALTH_CHECK_TIMEOUT
+                )
+            record_health(self.config.api_base, True)
             
             # If health endpoint doesn't exist, try a minimal request
             if test_response.status_code == 404:
                 self._test_minimal_request()
             elif test_response.status_code not in [200, 201]:
-                print(f"Warning: Health check returned {test_response.status_code}")
+                logger.warning("Health check returned %s", test_response.status_code)
             
             # Create LangChain wrapper
             self.langchain_llm = CustomLLM(self)
             self.client = True
             
-        except requests.exceptions.ConnectionError:
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            record_health(self.config.api_base, False)
             raise LLMProviderNotAvailableError(
                 f"Cannot connect to custom API at {self.config.api_base}"
             )
@@ -102,25 +212,49 @@ class CustomProvider(BaseLLMProvider):
             "temperature": 0
         }
         
-        # Try different common endpoints
+        # Try different common endpoints concurrently
         endpoints = ["/generate", "/completions", "/v1/completions", "/api/generate"]
         
-        for endpoint in endpoints:
-            try:
-                response = requests.post(
-                    f"{self.config.api_base}{endpoint}",
-                    json=test_payload,
-                    headers=self.headers,
+        executor = ThreadPoolExecutor(max_workers=len(endpoints))
+        try:
+            futures = {
+                executor.submit(
+                    post_json,
+                    self.session,
+                    url,
+                    test_payload,
                     timeout=5
-                )
+                ): url
+                for url in (f"{self.config.api_base}{endpoint}" for endpoint in endpoints)
+            }
+            for future in as_completed(futures):
+                try:
+                    response = future.result()
+                except requests.exceptions.RequestException:
+                    continue
                 if response.status_code in [200, 201]:
+                    if futures[future] == self._url:
+                        self._learn_response_format(response)
                     return
-            except requests.exceptions.RequestException:
-                continue
+        finally:
+            # Return on the first success without waiting for slower probes
+            executor.shutdown(wait=False, cancel_futures=True)
         
         # If no endpoint worked, we'll still proceed but with a warning
-        print("Warning: Could not verify custom API endpoint. Proceeding anyway.")
+        logger.warning("Could not verify custom API endpoint. Proceeding anyway.")
     
+    def _learn_response_format(self, response: requests.Response) -> None:
+        """Specialize the response extractor from a probe of our endpoint"""
+        if self._is_openai_format:
+            return
+        try:
+            extractor = _select_extractor(parse_json(response))
+        except ValueError:
+            return
+        if extractor:
+            self._extract = extractor
+    
+    @provider_errors("Custom API", "generation")
     def generate_text(
         self, 
         prompt: str,
@@ -131,75 +265,36 @@ class CustomProvider(BaseLLMProvider):
         if not self.client:
             raise LLMProviderNotAvailableError("Custom provider not initialized")
             
-        # Build payload based on configuration
-        payload = {
-            "model": self.config.model_name,
-            "temperature": self.config.temperature
-        }
-        
         # Handle different API formats
-        if self.config.extra_params and self.config.extra_params.get("format") == "openai":
+        if self._is_openai_format:
             # OpenAI-compatible format
             messages = []
             if system_prompt:
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": prompt})
-            payload["messages"] = messages
-            endpoint = "/v1/chat/completions"
+            payload = {**self._base_payload, "messages": messages}
         else:
             # Simple prompt format (like Ollama)
             full_prompt = prompt
             if system_prompt:
                 full_prompt = f"System: {system_prompt}\n\nUser: {prompt}"
-            payload["prompt"] = full_prompt
-            endpoint = self.config.extra_params.get("endpoint", "/generate")
+            payload = {**self._base_payload, "prompt": full_prompt}
         
-        if self.config.max_tokens:
-            payload["max_tokens"] = self.config.max_tokens
-            
-        # Add any extra parameters
-        if self.config.extra_params:
-            for key, value in self.config.extra_params.items():
-                if key not in ["format", "endpoint"]:
-                    payload[key] = value
+        response = post_json(
+            self.session,
+            self._url,
+            payload,
+            timeout=self.config.timeout
+        )
         
-        try:
-            response = requests.post(
-                f"{self.config.api_base}{endpoint}",
-                json=payload,
-                headers=self.headers,
-                timeout=self.config.timeout
+        if response.status_code not in [200, 201]:
+            raise LLMProviderAPIError(
+                f"Custom API error ({response.status_code}): {response.text}"
             )
-            
-            if response.status_code not in [200, 201]:
-                raise LLMProviderAPIError(
-                    f"Custom API error ({response.status_code}): {response.text}"
-                )
-            
-            result = response.json()
-            
-            # Handle different response formats
-            if "choices" in result:  # OpenAI-like format
-                return result["choices"][0]["message"]["content"]
-            elif "response" in result:  # Ollama-like format
-                return result["response"]
-            elif "text" in result:  # Simple text format
-                return result["text"]
-            else:
-                # Try to extract any string response
-                for key in ["output", "completion", "generated_text", "content"]:
-                    if key in result:
-                        return str(result[key])
-                
-                raise LLMProviderError(f"Unknown response format: {result}")
-            
-        except requests.exceptions.Timeout:
-            raise LLMProviderTimeoutError("Custom API request timeout")
-        except requests.exceptions.RequestException as e:
-            raise LLMProviderAPIError(f"Custom API request error: {e}")
-        except Exception as e:
-            raise LLMProviderError(f"Custom API generation error: {e}")
+        
+        return self._extract(parse_json(response))
     
+    @provider_errors("Custom API", "chat completion")
     def chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -207,51 +302,31 @@ class CustomProvider(BaseLLMProvider):
     ) -> str:
         """Generate chat completion using custom API"""
         # For custom APIs, we'll convert to a single prompt if needed
-        if self.config.extra_params and self.config.extra_params.get("format") == "openai":
+        if self._is_openai_format:
             # Use OpenAI-compatible chat endpoint
-            payload = {
-                "model": self.config.model_name,
-                "messages": messages,
-                "temperature": self.config.temperature
-            }
-            
-            if self.config.max_tokens:
-                payload["max_tokens"] = self.config.max_tokens
-            
-            endpoint = "/v1/chat/completions"
+            payload = {**self._chat_payload, "messages": messages}
         else:
             # Convert messages to single prompt
-            prompt_parts = []
-            for msg in messages:
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-                prompt_parts.append(f"{role.title()}: {content}")
-            
-            full_prompt = "\n\n".join(prompt_parts)
+            full_prompt = "\n\n".join([
+                f"{_role_title(msg.get('role', 'user'))}: {msg.get('content', '')}"
+                for msg in messages
+            ])
             return self.generate_text(full_prompt, **kwargs)
         
-        try:
-            response = requests.post(
-                f"{self.config.api_base}{endpoint}",
-                json=payload,
-                headers=self.headers,
-                timeout=self.config.timeout
+        response = post_json(
+            self.session,
+            self._chat_url,
+            payload,
+            timeout=self.config.timeout
+        )
+        
+        if response.status_code not in [200, 201]:
+            raise LLMProviderAPIError(
+                f"Custom API error ({response.status_code}): {response.text}"
             )
-            
-            if response.status_code not in [200, 201]:
-                raise LLMProviderAPIError(
-                    f"Custom API error ({response.status_code}): {response.text}"
-                )
-            
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-            
-        except requests.exceptions.Timeout:
-            raise LLMProviderTimeoutError("Custom API request timeout")
-        except requests.exceptions.RequestException as e:
-            raise LLMProviderAPIError(f"Custom API request error: {e}")
-        except Exception as e:
-            raise LLMProviderError(f"Custom API chat completion error: {e}")
+        
+        result = parse_json(response)
+        return result["choices"][0]["message"]["content"]
     
     def is_available(self) -> bool:
         """Check if custom provider is available"""
@@ -262,11 +337,19 @@ class CustomProvider(BaseLLMProvider):
         if not self.langchain_llm:
             raise LLMProviderNotAvailableError("Custom provider not initialized")
         return self.langchain_llm
+    
+    def close(self) -> None:
+        """Close pooled HTTP connections"""
+        self.session.close()
 
 
 class CustomEmbeddingProvider(BaseEmbeddingProvider):
     """Custom embedding provider for enterprise APIs"""
     
+    # Common enterprise limits (~96 inputs / ~300 KB per call)
+    MAX_BATCH_INPUTS = 64
+    MAX_BATCH_BYTES = 256 * 1024
+    
     def __init__(self, config: EmbeddingConfig):
         super().__init__(config)
         self.headers = {
@@ -274,8 +357,17 @@ class CustomEmbeddingProvider(BaseEmbeddingProvider):
         }
         if config.custom_headers:
             self.headers.update(config.custom_headers)
+        self.session = create_http_session(self.headers)
         self.langchain_embeddings = None
         
+        # Resolved once from the frozen config; defaults to an OpenAI-like endpoint
+        extra_params = config.extra_params or {}
+        self._url = f"{config.api_base}{extra_params.get('endpoint', '/v1/embeddings')}"
+        self._base_payload = {"model": config.model_name}
+        self._base_payload.update(
+            (key, value) for key, value in extra_params.items() if key != "endpoint"
+        )
+        
     def initialize(self) -> None:
         """Initialize custom embedding provider"""
         if not self.config.api_base:
@@ -287,58 +379,50 @@ class CustomEmbeddingProvider(BaseEmbeddingProvider):
         self.langchain_embeddings = CustomEmbeddings(self)
         self.client = True
     
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for documents"""
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of documents"""
+        return self._request_embeddings(texts)
+    
+    def _embed_query(self, text: str) -> List[float]:
+        """Generate embedding for query, sending the bare string as input"""
+        embeddings = self._request_embeddings(text)
+        # Some APIs answer a single-string input with a flat vector
+        if embeddings and isinstance(embeddings[0], (int, float)):
+            return embeddings
+        return embeddings[0]
+    
+    @provider_errors("Custom embedding API", "response")
+    def _request_embeddings(self, texts: Union[str, List[str]]) -> List[Any]:
+        """POST texts to the embedding endpoint and return the embeddings"""
         if not self.client:
             raise LLMProviderNotAvailableError("Custom embedding provider not initialized")
         
-        try:
-            payload = {
-                "model": self.config.model_name,
-                "input": texts
-            }
-            
-            # Add extra parameters if specified
-            if self.config.extra_params:
-                payload.update(self.config.extra_params)
-            
-            endpoint = "/v1/embeddings"  # Default to OpenAI-like endpoint
-            if self.config.extra_params and "endpoint" in self.config.extra_params:
-                endpoint = self.config.extra_params["endpoint"]
-            
-            response = requests.post(
-                f"{self.config.api_base}{endpoint}",
-                json=payload,
-                headers=self.headers,
-                timeout=30
+        payload = {**self._base_payload, "input": texts}
+        
+        # Streamed so large embedding bodies are decoded from one buffer
+        response = post_json(
+            self.session,
+            self._url,
+            payload,
+            timeout=30,
+            stream=True
+        )
+        
+        if response.status_code not in [200, 201]:
+            raise LLMProviderAPIError(
+                f"Custom embedding API error ({response.status_code}): {response.text}",
+                status_code=response.status_code
             )
-            
-            if response.status_code not in [200, 201]:
-                raise LLMProviderAPIError(
-                    f"Custom embedding API error ({response.status_code}): {response.text}"
-                )
-            
-            result = response.json()
-            
-            # Handle different response formats
-            if "data" in result:  # OpenAI-like format
-                return [item["embedding"] for item in result["data"]]
-            elif "embeddings" in result:  # Direct embeddings array
-                return result["embeddings"]
-            else:
-                raise LLMProviderError(f"Unknown embedding response format: {result}")
-            
-        except requests.exceptions.Timeout:
-            raise LLMProviderTimeoutError("Custom embedding API request timeout")
-        except requests.exceptions.RequestException as e:
-            raise LLMProviderAPIError(f"Custom embedding API request error: {e}")
-        except Exception as e:
-            raise LLMProviderError(f"Custom embedding error: {e}")
-    
-    def embed_query(self, text: str) -> List[float]:
-        """Generate embedding for query"""
-        embeddings = self.embed_documents([text])
-        return embeddings[0]
+        
+        result = read_json(response)
+        
+        # Handle different response formats
+        if "data" in result:  # OpenAI-like format
+            return [item["embedding"] for item in result["data"]]
+        elif "embeddings" in result:  # Direct embeddings array
+            return result["embeddings"]
+        else:
+            raise LLMProviderError(f"Unknown embedding response format: {result}")
     
     def is_available(self) -> bool:
         """Check if custom embedding provider is available"""
@@ -349,3 +433,7 @@ class CustomEmbeddingProvider(BaseEmbeddingProvider):
         if not self.langchain_embeddings:
             raise LLMProviderNotAvailableError("Custom embedding provider not initialized")
         return self.langchain_embeddings
+    
+    def close(self) -> None:
+        """Close pooled HTTP connections"""
+        self.session.close()
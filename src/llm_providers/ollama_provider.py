@@ -1,9 +1,9 @@
 """
 Ollama LLM Provider implementation for local models
 """
-import requests
-import json
-from typing import List, Dict, Optional, Any
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from langchain_community.llms import Ollama
 from langchain_community.embeddings import OllamaEmbeddings
 
@@ -14,12 +14,86 @@ from . import (
     EmbeddingConfig,
     LLMProviderError,
     LLMProviderAPIError,
-    LLMProviderTimeoutError,
-    LLMProviderNotAvailableError
+    LLMProviderNotAvailableError,
+    circuit_open,
+    create_http_session,
+    iter_json_lines,
+    parse_json,
+    post_json,
+    provider_errors,
+    record_health
 )
 
 
-class OllamaProvider(BaseLLMProvider):
+class _OllamaTagsMixin:
+    """Share the /api/tags model list per server for a short TTL"""
+    
+    TAGS_TTL = 30.0
+    TAGS_TIMEOUT = 2
+    # base_url -> (checked at, model names or None when unreachable),
+    # shared so repeated provider instantiations skip the request
+    _tags_by_url: Dict[str, Tuple[float, Optional[List[str]]]] = {}
+    
+    def _store_model_names(self, model_names: Optional[List[str]]) -> None:
+        """Remember the latest model list (None when unreachable)"""
+        self._tags_by_url[self.base_url] = (time.monotonic(), model_names)
+    
+    def _model_names(self) -> Optional[List[str]]:
+        """Return installed model names, or None if Ollama is unreachable"""
+        cached = self._tags_by_url.get(self.base_url)
+        if cached and time.monotonic() - cached[0] < self.TAGS_TTL:
+            return cached[1]
+        
+        try:
+            response = self.session.get(
+                f"{self.base_url}/api/tags", timeout=self.TAGS_TIMEOUT
+            )
+            model_names = None
+            if response.status_code == 200:
+                models = parse_json(response).get("models", [])
+                model_names = [model["name"] for model in models]
+        except Exception:
+            model_names = None
+        
+        self._store_model_names(model_names)
+        return model_names
+    
+    def _require_model(self, kind: str) -> None:
+        """Fail fast unless the server is up and has the configured model"""
+        if circuit_open(self.base_url):
+            raise LLMProviderNotAvailableError(
+                f"Ollama at {self.base_url} was unreachable recently; "
+                "not retrying until the cooldown expires"
+            )
+        
+        model_names = self._model_names()
+        record_health(self.base_url, model_names is not None)
+        if model_names is None:
+            raise LLMProviderNotAvailableError(
+                f"Cannot connect to Ollama at {self.base_url}. "
+                "Make sure Ollama is running."
+            )
+        
+        if self.config.model_name not in model_names:
+            available_models = ", ".join(model_names) if model_names else "None"
+            raise LLMProviderNotAvailableError(
+                f"{kind} '{self.config.model_name}' not found in Ollama. "
+                f"Available models: {available_models}"
+            )
+    
+    @staticmethod
+    def _prewarm(load: Callable[[], Any]) -> None:
+        """Load the model weights in the background so the first call is warm"""
+        def run() -> None:
+            try:
+                load()
+            except Exception:
+                pass  # The first real request reports any error
+        
+        threading.Thread(target=run, name="ollama-prewarm", daemon=True).start()
+
+
+class OllamaProvider(_OllamaTagsMixin, BaseLLMProvider):
     """Ollama local models provider"""
     
     def __init__(self, config):
@@ -35,28 +109,14 @@ class OllamaProvider(BaseLLMProvider):
             self.base_url = config.api_base or "http://localhost:11434"
             self.model = config.model_name
         
+        self.session = create_http_session()
         self.langchain_llm = None
         
     def initialize(self) -> None:
         """Initialize Ollama client"""
         try:
-            # Check if Ollama is running
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code != 200:
-                raise LLMProviderNotAvailableError(
-                    f"Ollama server not accessible at {self.base_url}"
-                )
-            
-            # Check if model exists
-            models = response.json().get("models", [])
-            model_names = [model["name"] for model in models]
-            
-            if self.config.model_name not in model_names:
-                available_models = ", ".join(model_names) if model_names else "None"
-                raise LLMProviderNotAvailableError(
-                    f"Model '{self.config.model_name}' not found in Ollama. "
-                    f"Available models: {available_models}"
-                )
+            # Check if Ollama is running and the model exists
+            self._require_model("Model")
             
             # Create LangChain Ollama instance
             self.langchain_llm = Ollama(
@@ -67,12 +127,16 @@ class OllamaProvider(BaseLLMProvider):
             )
             
             self.client = True  # Mark as initialized
+            # A generate request without a prompt just loads the model
+            self._prewarm(lambda: post_json(
+                self.session,
+                f"{self.base_url}/api/generate",
+                {"model": self.config.model_name},
+                timeout=self.config.timeout
+            ).close())
             
-        except requests.exceptions.ConnectionError:
-            raise LLMProviderNotAvailableError(
-                f"Cannot connect to Ollama at {self.base_url}. "
-                "Make sure Ollama is running."
-            )
+        except LLMProviderError:
+            raise
         except Exception as e:
             raise LLMProviderError(f"Failed to initialize Ollama provider: {e}")
     
@@ -83,46 +147,26 @@ class OllamaProvider(BaseLLMProvider):
         **kwargs
     ) -> str:
         """Generate text using Ollama API"""
-        if not self.client:
-            raise LLMProviderNotAvailableError("Ollama provider not initialized")
-            
-        try:
-            # Prepare the full prompt
-            full_prompt = prompt
-            if system_prompt:
-                full_prompt = f"System: {system_prompt}\n\nUser: {prompt}"
-            
-            # Use requests directly for more control
-            payload = {
-                "model": self.config.model_name,
-                "prompt": full_prompt,
-                "stream": False,
-                "options": {
-                    "temperature": self.config.temperature,
-                }
-            }
-            
-            if self.config.max_tokens:
-                payload["options"]["num_predict"] = self.config.max_tokens
-                
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=self.config.timeout
-            )
-            
-            if response.status_code != 200:
-                raise LLMProviderAPIError(f"Ollama API error: {response.text}")
-            
-            result = response.json()
-            return result.get("response", "")
-            
-        except requests.exceptions.Timeout:
-            raise LLMProviderTimeoutError("Ollama request timeout")
-        except requests.exceptions.RequestException as e:
-            raise LLMProviderAPIError(f"Ollama request error: {e}")
-        except Exception as e:
-            raise LLMProviderError(f"Ollama generation error: {e}")
+        return "".join(self.generate_text_stream(prompt, system_prompt, **kwargs))
+    
+    def generate_text_stream(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """Yield generated text chunks as Ollama produces them"""
+        # Prepare the full prompt
+        full_prompt = prompt
+        if system_prompt:
+            full_prompt = f"System: {system_prompt}\n\nUser: {prompt}"
+        
+        payload = self._build_payload(prompt=full_prompt)
+        return self._stream(
+            "/api/generate", payload,
+            lambda chunk: chunk.get("response", ""),
+            "generation"
+        )
     
     def chat_completion(
         self,
@@ -130,46 +174,72 @@ class OllamaProvider(BaseLLMProvider):
         **kwargs
     ) -> str:
         """Generate chat completion using Ollama API"""
+        return "".join(self.chat_completion_stream(messages, **kwargs))
+    
+    def chat_completion_stream(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> Iterator[str]:
+        """Yield chat completion chunks as Ollama produces them"""
+        payload = self._build_payload(messages=messages)
+        return self._stream(
+            "/api/chat", payload,
+            lambda chunk: chunk.get("message", {}).get("content", ""),
+            "chat completion"
+        )
+    
+    def _build_payload(self, **fields) -> Dict[str, Any]:
+        """Build a streaming request payload with the model options"""
+        payload = {
+            "model": self.config.model_name,
+            **fields,
+            "stream": True,
+            "options": {
+                "temperature": self.config.temperature,
+            }
+        }
+        
+        if self.config.max_tokens:
+            payload["options"]["num_predict"] = self.config.max_tokens
+        return payload
+    
+    def _stream(
+        self,
+        endpoint: str,
+        payload: Dict[str, Any],
+        extract: Callable[[Dict[str, Any]], str],
+        operation: str
+    ) -> Iterator[str]:
+        """POST with stream=True and yield text from each NDJSON line"""
         if not self.client:
             raise LLMProviderNotAvailableError("Ollama provider not initialized")
             
-        try:
-            payload = {
-                "model": self.config.model_name,
-                "messages": messages,
-                "stream": False,
-                "options": {
-                    "temperature": self.config.temperature,
-                }
-            }
-            
-            if self.config.max_tokens:
-                payload["options"]["num_predict"] = self.config.max_tokens
-                
-            response = requests.post(
-                f"{self.base_url}/api/chat",
-                json=payload,
-                timeout=self.config.timeout
+        with provider_errors("Ollama", operation):
+            response = post_json(
+                self.session,
+                f"{self.base_url}{endpoint}",
+                payload,
+                timeout=self.config.timeout,
+                stream=True
             )
-            
-            if response.status_code != 200:
-                raise LLMProviderAPIError(f"Ollama API error: {response.text}")
-            
-            result = response.json()
-            return result.get("message", {}).get("content", "")
-            
-        except requests.exceptions.Timeout:
-            raise LLMProviderTimeoutError("Ollama request timeout")
-        except requests.exceptions.RequestException as e:
-            raise LLMProviderAPIError(f"Ollama request error: {e}")
-        except Exception as e:
-            raise LLMProviderError(f"Ollama chat completion error: {e}")
+            with response:
+                if response.status_code != 200:
+                    raise LLMProviderAPIError(f"Ollama API error: {response.text}")
+                
+                for chunk in iter_json_lines(response):
+                    if "error" in chunk:
+                        raise LLMProviderAPIError(f"Ollama API error: {chunk['error']}")
+                    text = extract(chunk)
+                    if text:
+                        yield text
+                    if chunk.get("done"):
+                        break
     
     def is_available(self) -> bool:
         """Check if Ollama is available"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200 and self.client is not None
+            return self._model_names() is not None and self.client is not None
         except:
             return False
     
@@ -181,43 +251,32 @@ class OllamaProvider(BaseLLMProvider):
     
     def list_available_models(self) -> List[str]:
         """List available Ollama models"""
-        try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code == 200:
-                models = response.json().get("models", [])
-                return [model["name"] for model in models]
-        except:
-            pass
-        return []
+        return list(self._model_names() or [])
+    
+    def close(self) -> None:
+        """Close pooled HTTP connections"""
+        self.session.close()
 
 
-class OllamaEmbeddingProvider(BaseEmbeddingProvider):
+class OllamaEmbeddingProvider(_OllamaTagsMixin, BaseEmbeddingProvider):
     """Ollama embeddings provider"""
     
+    # LangChain embeds one text per HTTP call, so send texts individually
+    # and overlap the client-side overhead across a few threads
+    MAX_BATCH_INPUTS = 1
+    MAX_WORKERS = 4
+    
     def __init__(self, config: EmbeddingConfig):
         super().__init__(config)
         self.base_url = config.api_base or "http://localhost:11434"
+        self.session = create_http_session()
         self.langchain_embeddings = None
         
     def initialize(self) -> None:
         """Initialize Ollama embeddings"""
         try:
             # Check if Ollama is running and model exists
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code != 200:
-                raise LLMProviderNotAvailableError(
-                    f"Ollama server not accessible at {self.base_url}"
-                )
-                
-            models = response.json().get("models", [])
-            model_names = [model["name"] for model in models]
-            
-            if self.config.model_name not in model_names:
-                available_models = ", ".join(model_names) if model_names else "None"
-                raise LLMProviderNotAvailableError(
-                    f"Embedding model '{self.config.model_name}' not found in Ollama. "
-                    f"Available models: {available_models}"
-                )
+            self._require_model("Embedding model")
             
             # Create LangChain OllamaEmbeddings instance
             self.langchain_embeddings = OllamaEmbeddings(
@@ -226,39 +285,33 @@ class OllamaEmbeddingProvider(BaseEmbeddingProvider):
             )
             
             self.client = True
+            self._prewarm(lambda: self.langchain_embeddings.embed_query(""))
             
-        except requests.exceptions.ConnectionError:
-            raise LLMProviderNotAvailableError(
-                f"Cannot connect to Ollama at {self.base_url}"
-            )
+        except LLMProviderError:
+            raise
         except Exception as e:
             raise LLMProviderError(f"Failed to initialize Ollama embeddings: {e}")
     
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for documents"""
+    @provider_errors("Ollama", "embedding")
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of documents"""
         if not self.langchain_embeddings:
             raise LLMProviderNotAvailableError("Ollama embeddings not initialized")
             
-        try:
-            return self.langchain_embeddings.embed_documents(texts)
-        except Exception as e:
-            raise LLMProviderError(f"Ollama embedding error: {e}")
+        return self.langchain_embeddings.embed_documents(texts)
     
-    def embed_query(self, text: str) -> List[float]:
+    @provider_errors("Ollama", "query embedding")
+    def _embed_query(self, text: str) -> List[float]:
         """Generate embedding for query"""
         if not self.langchain_embeddings:
             raise LLMProviderNotAvailableError("Ollama embeddings not initialized")
             
-        try:
-            return self.langchain_embeddings.embed_query(text)
-        except Exception as e:
-            raise LLMProviderError(f"Ollama query embedding error: {e}")
+        return self.langchain_embeddings.embed_query(text)
     
     def is_available(self) -> bool:
         """Check if Ollama embeddings are available"""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            return response.status_code == 200 and self.client is not None
+            return self._model_names() is not None and self.client is not None
         except:
             return False
     
@@ -267,3 +320,7 @@ class OllamaEmbeddingProvider(BaseEmbeddingProvider):
         if not self.langchain_embeddings:
             raise LLMProviderNotAvailableError("Ollama embeddings not initialized")
         return self.langchain_embeddings
+    
+    def close(self) -> None:
+        """Close pooled HTTP connections"""
+        self.session.close()
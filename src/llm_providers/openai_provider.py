@@ -1,10 +1,24 @@
 """
 OpenAI LLM Provider implementation
 """
+import atexit
+import contextlib
+import functools
+import json
+import time
+
+import httpx
+import numpy as np
 import openai
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Final, Optional, Any, Union
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
+try:
+    import h2  # noqa: F401 - enables HTTP/2 on the shared client
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
 from . import (
     BaseLLMProvider, 
     BaseEmbeddingProvider, 
@@ -12,17 +26,60 @@ from . import (
     EmbeddingConfig,
     LLMProviderError,
     LLMProviderAPIError,
+    LLMProviderConnectionError,
     LLMProviderTimeoutError,
     LLMProviderNotAvailableError
 )
 
 
+# Native output sizes; text-embedding-3-* can be shortened via "dimensions"
+_OPENAI_EMBED_DIMS: Final[Dict[str, int]] = {
+    "text-embedding-ada-002": 1536,
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_httpx_client(api_base: Optional[str]) -> httpx.Client:
+    """One keep-alive connection pool per API base, shared by all OpenAI clients
+    
+    Timeouts are not part of the key: the OpenAI SDK sends its own per request.
+    """
+    client = httpx.Client(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        http2=_HTTP2
+    )
+    atexit.register(client.close)
+    return client
+
+
+@contextlib.contextmanager
+def _openai_errors(operation: str):
+    """Translate OpenAI SDK exceptions, keeping the HTTP status when known"""
+    try:
+        yield
+    except LLMProviderError:
+        raise
+    except openai.APITimeoutError as e:
+        raise LLMProviderTimeoutError(f"OpenAI request timeout: {e}")
+    except openai.APIConnectionError as e:
+        raise LLMProviderConnectionError(f"OpenAI connection error: {e}")
+    except openai.APIStatusError as e:
+        raise LLMProviderAPIError(f"OpenAI API error: {e}", status_code=e.status_code)
+    except openai.APIError as e:
+        raise LLMProviderAPIError(f"OpenAI API error: {e}")
+    except Exception as e:
+        raise LLMProviderError(f"OpenAI {operation} error: {e}")
+
+
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI GPT models provider"""
     
     def __init__(self, config: LLMConfig):
         super().__init__(config)
         self.langchain_llm = None
+        self.async_client = None
         
     def initialize(self) -> None:
         """Initialize OpenAI client"""
@@ -37,7 +94,15 @@ class OpenAIProvider(BaseLLMProvider):
             if self.config.api_version:
                 openai.api_version = self.config.api_version
                 
+            http_client = _shared_httpx_client(self.config.api_base)
             self.client = openai.OpenAI(
+                api_key=self.config.api_key,
+                base_url=self.config.api_base,
+                timeout=self.config.timeout,
+                http_client=http_client
+            )
+            # Async pools are bound to an event loop, so this one is not shared
+            self.async_client = openai.AsyncOpenAI(
                 api_key=self.config.api_key,
                 base_url=self.config.api_base,
                 timeout=self.config.timeout
@@ -50,7 +115,8 @@ class OpenAIProvider(BaseLLMProvider):
                 temperature=self.config.temperature,
                 max_tokens=self.config.max_tokens,
                 base_url=self.config.api_base,
-                timeout=self.config.timeout
+                timeout=self.config.timeout,
+                http_client=http_client
             )
             
         except Exception as e:
@@ -63,31 +129,8 @@ class OpenAIProvider(BaseLLMProvider):
         **kwargs
     ) -> str:
         """Generate text using OpenAI API"""
-        if not self.client:
-            raise LLMProviderNotAvailableError("OpenAI provider not initialized")
-            
-        try:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = self.client.chat.completions.create(
-                model=self.config.model_name,
-                messages=messages,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens,
-                **kwargs
-            )
-            
-            return response.choices[0].message.content
-            
-        except openai.APITimeoutError as e:
-            raise LLMProviderTimeoutError(f"OpenAI request timeout: {e}")
-        except openai.APIError as e:
-            raise LLMProviderAPIError(f"OpenAI API error: {e}")
-        except Exception as e:
-            raise LLMProviderError(f"OpenAI generation error: {e}")
+        with _openai_errors("generation"):
+            return self._complete(self._messages(prompt, system_prompt), **kwargs)
     
     def chat_completion(
         self,
@@ -95,26 +138,59 @@ class OpenAIProvider(BaseLLMProvider):
         **kwargs
     ) -> str:
         """Generate chat completion using OpenAI API"""
+        with _openai_errors("chat completion"):
+            return self._complete(messages, **kwargs)
+    
+    async def agenerate_text(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """Generate text on the event loop with the async OpenAI client"""
+        with _openai_errors("generation"):
+            return await self._acomplete(self._messages(prompt, system_prompt), **kwargs)
+    
+    async def achat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> str:
+        """Chat completion on the event loop with the async OpenAI client"""
+        with _openai_errors("chat completion"):
+            return await self._acomplete(messages, **kwargs)
+    
+    @staticmethod
+    def _messages(prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    def _complete(self, messages: List[Dict[str, str]], **kwargs) -> str:
         if not self.client:
             raise LLMProviderNotAvailableError("OpenAI provider not initialized")
-            
-        try:
-            response = self.client.chat.completions.create(
-                model=self.config.model_name,
-                messages=messages,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens,
-                **kwargs
-            )
-            
-            return response.choices[0].message.content
-            
-        except openai.APITimeoutError as e:
-            raise LLMProviderTimeoutError(f"OpenAI request timeout: {e}")
-        except openai.APIError as e:
-            raise LLMProviderAPIError(f"OpenAI API error: {e}")
-        except Exception as e:
-            raise LLMProviderError(f"OpenAI chat completion error: {e}")
+        response = self.client.chat.completions.create(
+            model=self.config.model_name,
+            messages=messages,
+            temperature=self.config.temperature,
+            max_tokens=self.config.max_tokens,
+            **kwargs
+        )
+        return response.choices[0].message.content
+    
+    async def _acomplete(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        if not self.async_client:
+            raise LLMProviderNotAvailableError("OpenAI provider not initialized")
+        response = await self.async_client.chat.completions.create(
+            model=self.config.model_name,
+            messages=messages,
+            temperature=self.config.temperature,
+            max_tokens=self.config.max_tokens,
+            **kwargs
+        )
+        return response.choices[0].message.content
     
     def is_available(self) -> bool:
         """Check if OpenAI is available"""
@@ -133,9 +209,23 @@ class OpenAIProvider(BaseLLMProvider):
 class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
     """OpenAI embeddings provider"""
     
+    # The embeddings endpoint accepts up to 2048 inputs per request
+    MAX_BATCH_INPUTS = 2048
+    MAX_WORKERS = 10
+    SORT_BY_LENGTH = True
+    # Seconds between status checks of a Batch API job
+    BATCH_POLL_INTERVAL = 30.0
+    _BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+    
     def __init__(self, config: EmbeddingConfig):
         super().__init__(config)
         self.langchain_embeddings = None
+        self.async_client = None
+        # Optional shortened output size, sent with every embeddings request
+        self._dimensions = (config.extra_params or {}).get("dimensions")
+        self._request_params = {"model": config.model_name}
+        if self._dimensions:
+            self._request_params["dimensions"] = self._dimensions
         
     def initialize(self) -> None:
         """Initialize OpenAI embeddings"""
@@ -143,40 +233,155 @@ class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
             raise LLMProviderNotAvailableError("OpenAI API key not provided")
             
         try:
+            http_client = _shared_httpx_client(self.config.api_base)
+            # Retries (429, 5xx, timeouts, connection errors) are handled per
+            # request by BaseEmbeddingProvider._with_retry, so the SDK must not
+            # retry as well
             self.client = openai.OpenAI(
                 api_key=self.config.api_key,
-                base_url=self.config.api_base
+                base_url=self.config.api_base,
+                max_retries=0,
+                http_client=http_client
+            )
+            self.async_client = openai.AsyncOpenAI(
+                api_key=self.config.api_key,
+                base_url=self.config.api_base,
+                max_retries=0
             )
             
             # Create LangChain OpenAIEmbeddings instance
             self.langchain_embeddings = OpenAIEmbeddings(
                 api_key=self.config.api_key,
                 model=self.config.model_name,
-                openai_api_base=self.config.api_base
+                openai_api_base=self.config.api_base,
+                dimensions=self._dimensions,
+                http_client=http_client
             )
             
         except Exception as e:
             raise LLMProviderError(f"Failed to initialize OpenAI embeddings: {e}")
     
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for documents"""
-        if not self.langchain_embeddings:
+    def embed_documents_batch(
+        self,
+        texts: List[str],
+        poll_interval: Optional[float] = None
+    ) -> np.ndarray:
+        """Embed a large corpus through the OpenAI Batch API
+        
+        Half the price of online requests and outside their rate limits, but
+        the job may take up to 24h; blocks while polling, so it is meant for
+        background ingest. Same caching and output as embed_documents.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        
+        keys, rows, found, missing = self._lookup_documents(texts)
+        if missing:
+            fresh = dict(zip(
+                missing, self._run_embedding_batch(list(missing.values()), poll_interval)
+            ))
+            self._cache_store(fresh)
+            found.update(fresh)
+        return self._stack_documents(keys, rows, found)
+    
+    def _run_embedding_batch(self, texts: List[str], poll_interval: Optional[float]) -> np.ndarray:
+        """Upload one JSONL line per request batch, wait, and collect in order"""
+        if not self.client:
             raise LLMProviderNotAvailableError("OpenAI embeddings not initialized")
-            
-        try:
-            return self.langchain_embeddings.embed_documents(texts)
-        except Exception as e:
-            raise LLMProviderError(f"OpenAI embedding error: {e}")
+        if poll_interval is None:
+            poll_interval = (self.config.extra_params or {}).get(
+                "batch_poll_interval", self.BATCH_POLL_INTERVAL
+            )
+        
+        batches = self._split_batches(texts)
+        requests_jsonl = "\n".join(
+            json.dumps({
+                "custom_id": str(i),
+                "method": "POST",
+                "url": "/v1/embeddings",
+                "body": {**self._request_params, "input": batch}
+            })
+            for i, batch in enumerate(batches)
+        )
+        
+        with _openai_errors("batch embedding"):
+            upload = self.client.files.create(
+                file=("embeddings.jsonl", requests_jsonl.encode("utf-8")),
+                purpose="batch"
+            )
+            job = self.client.batches.create(
+                input_file_id=upload.id,
+                endpoint="/v1/embeddings",
+                completion_window="24h"
+            )
+            while job.status not in self._BATCH_FINAL_STATUSES:
+                time.sleep(poll_interval)
+                job = self.client.batches.retrieve(job.id)
+            if job.status != "completed" or not job.output_file_id:
+                raise LLMProviderAPIError(f"OpenAI batch {job.id} ended as {job.status}")
+            output = self.client.files.content(job.output_file_id).text
+        
+        results: Dict[int, List[List[float]]] = {}
+        for line in output.splitlines():
+            if not line:
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                raise LLMProviderAPIError(
+                    f"OpenAI batch request {record.get('custom_id')} failed: "
+                    f"{record.get('error') or response.get('body')}",
+                    status_code=response.get("status_code")
+                )
+            data = sorted(response["body"]["data"], key=lambda item: item["index"])
+            results[int(record["custom_id"])] = [item["embedding"] for item in data]
+        
+        if len(results) != len(batches):
+            raise LLMProviderAPIError(
+                f"OpenAI batch {job.id} returned {len(results)} of {len(batches)} results"
+            )
+        return np.asarray(
+            [vector for i in range(len(batches)) for vector in results[i]],
+            dtype=np.float32
+        )
     
-    def embed_query(self, text: str) -> List[float]:
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of documents"""
+        return self._vectors(self._create_embeddings(texts))
+    
+    def _embed_query(self, text: str) -> List[float]:
         """Generate embedding for query"""
-        if not self.langchain_embeddings:
+        return self._create_embeddings(text).data[0].embedding
+    
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch without holding a worker thread"""
+        return self._vectors(await self._acreate_embeddings(texts))
+    
+    async def _aembed_query(self, text: str) -> List[float]:
+        """Embed a query without holding a worker thread"""
+        return (await self._acreate_embeddings(text)).data[0].embedding
+    
+    @staticmethod
+    def _vectors(response) -> List[List[float]]:
+        return [
+            item.embedding
+            for item in sorted(response.data, key=lambda item: item.index)
+        ]
+    
+    def _create_embeddings(self, texts: Union[str, List[str]]):
+        """Call the embeddings endpoint directly, keeping the HTTP status"""
+        if not self.client:
             raise LLMProviderNotAvailableError("OpenAI embeddings not initialized")
-            
-        try:
-            return self.langchain_embeddings.embed_query(text)
-        except Exception as e:
-            raise LLMProviderError(f"OpenAI query embedding error: {e}")
+        with _openai_errors("embedding"):
+            return self.client.embeddings.create(input=texts, **self._request_params)
+    
+    async def _acreate_embeddings(self, texts: Union[str, List[str]]):
+        if not self.async_client:
+            raise LLMProviderNotAvailableError("OpenAI embeddings not initialized")
+        with _openai_errors("embedding"):
+            return await self.async_client.embeddings.create(
+                input=texts, **self._request_params
+            )
     
     def is_available(self) -> bool:
         """Check if OpenAI embeddings are available"""
@@ -187,12 +392,7 @@ class OpenAIEmbeddingProvider(BaseEmbeddingProvider):
     
     def get_embedding_dimension(self) -> Optional[int]:
         """Get OpenAI embedding dimension"""
-        model_dimensions = {
-            "text-embedding-ada-002": 1536,
-            "text-embedding-3-small": 1536,
-            "text-embedding-3-large": 3072
-        }
-        return model_dimensions.get(self.config.model_name)
+        return self._dimensions or _OPENAI_EMBED_DIMS.get(self.config.model_name)
     
     def get_langchain_embeddings(self):
         """Get LangChain compatible embeddings instance"""
@@ -1,9 +1,16 @@
 """
 LLM Provider Manager for coordinating multiple LLM providers
 """
+import functools
+import importlib
+import logging
 import os
-from typing import Dict, List, Optional, Any, Union
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Final, List, Optional, Any, Sequence, Tuple, Union
 from dataclasses import dataclass
+
+import numpy as np
 from dotenv import load_dotenv
 
 # Carregar variáveis do arquivo .env
@@ -18,9 +25,37 @@ from . import (
     LLMProviderError,
     LLMProviderNotAvailableError
 )
-from .openai_provider import OpenAIProvider, OpenAIEmbeddingProvider
-from .ollama_provider import OllamaProvider, OllamaEmbeddingProvider
-from .custom_provider import CustomProvider, CustomEmbeddingProvider
+from .cache import ResponseCache, SemanticCache
+
+logger = logging.getLogger(__name__)
+
+
+# (module, class) per provider; modules are imported on first use so that
+# backends that are not configured never load their dependencies
+_LLM_PROVIDER_CLASSES: Final[Dict[LLMProvider, Tuple[str, str]]] = {
+    LLMProvider.OPENAI: ("openai_provider", "OpenAIProvider"),
+    LLMProvider.OLLAMA: ("ollama_provider", "OllamaProvider"),
+    LLMProvider.CUSTOM: ("custom_provider", "CustomProvider")
+}
+
+_EMBEDDING_PROVIDER_CLASSES: Final[Dict[LLMProvider, Tuple[str, str]]] = {
+    LLMProvider.OPENAI: ("openai_provider", "OpenAIEmbeddingProvider"),
+    LLMProvider.OLLAMA: ("ollama_provider", "OllamaEmbeddingProvider"),
+    LLMProvider.CUSTOM: ("custom_provider", "CustomEmbeddingProvider")
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _provider_class(module: str, name: str) -> type:
+    """Import a provider implementation from this package"""
+    return getattr(importlib.import_module(f".{module}", __package__), name)
+
+
+_DEFAULT_FALLBACKS: Final = (
+    LLMProvider.OPENAI,
+    LLMProvider.OLLAMA,
+    LLMProvider.CUSTOM
+)
 
 
 @dataclass
@@ -28,73 +63,106 @@ class ProviderPreferences:
     """Configuration for provider selection preferences"""
     preferred_llm_provider: Optional[LLMProvider] = None
     preferred_embedding_provider: Optional[LLMProvider] = None
-    fallback_providers: List[LLMProvider] = None
+    # Read-only by default; pass a list to customize the order
+    fallback_providers: Sequence[LLMProvider] = _DEFAULT_FALLBACKS
     auto_detect: bool = True
     
     def __post_init__(self):
         if self.fallback_providers is None:
-            self.fallback_providers = [
-                LLMProvider.OPENAI,
-                LLMProvider.OLLAMA,
-                LLMProvider.CUSTOM
-            ]
+            self.fallback_providers = _DEFAULT_FALLBACKS
 
 
 class LLMProviderManager:
     """Manages multiple LLM providers and handles fallbacks"""
     
-    def __init__(self, preferences: Optional[ProviderPreferences] = None):
+    # Seconds a list_available_providers snapshot is reused
+    STATUS_TTL = 5.0
+    
+    def __init__(
+        self,
+        preferences: Optional[ProviderPreferences] = None,
+        response_cache_size: int = 256,
+        response_cache_ttl: Optional[float] = None,
+        semantic_cache_threshold: Optional[float] = None
+    ):
         self.preferences = preferences or ProviderPreferences()
         self.llm_providers: Dict[LLMProvider, BaseLLMProvider] = {}
         self.embedding_providers: Dict[LLMProvider, BaseEmbeddingProvider] = {}
         self.active_llm_provider: Optional[BaseLLMProvider] = None
         self.active_embedding_provider: Optional[BaseEmbeddingProvider] = None
+        # Exact-match cache of deterministic generate_text responses;
+        # query embeddings are already cached by each embedding provider
+        self._text_cache = ResponseCache(response_cache_size, response_cache_ttl)
+        # Opt-in similarity cache for paraphrased prompts, checked after an
+        # exact miss; costs one query embedding per uncached generation
+        self._semantic_cache = (
+            SemanticCache(
+                semantic_cache_threshold,
+                capacity=response_cache_size,
+                ttl=response_cache_ttl
+            )
+            if semantic_cache_threshold is not None else None
+        )
+        # (taken_at, provider state, status) of the last list_available_providers
+        self._status_snapshot: Optional[tuple] = None
         
     def add_llm_provider(self, provider_type: LLMProvider, config: LLMConfig) -> None:
         """Add an LLM provider with configuration"""
-        provider_classes = {
-            LLMProvider.OPENAI: OpenAIProvider,
-            LLMProvider.OLLAMA: OllamaProvider,
-            LLMProvider.CUSTOM: CustomProvider
-        }
-        
-        if provider_type not in provider_classes:
-            raise LLMProviderError(f"Unsupported LLM provider: {provider_type}")
-        
-        provider_class = provider_classes[provider_type]
-        provider = provider_class(config)
-        
-        try:
-            provider.initialize()
-            self.llm_providers[provider_type] = provider
-            print(f"✅ LLM Provider {provider_type.value} initialized successfully")
-        except Exception as e:
-            print(f"❌ Failed to initialize LLM provider {provider_type.value}: {e}")
-            # Store the provider anyway for potential later retry
-            self.llm_providers[provider_type] = provider
+        self.llm_providers[provider_type] = self._create_provider(
+            _LLM_PROVIDER_CLASSES, "LLM", provider_type, config
+        )
     
     def add_embedding_provider(self, provider_type: LLMProvider, config: EmbeddingConfig) -> None:
         """Add an embedding provider with configuration"""
-        provider_classes = {
-            LLMProvider.OPENAI: OpenAIEmbeddingProvider,
-            LLMProvider.OLLAMA: OllamaEmbeddingProvider,
-            LLMProvider.CUSTOM: CustomEmbeddingProvider
-        }
+        self.embedding_providers[provider_type] = self._create_provider(
+            _EMBEDDING_PROVIDER_CLASSES, "Embedding", provider_type, config
+        )
+    
+    def add_providers(
+        self,
+        llm_configs: Sequence[Tuple[LLMProvider, LLMConfig]] = (),
+        embedding_configs: Sequence[Tuple[LLMProvider, EmbeddingConfig]] = (),
+        max_workers: int = 6
+    ) -> None:
+        """Add several providers, running their (network-bound) initialization concurrently
         
-        if provider_type not in provider_classes:
-            raise LLMProviderError(f"Unsupported embedding provider: {provider_type}")
+        Providers are registered in argument order once all have initialized.
+        """
+        jobs = (
+            [(_LLM_PROVIDER_CLASSES, "LLM", *item) for item in llm_configs]
+            + [(_EMBEDDING_PROVIDER_CLASSES, "Embedding", *item) for item in embedding_configs]
+        )
+        if not jobs:
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+            providers = list(executor.map(lambda job: self._create_provider(*job), jobs))
         
-        provider_class = provider_classes[provider_type]
-        provider = provider_class(config)
+        for (_, kind, provider_type, _), provider in zip(jobs, providers):
+            registry = self.llm_providers if kind == "LLM" else self.embedding_providers
+            registry[provider_type] = provider
+    
+    @staticmethod
+    def _create_provider(
+        provider_classes: Dict[LLMProvider, Tuple[str, str]],
+        kind: str,
+        provider_type: LLMProvider,
+        config: Union[LLMConfig, EmbeddingConfig]
+    ) -> Union[BaseLLMProvider, BaseEmbeddingProvider]:
+        """Instantiate and initialize a provider, keeping it even if initialization fails"""
+        spec = provider_classes.get(provider_type)
+        if spec is None:
+            raise LLMProviderError(f"Unsupported {kind.lower()} provider: {provider_type}")
         
+        provider = _provider_class(*spec)(config)
         try:
             provider.initialize()
-            self.embedding_providers[provider_type] = provider
-            print(f"✅ Embedding Provider {provider_type.value} initialized successfully")
+            logger.info("%s provider %s initialized", kind, provider_type.value)
         except Exception as e:
-            print(f"❌ Failed to initialize embedding provider {provider_type.value}: {e}")
+            logger.warning(
+                "Failed to initialize %s provider %s: %s", kind.lower(), provider_type.value, e
+            )
             # Store the provider anyway for potential later retry
-            self.embedding_providers[provider_type] = provider
+        return provider
     
     def select_active_llm_provider(self) -> Optional[BaseLLMProvider]:
         """Select the best available LLM provider based on preferences"""
@@ -103,7 +171,7 @@ class LLMProviderManager:
             preferred = self.llm_providers.get(self.preferences.preferred_llm_provider)
             if preferred and preferred.is_available():
                 self.active_llm_provider = preferred
-                print(f"🎯 Using preferred LLM provider: {self.preferences.preferred_llm_provider.value}")
+                logger.debug("Using preferred LLM provider %s", self.preferences.preferred_llm_provider.value)
                 return preferred
         
         # Try fallback providers
@@ -111,10 +179,10 @@ class LLMProviderManager:
             provider = self.llm_providers.get(provider_type)
             if provider and provider.is_available():
                 self.active_llm_provider = provider
-                print(f"🔄 Using fallback LLM provider: {provider_type.value}")
+                logger.debug("Using fallback LLM provider %s", provider_type.value)
                 return provider
         
-        print("❌ No available LLM providers found")
+        logger.error("No available LLM providers found")
         return None
     
     def select_active_embedding_provider(self) -> Optional[BaseEmbeddingProvider]:
@@ -124,7 +192,7 @@ class LLMProviderManager:
             preferred = self.embedding_providers.get(self.preferences.preferred_embedding_provider)
             if preferred and preferred.is_available():
                 self.active_embedding_provider = preferred
-                print(f"🎯 Using preferred embedding provider: {self.preferences.preferred_embedding_provider.value}")
+                logger.debug("Using preferred embedding provider %s", self.preferences.preferred_embedding_provider.value)
                 return preferred
         
         # Try fallback providers
@@ -132,10 +200,10 @@ class LLMProviderManager:
             provider = self.embedding_providers.get(provider_type)
             if provider and provider.is_available():
                 self.active_embedding_provider = provider
-                print(f"🔄 Using fallback embedding provider: {provider_type.value}")
+                logger.debug("Using fallback embedding provider %s", provider_type.value)
                 return provider
         
-        print("❌ No available embedding providers found")
+        logger.error("No available embedding providers found")
         return None
     
     def get_active_llm_provider(self) -> BaseLLMProvider:
@@ -157,23 +225,126 @@ class LLMProviderManager:
     def generate_text(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
         """Generate text using the active LLM provider"""
         provider = self.get_active_llm_provider()
-        return provider.generate_text(prompt, system_prompt, **kwargs)
+        # Only temperature-0 calls are repeatable enough to serve from cache
+        if kwargs or provider.config.temperature:
+            return provider.generate_text(prompt, system_prompt, **kwargs)
+        return self._cached_generation(
+            provider, ("text", system_prompt), prompt,
+            lambda: provider.generate_text(prompt, system_prompt)
+        )
     
     def chat_completion(self, messages: List[Dict[str, str]], **kwargs) -> str:
         """Generate chat completion using the active LLM provider"""
         provider = self.get_active_llm_provider()
-        return provider.chat_completion(messages, **kwargs)
+        if kwargs or provider.config.temperature:
+            return provider.chat_completion(messages, **kwargs)
+        return self._cached_generation(
+            provider, ("chat",), self._chat_prompt(messages),
+            lambda: provider.chat_completion(messages)
+        )
+    
+    async def agenerate_text(self, prompt: str, system_prompt: Optional[str] = None, **kwargs) -> str:
+        """Async generate_text; only the exact-match cache is consulted"""
+        provider = self.get_active_llm_provider()
+        if kwargs or provider.config.temperature:
+            return await provider.agenerate_text(prompt, system_prompt, **kwargs)
+        return await self._acached_generation(
+            provider, ("text", system_prompt), prompt,
+            lambda: provider.agenerate_text(prompt, system_prompt)
+        )
+    
+    async def achat_completion(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Async chat_completion; only the exact-match cache is consulted"""
+        provider = self.get_active_llm_provider()
+        if kwargs or provider.config.temperature:
+            return await provider.achat_completion(messages, **kwargs)
+        return await self._acached_generation(
+            provider, ("chat",), self._chat_prompt(messages),
+            lambda: provider.achat_completion(messages)
+        )
+    
+    async def _acached_generation(self, provider: BaseLLMProvider, kind: tuple, prompt: str, generate) -> str:
+        key = self._generation_namespace(provider, kind) + (prompt,)
+        response = self._text_cache.get(key)
+        if response is None:
+            response = await generate()
+            self._text_cache.put(key, response)
+        return response
+    
+    @staticmethod
+    def _chat_prompt(messages: List[Dict[str, str]]) -> str:
+        """Flatten chat messages into the text used for cache keys"""
+        return "\n".join(
+            f"{message.get('role', 'user')}: {message.get('content', '')}"
+            for message in messages
+        )
     
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for documents using the active provider"""
+    @staticmethod
+    def _generation_namespace(provider: BaseLLMProvider, kind: tuple) -> tuple:
+        config = provider.config
+        return (config.provider, config.model_name, config.max_tokens) + kind
+    
+    def _cached_generation(self, provider: BaseLLMProvider, kind: tuple, prompt: str, generate) -> str:
+        """Serve a deterministic generation from the exact or semantic cache"""
+        namespace = self._generation_namespace(provider, kind)
+        key = namespace + (prompt,)
+        response = self._text_cache.get(key)
+        if response is not None:
+            return response
+        
+        semantic_key = None
+        if self._semantic_cache is not None:
+            try:
+                embedder = self.get_active_embedding_provider()
+                embedding = embedder.embed_query(prompt)
+                # Vectors from different embedding models are not comparable
+                semantic_key = (namespace + (embedder.config.model_name,), embedding)
+                response = self._semantic_cache.get(*semantic_key)
+            except LLMProviderError:
+                semantic_key = None
+        
+        if response is None:
+            response = generate()
+            if semantic_key is not None:
+                self._semantic_cache.put(*semantic_key, response)
+        self._text_cache.put(key, response)
+        return response
+    
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss statistics of the manager-level caches"""
+        stats = {"generate_text": self._text_cache.stats()}
+        if self._semantic_cache is not None:
+            stats["semantic"] = self._semantic_cache.stats()
+        return stats
+    
+    def embed_documents(
+        self, texts: List[str], max_in_flight: Optional[int] = None
+    ) -> np.ndarray:
+        """Generate embeddings for documents using the active provider
+        
+        Returns a (len(texts), dim) float32 matrix; call .tolist() where
+        plain Python lists are required.
+        """
         provider = self.get_active_embedding_provider()
-        return provider.embed_documents(texts)
+        return provider.embed_documents(texts, max_in_flight)
     
-    def embed_query(self, text: str) -> List[float]:
-        """Generate embedding for query using the active provider"""
+    def embed_query(self, text: str) -> np.ndarray:
+        """Generate a float32 embedding for query using the active provider"""
         provider = self.get_active_embedding_provider()
         return provider.embed_query(text)
     
+    async def aembed_documents(
+        self, texts: List[str], max_in_flight: Optional[int] = None
+    ) -> np.ndarray:
+        """Async embed_documents using the active provider"""
+        provider = self.get_active_embedding_provider()
+        return await provider.aembed_documents(texts, max_in_flight)
+    
+    async def aembed_query(self, text: str) -> np.ndarray:
+        """Async embed_query using the active provider"""
+        provider = self.get_active_embedding_provider()
+        return await provider.aembed_query(text)
+    
     def get_langchain_llm(self):
         """Get LangChain compatible LLM instance"""
         provider = self.get_active_llm_provider()
@@ -185,26 +356,47 @@ class LLMProviderManager:
         return provider.get_langchain_embeddings()
     
     def list_available_providers(self) -> Dict[str, Dict[str, Any]]:
-        """List all available providers and their status"""
+        """List all available providers and their status
+        
+        Snapshots are reused for STATUS_TTL seconds while the registered and
+        active providers are unchanged; an unchanged status is returned as
+        the same (read-only) dict.
+        """
+        state = (
+            tuple(self.llm_providers.items()),
+            tuple(self.embedding_providers.items()),
+            self.active_llm_provider,
+            self.active_embedding_provider
+        )
+        now = time.monotonic()
+        snapshot = self._status_snapshot
+        if snapshot and snapshot[1] == state and now - snapshot[0] < self.STATUS_TTL:
+            return snapshot[2]
+        
         status = {
             "llm_providers": {},
             "embedding_providers": {}
         }
         
         for provider_type, provider in self.llm_providers.items():
+            available = provider.is_available()
             status["llm_providers"][provider_type.value] = {
-                "available": provider.is_available(),
-                "model_info": provider.get_model_info() if provider.is_available() else None,
-                "active": provider == self.active_llm_provider
+                "available": available,
+                "model_info": dict(provider.get_model_info()) if available else None,
+                "active": provider is self.active_llm_provider
             }
         
         for provider_type, provider in self.embedding_providers.items():
+            available = provider.is_available()
             status["embedding_providers"][provider_type.value] = {
-                "available": provider.is_available(),
-                "embedding_dimension": provider.get_embedding_dimension() if provider.is_available() else None,
-                "active": provider == self.active_embedding_provider
+                "available": available,
+                "embedding_dimension": provider.get_embedding_dimension() if available else None,
+                "active": provider is self.active_embedding_provider
             }
         
+        if snapshot and snapshot[2] == status:
+            status = snapshot[2]
+        self._status_snapshot = (now, state, status)
         return status
     
     def switch_llm_provider(self, provider_type: LLMProvider) -> bool:
@@ -212,10 +404,10 @@ class LLMProviderManager:
         provider = self.llm_providers.get(provider_type)
         if provider and provider.is_available():
             self.active_llm_provider = provider
-            print(f"🔄 Switched to LLM provider: {provider_type.value}")
+            logger.info("Switched to LLM provider %s", provider_type.value)
             return True
         else:
-            print(f"❌ Cannot switch to LLM provider {provider_type.value}: not available")
+            logger.warning("Cannot switch to LLM provider %s: not available", provider_type.value)
             return False
     
     def switch_embedding_provider(self, provider_type: LLMProvider) -> bool:
@@ -223,16 +415,30 @@ class LLMProviderManager:
         provider = self.embedding_providers.get(provider_type)
         if provider and provider.is_available():
             self.active_embedding_provider = provider
-            print(f"🔄 Switched to embedding provider: {provider_type.value}")
+            logger.info("Switched to embedding provider %s", provider_type.value)
             return True
         else:
-            print(f"❌ Cannot switch to embedding provider {provider_type.value}: not available")
+            logger.warning("Cannot switch to embedding provider %s: not available", provider_type.value)
             return False
 
 
 def create_provider_manager_from_env() -> LLMProviderManager:
     """Create provider manager from environment variables"""
-    manager = LLMProviderManager()
+    manager = LLMProviderManager(
+        response_cache_size=int(os.getenv("LLM_RESPONSE_CACHE_SIZE", "256")),
+        response_cache_ttl=(
+            float(os.getenv("LLM_RESPONSE_CACHE_TTL"))
+            if os.getenv("LLM_RESPONSE_CACHE_TTL") else None
+        ),
+        semantic_cache_threshold=(
+            float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD"))
+            if os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD") else None
+        )
+    )
+    
+    # Collected first so that all providers initialize concurrently
+    llm_configs: List[Tuple[LLMProvider, LLMConfig]] = []
+    embedding_configs: List[Tuple[LLMProvider, EmbeddingConfig]] = []
     
     # OpenAI configuration
     if os.getenv("OPENAI_API_KEY"):
@@ -244,15 +450,21 @@ def create_provider_manager_from_env() -> LLMProviderManager:
             api_key=os.getenv("OPENAI_API_KEY"),
             api_base=os.getenv("OPENAI_API_BASE"),
         )
-        manager.add_llm_provider(LLMProvider.OPENAI, openai_llm_config)
+        llm_configs.append((LLMProvider.OPENAI, openai_llm_config))
         
         openai_embedding_config = EmbeddingConfig(
             provider=LLMProvider.OPENAI,
             model_name=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-ada-002"),
             api_key=os.getenv("OPENAI_API_KEY"),
             api_base=os.getenv("OPENAI_API_BASE"),
+            batch_size=int(os.getenv("OPENAI_EMBED_BATCH_SIZE", "1024")),
+            extra_params=(
+                {"batch_poll_interval": float(os.getenv("OPENAI_BATCH_POLL_INTERVAL"))}
+                if os.getenv("OPENAI_BATCH_POLL_INTERVAL") else None
+            ),
+            cache_path=os.getenv("EMBEDDING_CACHE_PATH"),
         )
-        manager.add_embedding_provider(LLMProvider.OPENAI, openai_embedding_config)
+        embedding_configs.append((LLMProvider.OPENAI, openai_embedding_config))
     
     # Ollama configuration
     if os.getenv("OLLAMA_BASE_URL") or os.getenv("OLLAMA_MODEL"):
@@ -262,15 +474,16 @@ def create_provider_manager_from_env() -> LLMProviderManager:
             temperature=float(os.getenv("OLLAMA_TEMPERATURE", "0.0")),
             api_base=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
         )
-        manager.add_llm_provider(LLMProvider.OLLAMA, ollama_llm_config)
+        llm_configs.append((LLMProvider.OLLAMA, ollama_llm_config))
         
         if os.getenv("OLLAMA_EMBEDDING_MODEL"):
             ollama_embedding_config = EmbeddingConfig(
                 provider=LLMProvider.OLLAMA,
                 model_name=os.getenv("OLLAMA_EMBEDDING_MODEL"),
                 api_base=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+                cache_path=os.getenv("EMBEDDING_CACHE_PATH"),
             )
-            manager.add_embedding_provider(LLMProvider.OLLAMA, ollama_embedding_config)
+            embedding_configs.append((LLMProvider.OLLAMA, ollama_embedding_config))
     
     # Custom/Enterprise configuration
     if os.getenv("CUSTOM_LLM_API_BASE"):
@@ -289,7 +502,7 @@ def create_provider_manager_from_env() -> LLMProviderManager:
                 "endpoint": os.getenv("CUSTOM_LLM_ENDPOINT", "/v1/chat/completions")
             }
         )
-        manager.add_llm_provider(LLMProvider.CUSTOM, custom_llm_config)
+        llm_configs.append((LLMProvider.CUSTOM, custom_llm_config))
         
         if os.getenv("CUSTOM_EMBEDDING_API_BASE"):
             custom_embedding_config = EmbeddingConfig(
@@ -299,9 +512,12 @@ def create_provider_manager_from_env() -> LLMProviderManager:
                 custom_headers=custom_headers,
                 extra_params={
                     "endpoint": os.getenv("CUSTOM_EMBEDDING_ENDPOINT", "/v1/embeddings")
-                }
+                },
+                cache_path=os.getenv("EMBEDDING_CACHE_PATH"),
             )
-            manager.add_embedding_provider(LLMProvider.CUSTOM, custom_embedding_config)
+            embedding_configs.append((LLMProvider.CUSTOM, custom_embedding_config))
+    
+    manager.add_providers(llm_configs, embedding_configs)
     
     # Select active providers
     manager.select_active_llm_provider()
@@ -1,11 +1,11 @@
 """
 Data models for the database RAG system
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class ColumnInfo:
     """Database column information"""
     name: str
@@ -14,7 +14,7 @@ class ColumnInfo:
     is_primary_key: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class ForeignKeyInfo:
     """Foreign key information"""
     column: str
@@ -22,16 +22,25 @@ class ForeignKeyInfo:
     references_column: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TableInfo:
     """Database table information"""
     name: str
     columns: List[ColumnInfo]
     primary_keys: List[str]
     foreign_keys: List[ForeignKeyInfo]
+    # Built on the first to_dict call; safe to share since the table is frozen
+    _dict: Optional[Dict[str, Any]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to plain dictionary"""
+        """Convert to plain dictionary (cached, treat as read-only)"""
+        if self._dict is None:
+            object.__setattr__(self, "_dict", self._build_dict())
+        return self._dict
+
+    def _build_dict(self) -> Dict[str, Any]:
         return {
             "name": self.name,
             "columns": [
@@ -54,45 +63,84 @@ class TableInfo:
             ],
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TableInfo":
+        """Build from the dictionary produced by to_dict"""
+        return cls(
+            name=data["name"],
+            columns=[
+                ColumnInfo(
+                    name=col["name"],
+                    data_type=col["type"],
+                    is_nullable=col["nullable"],
+                    is_primary_key=col["primary_key"],
+                )
+                for col in data["columns"]
+            ],
+            primary_keys=list(data["primary_keys"]),
+            foreign_keys=[
+                ForeignKeyInfo(
+                    column=fk["column"],
+                    references_table=fk["references_table"],
+                    references_column=fk["references_column"],
+                )
+                for fk in data["foreign_keys"]
+            ],
+        )
+
 
-@dataclass
+@dataclass(slots=True)
 class DatabaseSchema:
     """Complete database schema representation"""
     tables: List[TableInfo]
+    # Name index and name list, rebuilt whenever tables is reassigned
+    _by_name: Dict[str, TableInfo] = field(init=False, repr=False, compare=False)
+    _names: List[str] = field(init=False, repr=False, compare=False)
+    # Rendered to_text output, dropped whenever tables is reassigned
+    _text: Optional[str] = field(init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name == "tables":
+            index: Dict[str, TableInfo] = {}
+            for table in value:
+                # Keep the first table of a name, as the linear scan did
+                index.setdefault(table.name, table)
+            object.__setattr__(self, "_by_name", index)
+            object.__setattr__(self, "_names", [table.name for table in value])
+            object.__setattr__(self, "_text", None)
 
     def get_table(self, table_name: str) -> Optional[TableInfo]:
         """Return a specific table metadata if exists"""
-        for table in self.tables:
-            if table.name == table_name:
-                return table
-        return None
+        return self._by_name.get(table_name)
 
     def get_table_names(self) -> List[str]:
         """Return all table names"""
-        return [table.name for table in self.tables]
+        return list(self._names)
 
     def to_text(self) -> str:
-        """Render schema as human-readable text"""
-        schema_parts = []
-        for table in self.tables:
-            schema_parts.append(f"Table: {table.name}")
-            schema_parts.append("Columns:")
-            for col in table.columns:
-                pk_marker = " (PK)" if col.is_primary_key else ""
-                nullable = "nullable" if col.is_nullable else "not null"
-                schema_parts.append(
-                    f"  - {col.name} ({col.data_type}, {nullable}){pk_marker}"
-                )
-            if table.primary_keys:
-                schema_parts.append(
-                    f"Primary Keys: {', '.join(table.primary_keys)}"
-                )
-            if table.foreign_keys:
-                schema_parts.append("Foreign Keys:")
-                for fk in table.foreign_keys:
-                    schema_parts.append(
-                        f"  - {fk.column} -> {fk.references_table}."
-                        f"{fk.references_column}"
-                    )
-            schema_parts.append("")
-        return "\n".join(schema_parts)
+        """Render schema as human-readable text (memoized)"""
+        if self._text is None:
+            self._text = "\n".join(map(_table_text, self.tables))
+        return self._text
+
+
+def _table_text(table: TableInfo) -> str:
+    """Render one table block of DatabaseSchema.to_text"""
+    parts = [f"Table: {table.name}\nColumns:"]
+    parts.extend(
+        f"  - {col.name} ({col.data_type}, "
+        f"{'nullable' if col.is_nullable else 'not null'})"
+        f"{' (PK)' if col.is_primary_key else ''}"
+        for col in table.columns
+    )
+    if table.primary_keys:
+        parts.append(f"Primary Keys: {', '.join(table.primary_keys)}")
+    if table.foreign_keys:
+        parts.append("Foreign Keys:")
+        parts.extend(
+            f"  - {fk.column} -> {fk.references_table}.{fk.references_column}"
+            for fk in table.foreign_keys
+        )
+    parts.append("")
+    return "\n".join(parts)
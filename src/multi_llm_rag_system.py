@@ -1,20 +1,42 @@
 """
 Multi-LLM RAG system for relational databases
 """
+import asyncio
+import hashlib
+import logging
 import os
-import traceback
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Final, Iterable, Iterator, List, Optional, Tuple
 
 from config_multi_llm import DatabaseConfig, MultiLLMConfig, RAGConfig
+from llm_providers import LLMProvider
 from llm_providers.provider_manager import LLMProviderManager, create_provider_manager_from_env
 from database_scanner import DatabaseScanner
 from vector_store_manager import VectorStoreManager
 from sql_agent import SQLAgent, RAGQueryProcessor
 
 
+logger = logging.getLogger(__name__)
+
+# Provider names accepted by the switch_* methods
+_PROVIDER_TYPES: Final[Dict[str, LLMProvider]] = {
+    "openai": LLMProvider.OPENAI,
+    "ollama": LLMProvider.OLLAMA,
+    "custom": LLMProvider.CUSTOM
+}
+
+
 class MultiLLMDatabaseRAGSystem:
     """Main RAG system coordinating multiple LLM providers"""
 
+    # Documents embedded and indexed per step while building the vector
+    # store; large enough to keep max_in_flight provider batches busy
+    VECTORIZE_CHUNK_SIZE = 1024
+    # Seconds a printed status snapshot is reused
+    STATUS_TTL = 30.0
+
     def __init__(
         self,
         db_config: DatabaseConfig,
@@ -37,6 +59,12 @@ class MultiLLMDatabaseRAGSystem:
         self.vector_store_manager = VectorStoreManager(rag_config)
         self.sql_agent = None  # Will be initialized after provider selection
         self.query_processor = None
+        # (provider, model) the vector store was embedded with
+        self._embedding_signature: Optional[Tuple[str, str]] = None
+        # (schema signature, documents) from the last vectorization
+        self._prep_cache: Optional[Tuple[tuple, List[Tuple[str, Dict[str, Any]]]]] = None
+        # (timestamp, provider status, table count) for _print_system_status
+        self._status_cache: Optional[Tuple[float, Dict[str, Any], Any]] = None
 
     def _create_provider_manager(self) -> LLMProviderManager:
         """Create and configure provider manager"""
@@ -61,69 +89,83 @@ class MultiLLMDatabaseRAGSystem:
                 # Allow environment variable override
                 env_force = os.getenv("RAG_FORCE_REBUILD", "").lower()
                 force_rebuild = env_force in ("1", "true", "yes")
+            # Re-embed even when the schema fingerprint is unchanged
+            force_reembed = os.getenv("RAG_FORCE_REEMBED", "").lower() in ("1", "true", "yes")
+            if force_rebuild:
+                # Reflect the (possibly changed) schema and sample rows again
+                self.sql_agent = None
+                self._prep_cache = None
 
-            print("🚀 Initializing Multi-LLM Database RAG System...")
+            logger.info("Initializing Multi-LLM Database RAG System")
             
-            # Select active providers
-            llm_provider = self.provider_manager.select_active_llm_provider()
-            embedding_provider = self.provider_manager.select_active_embedding_provider()
+            # Select active providers; each may probe its endpoint, so the
+            # two independent health checks run side by side
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                llm_future = executor.submit(self.provider_manager.select_active_llm_provider)
+                embedding_future = executor.submit(
+                    self.provider_manager.select_active_embedding_provider
+                )
+                llm_provider = llm_future.result()
+                embedding_provider = embedding_future.result()
             
             if not llm_provider:
-                print("❌ No LLM provider available. Please configure at least one provider.")
+                logger.error("No LLM provider available. Please configure at least one provider.")
                 return False
             
             if not embedding_provider:
-                print("❌ No embedding provider available. Please configure at least one provider.")
+                logger.error("No embedding provider available. Please configure at least one provider.")
                 return False
 
             # Initialize SQL Agent with active LLM provider
-            langchain_llm = self.provider_manager.get_langchain_llm()
-            self.sql_agent = SQLAgent.from_langchain_llm(langchain_llm, self.scanner)
+            self.sql_agent = self._sql_agent_for(self.provider_manager.get_langchain_llm())
 
             # Get embeddings for vector store
             langchain_embeddings = self.provider_manager.get_langchain_embeddings()
             
             # Scan database
-            print("📊 Scanning database schema and data...")
+            logger.info("Scanning database schema and data")
             schema_info = self.scanner.scan_database()
             
             # Initialize vector store
-            print("🔍 Setting up vector store...")
+            logger.info("Setting up vector store")
             vector_store_path = self.rag_config.vector_store_path
             vector_store_loaded = False
             
             # Try to load existing vector store if not forcing rebuild
             if not force_rebuild and os.path.exists(vector_store_path):
                 try:
-                    print("📂 Loading existing vector store...")
+                    logger.info("Loading existing vector store from %s", vector_store_path)
                     self.vector_store_manager.load_vector_store(vector_store_path, langchain_embeddings)
                     vector_store_loaded = True
-                    print("✅ Vector store loaded successfully!")
                 except Exception as e:
-                    print(f"⚠️ Failed to load existing vector store: {e}")
-                    print("🔄 Will rebuild vector store...")
+                    logger.warning("Failed to load existing vector store, rebuilding: %s", e)
             
             # Build vector store if not loaded
             if not vector_store_loaded:
-                print("🔄 Building vector store from database schema...")
-                texts, metadatas = self._prepare_vectorization_data(schema_info)
-                
-                # Convert texts and metadatas to Document objects
-                from langchain.schema import Document
-                documents = [
-                    Document(page_content=text, metadata=metadata)
-                    for text, metadata in zip(texts, metadatas)
-                ]
+                # Texts are small; the vectors are still built chunk by chunk
+                documents = self._vectorization_documents(schema_info)
+                fingerprint = self._documents_fingerprint(documents)
                 
-                # Use the active embedding provider
-                self.vector_store_manager._vector_store = self.vector_store_manager.build_vector_store(
-                    documents, langchain_embeddings
-                )
-                print("✅ Vector store built and saved successfully!")
+                # A forced rebuild of an unchanged schema reuses the stored index
+                if (
+                    force_rebuild and not force_reembed
+                    and vector_store_path and os.path.exists(vector_store_path)
+                    and self.vector_store_manager.stored_fingerprint(vector_store_path) == fingerprint
+                ):
+                    try:
+                        self.vector_store_manager.load_vector_store(vector_store_path, langchain_embeddings)
+                        vector_store_loaded = True
+                        logger.info("Schema unchanged, reusing existing vector store")
+                    except Exception as e:
+                        logger.warning("Failed to load existing vector store: %s", e)
+            
+            if not vector_store_loaded:
+                logger.info("Building vector store from %d schema documents", len(documents))
+                self._build_vector_store(documents, langchain_embeddings, fingerprint)
             else:
-                print("✅ Loaded existing vector store")
                 # Update the embeddings in the loaded vector store
                 self.vector_store_manager._vector_store._embedding = langchain_embeddings
+            self._embedding_signature = self._active_embedding_signature()
 
             # Initialize query processor
             self.query_processor = RAGQueryProcessor(
@@ -132,76 +174,240 @@ class MultiLLMDatabaseRAGSystem:
                 self.rag_config
             )
 
-            print("✅ Multi-LLM Database RAG System initialized successfully!")
-            self._print_system_status()
+            logger.info("Multi-LLM Database RAG System initialized")
+            self._print_system_status(refresh=True)
             return True
 
         except Exception as e:
-            print(f"❌ Error during initialization: {str(e)}")
-            print(f"Stack trace: {traceback.format_exc()}")
+            logger.error("Error during initialization: %s", e)
+            # The traceback is only formatted when DEBUG is enabled
+            logger.debug("Initialization stack trace", exc_info=True)
             return False
 
-    def _prepare_vectorization_data(self, schema_info):
-        """Prepare data for vectorization"""
-        texts = []
-        metadatas = []
+    def _sql_agent_for(self, langchain_llm) -> SQLAgent:
+        """Return the SQL agent for langchain_llm, reusing what is already built
+        
+        Providers build their LangChain wrapper once, so an unchanged active
+        provider keeps the current agent; a new one shares its SQLDatabase,
+        which reflects the whole schema when created.
+        """
+        if self.sql_agent is not None:
+            if self.sql_agent.llm is langchain_llm:
+                return self.sql_agent
+            return SQLAgent.from_langchain_llm(
+                langchain_llm, self.scanner, db=self.sql_agent.db
+            )
+        return SQLAgent.from_langchain_llm(langchain_llm, self.scanner)
+
+    def _active_embedding_signature(self) -> Tuple[str, str]:
+        """(provider, model) of the active embedding provider"""
+        config = self.provider_manager.get_active_embedding_provider().config
+        return config.provider.value, config.model_name
+
+    def _documents_fingerprint(self, documents: Iterable[Tuple[str, Dict[str, Any]]]) -> str:
+        """sha256 of the embedding model and document texts"""
+        digest = hashlib.sha256("\0".join(self._active_embedding_signature()).encode("utf-8"))
+        for text, _ in documents:
+            digest.update(b"\n---\n")
+            digest.update(text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _build_vector_store(
+        self,
+        documents: Iterable[Tuple[str, Dict[str, Any]]],
+        langchain_embeddings,
+        fingerprint: Optional[str] = None
+    ) -> None:
+        """Embed and index (text, metadata) pairs chunk by chunk, saving once
+        
+        Documents are consumed lazily, so only one chunk of vectors is
+        alive at a time. The fingerprint is saved with the index.
+        """
+        chunks = self._document_chunks(documents)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # One event loop for the whole build: the async clients stay
+            # bound to the loop they were first used on
+            indexed = asyncio.run(self._aindex_chunks(chunks, langchain_embeddings))
+        else:
+            # Called from inside an event loop (e.g. an ASGI lifespan), where
+            # asyncio.run is not allowed: use the provider's thread fan-out
+            indexed = 0
+            for indexed, (texts, metadatas) in enumerate(chunks, 1):
+                vectors = self.provider_manager.embed_documents(
+                    texts, max_in_flight=self.rag_config.max_in_flight
+                )
+                self._index_chunk(indexed, texts, vectors, metadatas, langchain_embeddings)
+        
+        if not indexed:
+            raise ValueError("Document list is empty")
+        self.vector_store_manager.quantize_index()
+        if self.rag_config.vector_store_path:
+            self.vector_store_manager.save_vector_store(
+                self.rag_config.vector_store_path, fingerprint
+            )
+
+    async def _aindex_chunks(self, chunks, langchain_embeddings) -> int:
+        """Embed each chunk with concurrent batches and index it"""
+        indexed = 0
+        for indexed, (texts, metadatas) in enumerate(chunks, 1):
+            vectors = await self._embed_all_async(texts)
+            self._index_chunk(indexed, texts, vectors, metadatas, langchain_embeddings)
+        return indexed
+
+    async def _embed_all_async(self, texts: List[str]):
+        """Await the embedding batches concurrently"""
+        return await self.provider_manager.aembed_documents(
+            texts, max_in_flight=self.rag_config.max_in_flight
+        )
+
+    def _index_chunk(self, number, texts, vectors, metadatas, langchain_embeddings) -> None:
+        """Create the vector store from the first chunk, then append"""
+        if number == 1:
+            self.vector_store_manager.build_from_embeddings(
+                texts, vectors, metadatas, langchain_embeddings, save=False
+            )
+        else:
+            self.vector_store_manager.add_embeddings(texts, vectors, metadatas)
+
+    def _document_chunks(
+        self, documents: Iterable[Tuple[str, Dict[str, Any]]]
+    ) -> Iterator[Tuple[List[str], List[Dict[str, Any]]]]:
+        """Group (text, metadata) pairs into VECTORIZE_CHUNK_SIZE lists"""
+        documents = iter(documents)
+        while chunk := list(islice(documents, self.VECTORIZE_CHUNK_SIZE)):
+            texts, metadatas = zip(*chunk)
+            yield list(texts), list(metadatas)
+
+    def _vectorization_documents(self, schema_info) -> List[Tuple[str, Dict[str, Any]]]:
+        """Vectorization documents, reused while the schema signature is unchanged
+        
+        Avoids re-querying sample rows when initialize() runs again in the
+        same process; a forced rebuild clears the cache.
+        """
+        signature = tuple(
+            (
+                table.name,
+                tuple((c.name, c.data_type, c.is_nullable) for c in table.columns),
+                tuple(table.primary_keys),
+                tuple(
+                    (fk.column, fk.references_table, fk.references_column)
+                    for fk in table.foreign_keys
+                )
+            )
+            for table in schema_info.tables
+        )
+        if self._prep_cache is None or self._prep_cache[0] != signature:
+            self._prep_cache = (
+                signature, list(self._prepare_vectorization_data(schema_info))
+            )
+        return self._prep_cache[1]
+
+    def _prepare_vectorization_data(
+        self, schema_info
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (text, metadata) for vectorization, one table at a time"""
+        samples = self._fetch_samples([table.name for table in schema_info.tables])
 
         # schema_info is now a DatabaseSchema object
         for table in schema_info.tables:
-            # Table schema text
-            schema_text = f"Table: {table.name}\n"
-            schema_text += f"Description: Database table {table.name}\n"
-            schema_text += "Columns:\n"
+            # Table schema text, assembled once instead of by repeated +=
+            parts = [
+                f"Table: {table.name}\n",
+                f"Description: Database table {table.name}\n",
+                "Columns:\n"
+            ]
             
             for col in table.columns:
-                schema_text += f"- {col.name} ({col.data_type})"
+                parts.append(f"- {col.name} ({col.data_type})")
                 if col.is_nullable:
-                    schema_text += " [nullable]"
+                    parts.append(" [nullable]")
                 if col.name in table.primary_keys:
-                    schema_text += " [primary key]"
-                schema_text += "\n"
+                    parts.append(" [primary key]")
+                parts.append("\n")
             
             # Add foreign keys if any
             if table.foreign_keys:
-                schema_text += "Foreign Keys:\n"
+                parts.append("Foreign Keys:\n")
                 for fk in table.foreign_keys:
-                    schema_text += f"- {fk.column} references {fk.references_table}.{fk.references_column}\n"
+                    parts.append(
+                        f"- {fk.column} references {fk.references_table}.{fk.references_column}\n"
+                    )
             
-            # Try to get sample data
-            try:
-                sample_data = self.scanner.query_table_sample(table.name, limit=5)
-                if sample_data:
-                    schema_text += f"\nSample data (first few rows):\n"
-                    # Add header
-                    headers = list(sample_data[0].keys()) if sample_data else []
-                    if headers:
-                        schema_text += " | ".join(str(h) for h in headers) + "\n"
-                        schema_text += "-" * len(" | ".join(str(h) for h in headers)) + "\n"
-                        
-                        # Add sample rows
-                        for row in sample_data[:3]:  # Limit to first 3 rows
-                            values = [str(row.get(h, '')) for h in headers]
-                            schema_text += " | ".join(values) + "\n"
-            except Exception as e:
-                # If sample data fails, continue without it
-                print(f"⚠️ Could not get sample data for {table.name}: {e}")
+            # Add sample data fetched up front
+            sample_data = samples.get(table.name)
+            if sample_data:
+                parts.append("\nSample data (first few rows):\n")
+                # Add header
+                headers = list(sample_data[0].keys())
+                if headers:
+                    # Join the header once and reuse its width for the separator
+                    header_line = " | ".join([str(h) for h in headers])
+                    parts.append(header_line + "\n")
+                    parts.append("-" * len(header_line) + "\n")
+                    
+                    # Add sample rows
+                    for row in sample_data[:3]:  # Limit to first 3 rows
+                        values = [str(row.get(h, '')) for h in headers]
+                        parts.append(" | ".join(values) + "\n")
             
-            texts.append(schema_text)
-            metadatas.append({
+            yield "".join(parts), {
                 'table_name': table.name,
                 'type': 'table_schema',
                 'row_count': 0  # Could get actual row count if needed
-            })
+            }
+
+    def _fetch_samples(
+        self, table_names: List[str], limit: int = 5
+    ) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """Fetch sample rows for all tables concurrently (None on failure)"""
+        def safe_sample(table_name: str) -> Optional[List[Dict[str, Any]]]:
+            try:
+                return self.scanner.query_table_rows(table_name, limit=limit)
+            except Exception as e:
+                # If sample data fails, continue without it
+                logger.warning("Could not get sample data for %s: %s", table_name, e)
+                return None
+        
+        if not table_names:
+            return {}
+        if not self.scanner.supports_concurrent_queries():
+            # Worker threads would each get their own, empty, database
+            return {table_name: safe_sample(table_name) for table_name in table_names}
+        # Independent round-trips; drivers release the GIL while waiting
+        workers = min(self.rag_config.scan_parallelism, len(table_names))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(table_names, executor.map(safe_sample, table_names)))
 
-        return texts, metadatas
+    def _status_snapshot(self, refresh: bool = False) -> Tuple[Dict[str, Any], Any]:
+        """Provider status and table count, reused for STATUS_TTL seconds"""
+        now = time.monotonic()
+        if (
+            not refresh and self._status_cache
+            and now - self._status_cache[0] < self.STATUS_TTL
+        ):
+            return self._status_cache[1:]
+        
+        status = self.provider_manager.list_available_providers()
+        table_count = (
+            len(self.scanner.get_table_names())
+            if hasattr(self.scanner, 'get_table_names') else 'N/A'
+        )
+        self._status_cache = (now, status, table_count)
+        return status, table_count
 
-    def _print_system_status(self):
-        """Print current system status"""
+    def _print_system_status(self, refresh: bool = False):
+        """Print current system status
+        
+        Provider probes and the table listing are reused for STATUS_TTL
+        seconds unless refresh is set.
+        """
         print("\n" + "="*60)
         print("🎯 MULTI-LLM RAG SYSTEM STATUS")
         print("="*60)
         
-        status = self.provider_manager.list_available_providers()
+        status, table_count = self._status_snapshot(refresh)
         
         print("\n🤖 LLM PROVIDERS:")
         for provider, info in status["llm_providers"].items():
@@ -222,7 +428,7 @@ class MultiLLMDatabaseRAGSystem:
                 print(f"      Dimension: {info['embedding_dimension']}")
         
         print("\n📊 DATABASE:")
-        print(f"  📋 Tables scanned: {len(self.scanner.get_table_names()) if hasattr(self.scanner, 'get_table_names') else 'N/A'}")
+        print(f"  📋 Tables scanned: {table_count}")
         print(f"  🔍 Vector store: {'Ready' if self.vector_store_manager._vector_store else 'Not loaded'}")
         
         print("="*60 + "\n")
@@ -247,26 +453,17 @@ class MultiLLMDatabaseRAGSystem:
 
     def switch_llm_provider(self, provider_name: str) -> bool:
         """Switch to a different LLM provider"""
-        from llm_providers import LLMProvider
-        
-        # Convert string to enum
-        provider_map = {
-            "openai": LLMProvider.OPENAI,
-            "ollama": LLMProvider.OLLAMA,
-            "custom": LLMProvider.CUSTOM
-        }
-        
-        provider_type = provider_map.get(provider_name.lower())
+        provider_type = _PROVIDER_TYPES.get(provider_name.lower())
         if not provider_type:
             print(f"❌ Unknown provider: {provider_name}")
             return False
         
         success = self.provider_manager.switch_llm_provider(provider_type)
         if success:
+            self._status_cache = None
             # Reinitialize SQL agent with new provider
             try:
-                langchain_llm = self.provider_manager.get_langchain_llm()
-                self.sql_agent = SQLAgent.from_langchain_llm(langchain_llm, self.scanner)
+                self.sql_agent = self._sql_agent_for(self.provider_manager.get_langchain_llm())
                 print(f"✅ Switched to {provider_name} and updated SQL agent")
             except Exception as e:
                 print(f"⚠️ Switched provider but failed to update SQL agent: {e}")
@@ -276,26 +473,31 @@ class MultiLLMDatabaseRAGSystem:
     
     def switch_embedding_provider(self, provider_name: str) -> bool:
         """Switch to a different embedding provider"""
-        from llm_providers import LLMProvider
-        
-        provider_map = {
-            "openai": LLMProvider.OPENAI,
-            "ollama": LLMProvider.OLLAMA,
-            "custom": LLMProvider.CUSTOM
-        }
-        
-        provider_type = provider_map.get(provider_name.lower())
+        provider_type = _PROVIDER_TYPES.get(provider_name.lower())
         if not provider_type:
             print(f"❌ Unknown provider: {provider_name}")
             return False
         
         success = self.provider_manager.switch_embedding_provider(provider_type)
         if success:
+            self._status_cache = None
             # Update vector store with new embeddings
             try:
                 langchain_embeddings = self.provider_manager.get_langchain_embeddings()
+                signature = self._active_embedding_signature()
                 if self.vector_store_manager._vector_store:
-                    self.vector_store_manager._vector_store._embedding = langchain_embeddings
+                    if signature == self._embedding_signature:
+                        # Same embedding space: only the query client changes
+                        self.vector_store_manager._vector_store._embedding = langchain_embeddings
+                    else:
+                        # Stored vectors are meaningless to the new model
+                        print("🔄 Re-embedding vector store with the new model...")
+                        documents = list(self.vector_store_manager.iter_documents())
+                        self._build_vector_store(
+                            documents, langchain_embeddings,
+                            self._documents_fingerprint(documents)
+                        )
+                self._embedding_signature = signature
                 print(f"✅ Switched to {provider_name} and updated vector store")
             except Exception as e:
                 print(f"⚠️ Switched provider but failed to update vector store: {e}")
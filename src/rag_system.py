@@ -3,12 +3,36 @@ Main RAG system for relational databases
 """
 import os
 import traceback
+from functools import lru_cache
+from typing import List, Tuple
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 
 from config import DatabaseConfig, OpenAIConfig, RAGConfig
 from database_scanner import DatabaseScanner
 from vector_store_manager import VectorStoreManager
 from sql_agent import SQLAgent, RAGQueryProcessor
+from llm_providers.cache import SemanticCache
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper memoizing embed_query for repeated questions"""
+
+    def __init__(self, inner: Embeddings, maxsize: int = 2048):
+        self._inner = inner
+        # Exposed for cache keys that depend on the embedding model
+        self.model = getattr(inner, "model", type(inner).__name__)
+        self._cached_query = lru_cache(maxsize=maxsize)(self._embed_query)
+
+    def _embed_query(self, text: str) -> Tuple[float, ...]:
+        return tuple(self._inner.embed_query(text))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        # A fresh list each call so callers cannot mutate the cached vector
+        return list(self._cached_query(text))
 
 
 class DatabaseRAGSystem:
@@ -29,11 +53,11 @@ class DatabaseRAGSystem:
         self.vector_store_manager = VectorStoreManager(rag_config)
         self.sql_agent = SQLAgent(openai_config, self.scanner)
 
-        # Embeddings
-        self.embeddings = OpenAIEmbeddings(
+        # Embeddings; repeated questions are embedded only once
+        self.embeddings = CachedEmbeddings(OpenAIEmbeddings(
             api_key=openai_config.api_key,
             model=openai_config.embedding_model,
-        )
+        ))
 
         self.query_processor = None
 
@@ -92,8 +116,17 @@ class DatabaseRAGSystem:
                 self._build_vector_store()
 
             # Initialize query processor
+            answer_cache = (
+                SemanticCache(
+                    self.rag_config.query_cache_threshold,
+                    ttl=self.rag_config.query_cache_ttl,
+                )
+                if self.rag_config.query_cache_threshold is not None
+                else None
+            )
             self.query_processor = RAGQueryProcessor(
-                self.scanner, self.vector_store_manager, self.sql_agent
+                self.scanner, self.vector_store_manager, self.sql_agent,
+                answer_cache=answer_cache,
             )
 
             print("RAG system initialized successfully!")
@@ -9,6 +9,7 @@ from langchain_community.agent_toolkits.sql.base import create_sql_agent
 from langchain_core.language_models.base import BaseLanguageModel
 
 from config import OpenAIConfig
+from llm_providers.cache import SemanticCache
 from database_scanner import DatabaseScanner
 from vector_store_manager import VectorStoreManager
 
@@ -33,15 +34,23 @@ class SQLAgent:
         )
     
     @classmethod
-    def from_langchain_llm(cls, llm: BaseLanguageModel, scanner: DatabaseScanner):
-        """Create SQL Agent from any LangChain-compatible LLM"""
+    def from_langchain_llm(
+        cls,
+        llm: BaseLanguageModel,
+        scanner: DatabaseScanner,
+        db: Optional[SQLDatabase] = None
+    ):
+        """Create SQL Agent from any LangChain-compatible LLM
+        
+        Pass the db of an existing agent to skip reflecting the schema again.
+        """
         # Create a new instance without going through __init__
         instance = cls.__new__(cls)
         
         # Set attributes directly
         instance.config = None  # No specific config for multi-LLM
         instance.scanner = scanner
-        instance.db = SQLDatabase(scanner.engine)
+        instance.db = db if db is not None else SQLDatabase(scanner.engine)
         instance.llm = llm
         instance.toolkit = SQLDatabaseToolkit(db=instance.db, llm=llm)
         instance.agent = create_sql_agent(
@@ -123,16 +132,33 @@ class RAGQueryProcessor:
         scanner: DatabaseScanner,
         vector_store_manager: VectorStoreManager,
         sql_agent: SQLAgent,
+        answer_cache: Optional[SemanticCache] = None,
     ):
         self.scanner = scanner
         self.vector_store_manager = vector_store_manager
         self.sql_agent = sql_agent
+        # Answers to recent questions, reused for paraphrases
+        self.answer_cache = answer_cache
 
     def process_question(self, question: str) -> dict:
-        """Process a question and return full answer + context"""
+        """Process a question and return full answer + context
+        
+        With an answer cache, the question is embedded once for both the
+        cache lookup and the retrieval, and a similar enough recent
+        question skips retrieval and the SQL agent entirely.
+        """
         try:
-            # Recuperar documentos relevantes uma única vez
-            relevant_docs = self.vector_store_manager.search_similar(question)
+            if self.answer_cache is None:
+                # Recuperar documentos relevantes uma única vez
+                relevant_docs = self.vector_store_manager.search_similar(question)
+            else:
+                embedding = self.vector_store_manager.embed_query(question)
+                cached = self.answer_cache.get("answer", embedding)
+                if cached is not None:
+                    return {"question": question, **cached}
+                relevant_docs = self.vector_store_manager.search_similar_by_vector(
+                    embedding
+                )
             
             # Passar os documentos já recuperados para evitar duplicação
             sql_response = self.sql_agent.query_with_rag(
@@ -140,7 +166,7 @@ class RAGQueryProcessor:
                 pre_retrieved_docs=relevant_docs
             )
             
-            return {
+            result = {
                 "question": question,
                 "sql_response": sql_response,
                 "relevant_context": [
@@ -152,6 +178,13 @@ class RAGQueryProcessor:
                 ],
                 "status": "success",
             }
+            if self.answer_cache is not None and not sql_response.startswith(
+                "Error processing query"
+            ):
+                self.answer_cache.put("answer", embedding, {
+                    key: value for key, value in result.items() if key != "question"
+                })
+            return result
         except Exception as e:  # noqa: BLE001
             return {"question": question, "error": str(e), "status": "error"}
 
@@ -170,7 +203,7 @@ class RAGQueryProcessor:
             return {
                 "table_name": table_name,
                 "data": df.to_dict("records"),
-                "columns": list(df.columns),
+                "columns": df.columns.tolist(),
                 "row_count": len(df),
                 "status": "success",
             }
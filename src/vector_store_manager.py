@@ -1,14 +1,22 @@
 """
 Vector store manager for the RAG system
 """
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.faiss import dependable_faiss_import
 from langchain_core.documents import Document
+import numpy as np
 import pandas as pd
 import os
+import uuid
 import hashlib
 import json
 import logging
+from llm_providers import (
+    EmbeddingDiskCache, dequantize_embedding, quantize_embedding
+)
 from models import DatabaseSchema, TableInfo
 from database_scanner import DatabaseScanner
 from config import RAGConfig
@@ -22,9 +30,20 @@ class SecurityError(Exception):
 class VectorStoreManager:
     """Manages FAISS vector store operations"""
 
+    # Texts per embed_documents call, and calls in flight, when building
+    # from documents
+    EMBED_BATCH_SIZE = 512
+    EMBED_WORKERS = 4
+    # Tables sampled at once; keep within the scanner's connection pool
+    SAMPLE_WORKERS = 8
+    # HNSW build-time candidate list; search width is scaled from k instead
+    HNSW_EF_CONSTRUCTION = 200
+    HNSW_EF_PER_RESULT = 4
+
     def __init__(self, config: RAGConfig):
         self.config = config
         self._vector_store: Optional[FAISS] = None
+        self._embedding_cache: Optional[EmbeddingDiskCache] = None
 
     def create_documents_from_schema(
         self, schema: DatabaseSchema
@@ -55,57 +74,256 @@ class VectorStoreManager:
     def create_documents_from_data(
         self, scanner: DatabaseScanner, schema: DatabaseSchema
     ) -> List[Document]:
-        """Create documents from table data samples and stats"""
-        documents = []
-        for table in schema.tables:
-            try:
-                df = scanner.query_table_sample(
-                    table.name, limit=self.config.table_sample_limit
-                )
-                if not df.empty:
-                    stats_text = self._create_table_statistics(table.name, df)
-                    documents.append(
-                        Document(
-                            page_content=stats_text,
-                            metadata={
-                                "type": "table_statistics",
-                                "table_name": table.name,
-                                "content": "statistics",
-                            },
-                        )
-                    )
-                    sample_text = self._create_data_sample(table.name, df)
-                    documents.append(
-                        Document(
-                            page_content=sample_text,
-                            metadata={
-                                "type": "data_sample",
-                                "table_name": table.name,
-                                "content": "sample_data",
-                            },
-                        )
-                    )
-            except Exception as e:  # noqa: BLE001
-                print(
-                    "Warning: Could not process data for table "
-                    f"{table.name}: {e}"
-                )
-                continue
-        return documents
+        """Create documents from table data samples and stats
+        
+        Tables are sampled concurrently when the scanner's database allows
+        it; documents keep the schema order.
+        """
+        if not schema.tables:
+            return []
+
+        def process(table: TableInfo) -> List[Document]:
+            return self._process_table_data(scanner, table)
+
+        if scanner.supports_concurrent_queries():
+            # Independent round-trips; drivers release the GIL while waiting
+            workers = min(self.SAMPLE_WORKERS, len(schema.tables))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                per_table = list(executor.map(process, schema.tables))
+        else:
+            # Worker threads would each get their own, empty, database
+            per_table = map(process, schema.tables)
+        return [document for documents in per_table for document in documents]
+
+    def _process_table_data(
+        self, scanner: DatabaseScanner, table: TableInfo
+    ) -> List[Document]:
+        """Statistics and sample documents of one table (none on failure)"""
+        try:
+            df = scanner.query_table_sample(
+                table.name, limit=self.config.table_sample_limit
+            )
+            if df.empty:
+                return []
+            return [
+                Document(
+                    page_content=self._create_table_statistics(table.name, df),
+                    metadata={
+                        "type": "table_statistics",
+                        "table_name": table.name,
+                        "content": "statistics",
+                    },
+                ),
+                Document(
+                    page_content=self._create_data_sample(table.name, df),
+                    metadata={
+                        "type": "data_sample",
+                        "table_name": table.name,
+                        "content": "sample_data",
+                    },
+                ),
+            ]
+        except Exception as e:  # noqa: BLE001
+            print(
+                "Warning: Could not process data for table "
+                f"{table.name}: {e}"
+            )
+            return []
 
     def build_vector_store(
         self, documents: List[Document], embeddings
     ) -> FAISS:
-        """Build the vector store from a list of documents"""
+        """Build the vector store from a list of documents
+        
+        Texts are embedded in explicit batches sent concurrently, instead
+        of the sequential sub-batches of FAISS.from_documents.
+        """
         if not documents:
             raise ValueError("Document list is empty")
-        self._vector_store = FAISS.from_documents(documents, embeddings)
-        if self.config.vector_store_path:
+        texts = [document.page_content for document in documents]
+        metadatas = [document.metadata for document in documents]
+        return self.build_from_embeddings(
+            texts, self._embed_in_batches(texts, embeddings), metadatas, embeddings
+        )
+
+    def _embed_in_batches(self, texts: List[str], embeddings) -> np.ndarray:
+        """Embed texts in EMBED_BATCH_SIZE slices, EMBED_WORKERS at a time
+        
+        With an embedding cache configured, only texts not embedded by the
+        same model in an earlier build are sent.
+        """
+        cache = self._get_embedding_cache()
+        if cache is None:
+            return self._embed_uncached(texts, embeddings)
+        
+        model = getattr(embeddings, "model", type(embeddings).__name__)
+        keys = [
+            hashlib.sha256(f"{model}\0{text}".encode("utf-8")).digest()
+            for text in texts
+        ]
+        found = {
+            key: dequantize_embedding(*entry)
+            for key, entry in cache.get_many(list(dict.fromkeys(keys))).items()
+        }
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            fresh = dict(zip(
+                missing, self._embed_uncached(list(missing.values()), embeddings)
+            ))
+            cache.put_many({
+                key: quantize_embedding(vector) for key, vector in fresh.items()
+            })
+            found.update(fresh)
+        return np.stack([found[key] for key in keys])
+
+    def _get_embedding_cache(self) -> Optional[EmbeddingDiskCache]:
+        """Open the configured embedding cache on first use"""
+        path = getattr(self.config, "embedding_cache_path", None)
+        if path and self._embedding_cache is None:
+            self._embedding_cache = EmbeddingDiskCache(path)
+        return self._embedding_cache
+
+    def _embed_uncached(self, texts: List[str], embeddings) -> np.ndarray:
+        batches = [
+            texts[start:start + self.EMBED_BATCH_SIZE]
+            for start in range(0, len(texts), self.EMBED_BATCH_SIZE)
+        ]
+        if len(batches) == 1:
+            results = [embeddings.embed_documents(batches[0])]
+        else:
+            workers = min(self.EMBED_WORKERS, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(embeddings.embed_documents, batches))
+        return np.concatenate([np.asarray(batch, dtype=np.float32) for batch in results])
+
+    def build_from_embeddings(
+        self,
+        texts: Sequence[str],
+        vectors: np.ndarray,
+        metadatas: Optional[Sequence[Dict[str, Any]]],
+        embeddings,
+        save: bool = True
+    ) -> FAISS:
+        """Build the vector store from texts and their precomputed vectors
+        
+        vectors is a (len(texts), dim) matrix added to a new index in one
+        call: HNSW when config.hnsw_m is set, flat otherwise. The
+        embeddings object is only kept for embedding later queries. Pass
+        save=False when more chunks will follow via add_embeddings.
+        """
+        if not texts:
+            raise ValueError("Document list is empty")
+        vectors = self._as_matrix(texts, vectors)
+        self._vector_store = FAISS(
+            embeddings, self._new_index(vectors.shape[1]), InMemoryDocstore(), {}
+        )
+        self._add_vectors(texts, vectors, metadatas)
+        if save and self.config.vector_store_path:
             self.save_vector_store(self.config.vector_store_path)
         return self._vector_store
 
+    def add_embeddings(
+        self,
+        texts: Sequence[str],
+        vectors: np.ndarray,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> FAISS:
+        """Append texts and their precomputed vectors to the vector store"""
+        if not self._vector_store:
+            raise ValueError("Vector store not created yet")
+        self._add_vectors(texts, self._as_matrix(texts, vectors), metadatas)
+        return self._vector_store
+
+    def _new_index(self, dimension: int):
+        """Empty L2 index for a new store"""
+        faiss = dependable_faiss_import()
+        hnsw_m = getattr(self.config, "hnsw_m", 0)
+        if not hnsw_m:
+            return faiss.IndexFlatL2(dimension)
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m)
+        index.hnsw.efConstruction = self.HNSW_EF_CONSTRUCTION
+        return index
+
+    def _widen_search(self, k: int) -> None:
+        """Make HNSW explore enough candidates for k results
+        
+        efSearch only ever grows, so concurrent searches with different k
+        never narrow each other.
+        """
+        hnsw = getattr(self._vector_store.index, "hnsw", None)
+        if hnsw is not None:
+            hnsw.efSearch = max(hnsw.efSearch, k * self.HNSW_EF_PER_RESULT)
+
+    @staticmethod
+    def _as_matrix(texts: Sequence[str], vectors: np.ndarray) -> np.ndarray:
+        """Contiguous float32 view of vectors (copied only if needed)"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(texts):
+            raise ValueError(
+                f"Expected {len(texts)} embedding rows, got shape {vectors.shape}"
+            )
+        return vectors
+
+    def _add_vectors(
+        self,
+        texts: Sequence[str],
+        vectors: np.ndarray,
+        metadatas: Optional[Sequence[Dict[str, Any]]]
+    ) -> None:
+        """Add the whole matrix to the index, then register the documents
+        
+        Same bookkeeping as FAISS.add_embeddings, which would first split
+        the matrix into (text, row) pairs and stack the rows again.
+        """
+        store = self._vector_store
+        ids = [str(uuid.uuid4()) for _ in texts]
+        store.index.add(vectors)
+        store.docstore.add({
+            doc_id: Document(id=doc_id, page_content=text, metadata=metadata)
+            for doc_id, text, metadata in zip(ids, texts, metadatas or ({} for _ in texts))
+        })
+        store.index_to_docstore_id.update(
+            enumerate(ids, len(store.index_to_docstore_id))
+        )
+
+    def quantize_index(self) -> None:
+        """Replace the flat float32 index with an 8-bit scalar-quantized copy
+        
+        Each vector takes a quarter of the memory and disk space; for
+        schema-sized stores the top-k results are practically unchanged.
+        Call it once all vectors have been added, since the quantizer is
+        trained on them.
+        """
+        if not self._vector_store:
+            raise ValueError("Vector store not created yet")
+        faiss = dependable_faiss_import()
+        index = self._vector_store.index
+        if not isinstance(index, faiss.IndexFlat) or not index.ntotal:
+            return
+        
+        vectors = index.reconstruct_n(0, index.ntotal)
+        quantized = faiss.IndexScalarQuantizer(
+            index.d, faiss.ScalarQuantizer.QT_8bit, index.metric_type
+        )
+        quantized.train(vectors)
+        quantized.add(vectors)
+        self._vector_store.index = quantized
+
+    def iter_documents(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield (text, metadata) of the indexed documents in index order"""
+        store = self._vector_store
+        if not store:
+            raise ValueError("Vector store not created yet")
+        for position in range(store.index.ntotal):
+            document = store.docstore.search(store.index_to_docstore_id[position])
+            yield document.page_content, document.metadata
+
     def load_vector_store(self, path: str, embeddings) -> FAISS:
-        """Load previously saved vector store with security validation"""
+        """Load previously saved vector store with security validation
+        
+        With config.mmap_faiss the index file is memory-mapped, so pages
+        are read on demand rather than all at startup.
+        """
         if not os.path.exists(path):
             raise FileNotFoundError(f"Vector store not found at: {path}")
         
@@ -144,10 +362,15 @@ class VectorStoreManager:
                         f"Maximum allowed: {max_file_size} bytes."
                     )
         
+        io_flags = (
+            dependable_faiss_import().IO_FLAG_MMAP
+            if getattr(self.config, "mmap_faiss", False) else 0
+        )
         try:
             # Tentar carregar sem allow_dangerous_deserialization primeiro
             self._vector_store = FAISS.load_local(
-                path, embeddings, allow_dangerous_deserialization=False
+                path, embeddings, allow_dangerous_deserialization=False,
+                io_flags=io_flags
             )
         except Exception as e:
             # Se falhar, verificar se é um arquivo confiável
@@ -157,7 +380,8 @@ class VectorStoreManager:
                     "from trusted source. Consider regenerating the store."
                 )
                 self._vector_store = FAISS.load_local(
-                    path, embeddings, allow_dangerous_deserialization=True
+                    path, embeddings, allow_dangerous_deserialization=True,
+                    io_flags=io_flags
                 )
             else:
                 raise SecurityError(
@@ -209,19 +433,26 @@ class VectorStoreManager:
     
     def _calculate_file_checksum(self, file_path: str) -> str:
         """Calcular checksum SHA-256 de um arquivo"""
-        hash_sha256 = hashlib.sha256()
         with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+            if hasattr(hashlib, "file_digest"):
+                # Python 3.11+: blocos grandes, hash sem o GIL
+                return hashlib.file_digest(f, "sha256").hexdigest()
+            hash_sha256 = hashlib.sha256()
+            buffer = bytearray(1 << 20)
+            view = memoryview(buffer)
+            while size := f.readinto(buffer):
+                hash_sha256.update(view[:size])
+            return hash_sha256.hexdigest()
 
-    def save_vector_store(self, path: str):
+    def save_vector_store(self, path: str, fingerprint: Optional[str] = None):
         """Persist vector store to disk with security metadata
         
         Args:
             path: Directory path where the vector store will be saved.
                   FAISS will create this directory automatically if it doesn't exist,
                   including any parent directories.
+            fingerprint: Optional hash of the indexed content, stored in the
+                  metadata so unchanged rebuilds can be skipped.
         
         Note:
             Previously this method called os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -248,11 +479,21 @@ class VectorStoreManager:
                 'created_at': pd.Timestamp.now().isoformat(),
                 'description': 'FAISS vector store for database RAG system'
             }
+            if fingerprint:
+                metadata['fingerprint'] = fingerprint
             
             metadata_file = os.path.join(path, 'metadata.json')
             with open(metadata_file, 'w', encoding='utf-8') as f:
                 json.dump(metadata, f, indent=2, ensure_ascii=False)
 
+    def stored_fingerprint(self, path: str) -> Optional[str]:
+        """Fingerprint saved with the vector store at path, if any"""
+        try:
+            with open(os.path.join(path, 'metadata.json'), 'r', encoding='utf-8') as f:
+                return json.load(f).get('fingerprint')
+        except (OSError, ValueError, AttributeError):
+            return None
+
     def search_similar(
         self, query: str, k: Optional[int] = None
     ) -> List[Document]:
@@ -260,8 +501,25 @@ class VectorStoreManager:
         if not self._vector_store:
             raise ValueError("Vector store not initialized")
         k = k or self.config.similarity_search_k
+        self._widen_search(k)
         return self._vector_store.similarity_search(query, k=k)
 
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query with the vector store's embeddings"""
+        if not self._vector_store:
+            raise ValueError("Vector store not initialized")
+        return self._vector_store._embed_query(query)
+
+    def search_similar_by_vector(
+        self, embedding: List[float], k: Optional[int] = None
+    ) -> List[Document]:
+        """Search similar documents for an already embedded query"""
+        if not self._vector_store:
+            raise ValueError("Vector store not initialized")
+        k = k or self.config.similarity_search_k
+        self._widen_search(k)
+        return self._vector_store.similarity_search_by_vector(embedding, k=k)
+
     def _create_table_description(self, table: TableInfo) -> str:
         """Create detailed description for a table"""
         lines = [f"Table: {table.name}"]
@@ -288,37 +546,46 @@ class VectorStoreManager:
     def _create_table_statistics(
         self, table_name: str, df: pd.DataFrame
     ) -> str:
-        """Create statistics summary for table"""
+        """Create statistics summary for table
+        
+        Each statistic is computed for all matching columns in one call;
+        min/max and mean are separate so integer min/max keep their type.
+        """
+        dtypes = df.dtypes
+        numeric = [col for col, dtype in dtypes.items() if dtype in ["int64", "float64"]]
+        textual = [col for col, dtype in dtypes.items() if dtype == "object"]
+        nulls = df.isnull().sum().to_dict()
+        bounds = df[numeric].agg(["min", "max"]).to_dict() if numeric else {}
+        means = df[numeric].mean().to_dict()
+        unique_counts = df[textual].nunique().to_dict()
+
         lines = [f"Table Statistics: {table_name}"]
         lines.append(f"Total rows sampled: {len(df)}")
         lines.append("")
         lines.append("Column Statistics:")
-        for col in df.columns:
-            series = df[col]
+        for col, dtype in dtypes.items():
             lines.append(f"  - {col}:")
-            lines.append(f"    * Data type: {series.dtype}")
-            lines.append(f"    * Null values: {series.isnull().sum()}")
-            if series.dtype in ["int64", "float64"]:
-                lines.append(f"    * Min: {series.min()}")
-                lines.append(f"    * Max: {series.max()}")
-                lines.append(f"    * Mean: {series.mean():.2f}")
-            elif series.dtype == "object":
-                unique_count = series.nunique()
+            lines.append(f"    * Data type: {dtype}")
+            lines.append(f"    * Null values: {nulls[col]}")
+            if col in bounds:
+                lines.append(f"    * Min: {bounds[col]['min']}")
+                lines.append(f"    * Max: {bounds[col]['max']}")
+                lines.append(f"    * Mean: {means[col]:.2f}")
+            elif col in unique_counts:
+                unique_count = unique_counts[col]
                 lines.append(f"    * Unique values: {unique_count}")
                 if unique_count <= 10:
-                    unique_values = series.unique()[:10]
+                    unique_values = df[col].unique()[:10]
                     lines.append(f"    * Sample values: {list(unique_values)}")
         return "\n".join(lines)
 
     def _create_data_sample(self, table_name: str, df: pd.DataFrame) -> str:
         """Create sample data text for table"""
-        lines = [f"Data Sample from {table_name}:"]
-        lines.append("")
-        sample_size = min(5, len(df))
-        for idx in range(sample_size):
-            row = df.iloc[idx]
-            lines.append(f"Row {idx + 1}:")
-            for col, value in row.items():
-                lines.append(f"  - {col}: {value}")
+        lines = [f"Data Sample from {table_name}:", ""]
+        # Plain dicts per row instead of one Series per iloc lookup, so
+        # values also keep their column's type
+        for idx, row in enumerate(df.head(5).to_dict("records"), 1):
+            lines.append(f"Row {idx}:")
+            lines.extend(f"  - {col}: {value}" for col, value in row.items())
             lines.append("")
         return "\n".join(lines)
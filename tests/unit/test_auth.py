@@ -0,0 +1,148 @@
+"""Unit tests for authentication helpers and rate limiting."""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+import auth
+from auth import RateLimiter, get_auth_info, auth_config, verify_api_key
+
+
+class TestRateLimiter:
+    """Test cases for RateLimiter class."""
+
+    def test_allows_requests_under_limit(self):
+        """Requests below the limit are allowed."""
+        limiter = RateLimiter(max_requests=3, window_minutes=1)
+
+        assert all(limiter.is_allowed("key") for _ in range(3))
+
+    def test_blocks_requests_over_limit(self):
+        """The request exceeding the limit is rejected."""
+        limiter = RateLimiter(max_requests=2, window_minutes=1)
+
+        assert limiter.is_allowed("key")
+        assert limiter.is_allowed("key")
+        assert not limiter.is_allowed("key")
+
+    def test_keys_are_limited_independently(self):
+        """Exhausting one key does not affect another."""
+        limiter = RateLimiter(max_requests=1, window_minutes=1)
+
+        assert limiter.is_allowed("key-a")
+        assert not limiter.is_allowed("key-a")
+        assert limiter.is_allowed("key-b")
+
+    def test_requests_expire_after_window(self, monkeypatch):
+        """Requests older than the window no longer count."""
+        limiter = RateLimiter(max_requests=1, window_minutes=1)
+        clock = [10**12]
+        monkeypatch.setattr(auth.time, "monotonic_ns", lambda: clock[0])
+
+        assert limiter.is_allowed("key")
+        assert not limiter.is_allowed("key")
+
+        clock[0] += 61 * 1_000_000_000
+        assert limiter.is_allowed("key")
+
+    def test_window_slides_per_minute_bucket(self, monkeypatch):
+        """Only buckets that left the window release capacity."""
+        limiter = RateLimiter(max_requests=2, window_minutes=2)
+        minute = 60 * 1_000_000_000
+        clock = [1000 * minute]
+        monkeypatch.setattr(auth.time, "monotonic_ns", lambda: clock[0])
+
+        assert limiter.is_allowed("key")
+        clock[0] += minute
+        assert limiter.is_allowed("key")
+        assert not limiter.is_allowed("key")
+
+        clock[0] += minute
+        assert limiter.is_allowed("key")
+        assert not limiter.is_allowed("key")
+
+    def test_concurrent_requests_respect_limit(self):
+        """Concurrent threads never allow more than max_requests."""
+        limiter = RateLimiter(max_requests=50, window_minutes=1)
+        results = []
+        results_lock = threading.Lock()
+
+        def worker():
+            allowed = [limiter.is_allowed("shared") for _ in range(20)]
+            with results_lock:
+                results.extend(allowed)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(results) == 50
+
+
+class TestAuthInfo:
+    """Test cases for get_auth_info."""
+
+    def test_reuses_instance_for_same_configuration(self):
+        """Repeated calls return the cached model instance."""
+        assert get_auth_info() is get_auth_info()
+
+    def test_reflects_require_auth(self, monkeypatch):
+        """Toggling require_auth changes the returned info."""
+        monkeypatch.setattr(auth_config, "require_auth", True)
+        info = get_auth_info()
+
+        assert info.required is True
+        assert info.development_key is None
+
+
+class TestVerifyAPIKey:
+    """Test cases for verify_api_key."""
+
+    def test_missing_credentials_rejected(self, monkeypatch):
+        """A missing bearer token yields a 401 MISSING_AUTH error."""
+        monkeypatch.setattr(auth_config, "require_auth", True)
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(verify_api_key(None))
+
+        assert exc_info.value.status_code == 401
+        assert exc_info.value.detail["error_code"] == "MISSING_AUTH"
+
+    def test_invalid_key_rejected(self, monkeypatch):
+        """An unknown bearer token yields a 401 INVALID_API_KEY error."""
+        monkeypatch.setattr(auth_config, "require_auth", True)
+        credentials = HTTPAuthorizationCredentials(
+            scheme="Bearer", credentials="not-a-valid-key"
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(verify_api_key(credentials))
+
+        assert exc_info.value.detail["error_code"] == "INVALID_API_KEY"
+
+    def test_each_rejection_raises_a_fresh_exception(self, monkeypatch):
+        """Concurrent requests never share one exception instance."""
+        monkeypatch.setattr(auth_config, "require_auth", True)
+        raised = []
+        for _ in range(2):
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(verify_api_key(None))
+            raised.append(exc_info.value)
+
+        assert raised[0] is not raised[1]
+        assert raised[0].detail == raised[1].detail
+
+    def test_valid_key_accepted(self, monkeypatch):
+        """A configured key is returned unchanged."""
+        monkeypatch.setattr(auth_config, "require_auth", True)
+        key = auth_config.get_development_key()
+        credentials = HTTPAuthorizationCredentials(
+            scheme="Bearer", credentials=key
+        )
+
+        assert asyncio.run(verify_api_key(credentials)) == key
@@ -1,9 +1,14 @@
 """Unit tests for database scanner functionality."""
 
+import time
+from datetime import datetime
+
 import pytest
 import pandas as pd
 from unittest.mock import Mock, patch
+from sqlalchemy import create_engine, text
 
+import database_scanner
 from database_scanner import DatabaseScanner
 from config import DatabaseConfig
 
@@ -83,6 +88,101 @@ class TestDatabaseScanner:
         with pytest.raises(ValueError, match="Invalid table"):
             scanner.query_table_sample("nonexistent", limit=10)
 
+    def test_query_table_rows_matches_sample(self, database_scanner_with_shared_engine):
+        """Row dictionaries carry the same data as the DataFrame sample."""
+        scanner = database_scanner_with_shared_engine
+
+        rows = scanner.query_table_rows("users", limit=2)
+
+        assert isinstance(rows, list)
+        assert rows == scanner.query_table_sample("users", limit=2).to_dict("records")
+
+    def test_query_table_rows_invalid_table(self, database_scanner_with_shared_engine):
+        """Row sampling applies the same table validation."""
+        scanner = database_scanner_with_shared_engine
+
+        with pytest.raises(ValueError, match="Invalid table"):
+            scanner.query_table_rows("nonexistent", limit=10)
+
+    def test_get_table_schema_single_table(self, database_scanner_with_shared_engine):
+        """A single table is introspected without a full database scan."""
+        scanner = database_scanner_with_shared_engine
+
+        with patch.object(scanner, "_scan_tables") as scan_tables:
+            table = scanner.get_table_schema("users")
+
+        scan_tables.assert_not_called()
+        assert table.name == "users"
+        assert table.primary_keys == ["id"]
+        assert [col.name for col in table.columns][:2] == ["id", "name"]
+
+    def test_get_table_schema_matches_scan(self, database_scanner_with_shared_engine):
+        """Single-table and bulk introspection agree."""
+        scanner = database_scanner_with_shared_engine
+
+        single = scanner.get_table_schema("users").to_dict()
+        scanner._invalidate_table_cache()
+        scanned = next(
+            table for table in scanner.scan_database().tables
+            if table.name == "users"
+        )
+
+        assert single == scanned.to_dict()
+
+    def test_get_table_schema_invalid_table(self, database_scanner_with_shared_engine):
+        """Unknown tables are rejected."""
+        scanner = database_scanner_with_shared_engine
+
+        with pytest.raises(ValueError, match="Invalid table"):
+            scanner.get_table_schema("nonexistent")
+
+    def test_query_tables_rows_batches_samples(self, database_scanner_with_shared_engine):
+        """Batched sampling returns the same rows as per-table calls."""
+        scanner = database_scanner_with_shared_engine
+        table_names = scanner.get_table_names()
+
+        samples = scanner.query_tables_rows(table_names, limit=2)
+
+        assert list(samples) == table_names
+        for name in table_names:
+            assert samples[name] == scanner.query_table_rows(name, limit=2)
+
+    def test_sample_sql_compiled_once_per_table(self, database_scanner_with_shared_engine):
+        """Different limits reuse the same compiled driver statement."""
+        scanner = database_scanner_with_shared_engine
+        table = scanner._get_table_object("users")
+
+        scanner._sample_statement(table, 1)
+        compiled = scanner._sample_sql["users"]
+        statement, params = scanner._sample_statement(table, 3)
+        assert scanner._sample_sql["users"] is compiled
+        assert 3 in (params.values() if isinstance(params, dict) else params)
+
+    def test_samples_keep_column_types(self, tmp_path):
+        """DATETIME and BOOLEAN columns come back typed, not as raw values."""
+        db_url = f"sqlite:///{tmp_path / 'typed.db'}"
+        engine = create_engine(db_url)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE events (id INTEGER PRIMARY KEY, ts DATETIME, flag BOOLEAN)"
+            ))
+            conn.execute(text(
+                "INSERT INTO events VALUES (1, '2024-01-02 03:04:05.000000', 1)"
+            ))
+        engine.dispose()
+        scanner = DatabaseScanner(DatabaseConfig(url=db_url, type="sqlite"))
+
+        with patch("database_scanner.cx", None):
+            df = scanner.query_table_sample("events", limit=5)
+        [row] = scanner.query_table_rows("events", limit=5)
+
+        assert str(df["ts"].dtype).startswith("datetime64")
+        assert df["ts"][0] == pd.Timestamp("2024-01-02 03:04:05")
+        assert df["flag"].dtype == bool
+        assert row["ts"] == datetime(2024, 1, 2, 3, 4, 5)
+        assert row["flag"] is True
+        assert scanner.query_tables_rows(["events"], limit=5) == {"events": [row]}
+
     def test_get_table_stats(self, database_scanner_with_shared_engine):
         """Test getting table statistics."""
         scanner = database_scanner_with_shared_engine
@@ -91,6 +191,31 @@ class TestDatabaseScanner:
         assert isinstance(stats, dict)
         assert "row_count" in stats
 
+    def test_get_table_stats_exact_count_on_sqlite(self, database_scanner_with_shared_engine):
+        """SQLite has no catalog estimate, so rows are counted exactly."""
+        scanner = database_scanner_with_shared_engine
+        
+        stats = scanner.get_table_stats("users")
+        assert stats["row_count"] == 3
+        assert stats["row_count_is_estimate"] is False
+        assert stats["column_count"] == 5
+
+    @pytest.mark.parametrize("estimate, row_count, is_estimate", [
+        (-1, 3, False), (0, 3, False), (42, 42, True)
+    ])
+    def test_get_table_stats_unknown_estimates_are_counted(
+        self, database_scanner_with_shared_engine, estimate, row_count, is_estimate
+    ):
+        """Catalog estimates of -1 or 0 (never analyzed) fall back to COUNT(*)."""
+        scanner = database_scanner_with_shared_engine
+        query = f"SELECT {estimate} WHERE :table_name IS NOT NULL"
+
+        with patch.dict("database_scanner._ROW_ESTIMATE_QUERIES", {"sqlite": query}):
+            stats = scanner.get_table_stats("users")
+
+        assert stats["row_count"] == row_count
+        assert stats["row_count_is_estimate"] is is_estimate
+
     def test_scan_database(self, database_scanner_with_shared_engine):
         """Test scanning complete database schema."""
         scanner = database_scanner_with_shared_engine
@@ -146,6 +271,72 @@ class TestDatabaseScanner:
         scanner._invalidate_table_cache()
         assert scanner._cached_table_names is None
 
+    @pytest.mark.performance
+    def test_scan_database_is_cached(self, database_scanner_with_shared_engine):
+        """Repeated scans reuse the in-process schema cache."""
+        scanner = database_scanner_with_shared_engine
+        
+        first = scanner.scan_database()
+        with patch.object(scanner, "_scan_tables") as scan_tables:
+            second = scanner.scan_database()
+        
+        scan_tables.assert_not_called()
+        assert second is first
+
+    @pytest.mark.performance
+    def test_table_objects_are_reflected_once(self, database_scanner_with_shared_engine):
+        """Sample and stats queries reuse the cached Table object."""
+        scanner = database_scanner_with_shared_engine
+        
+        scanner.query_table_sample("users", limit=1)
+        table_obj = scanner._tables["users"]
+        scanner.get_table_stats("users")
+        
+        assert scanner._tables["users"] is table_obj
+        
+        scanner.refresh_schema()
+        assert "users" not in scanner._tables
+
+    @pytest.mark.performance
+    def test_cache_expires_after_ttl(self, database_scanner_with_shared_engine):
+        """Cached introspection is reloaded once the TTL has elapsed."""
+        scanner = database_scanner_with_shared_engine
+        scanner._cache_ttl = 0
+        
+        first = scanner.scan_database()
+        second = scanner.scan_database()
+        
+        assert second is not first
+        assert second == first
+
+    def test_concurrent_queries_need_a_shared_database(self, tmp_path):
+        """Only databases visible from every thread allow parallel queries."""
+        memory = DatabaseScanner(DatabaseConfig(url="sqlite:///:memory:", type="sqlite"))
+        on_disk = DatabaseScanner(
+            DatabaseConfig(url=f"sqlite:///{tmp_path / 'db.sqlite'}", type="sqlite")
+        )
+
+        assert not memory.supports_concurrent_queries()
+        assert on_disk.supports_concurrent_queries()
+
+    def test_sample_statements_are_dropped_with_reflections(
+        self, database_scanner_with_shared_engine
+    ):
+        """Sample SELECTs are cached per table, not per limit, and refreshed."""
+        scanner = database_scanner_with_shared_engine
+        table = scanner._get_table_object("users")
+        for limit in range(1, 50):
+            scanner._sample_select(table, limit)
+        first = scanner._sample_selects["users"]
+
+        assert list(scanner._sample_selects) == ["users"]
+
+        scanner._invalidate_table_cache()
+        assert scanner._sample_selects == {}
+        rebuilt = scanner._sample_select(scanner._get_table_object("users"), 5)
+        assert scanner._sample_selects["users"] is not first
+        assert rebuilt.get_final_froms()[0] is not table
+
     def test_error_handling_connection_failure(self):
         """Test error handling for connection failures."""
         # Use an invalid URL format that will definitely fail
@@ -155,3 +346,195 @@ class TestDatabaseScanner:
             scanner = DatabaseScanner(config)
             # This should fail when trying to get table names
             scanner.get_table_names()
+
+
+class TestPersistentSchemaCache:
+    """Test cases for the on-disk reflection cache."""
+
+    @pytest.fixture
+    def file_database_url(self, tmp_path):
+        """Create a small SQLite database file."""
+        db_path = tmp_path / "cache_test.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)"
+            ))
+        engine.dispose()
+        return f"sqlite:///{db_path}"
+
+    def test_schema_is_reused_across_scanners(self, file_database_url, tmp_path):
+        """A second scanner loads the schema without reflecting."""
+        cache_dir = str(tmp_path / "schema_cache")
+        config = DatabaseConfig(
+            url=file_database_url, type="sqlite", schema_cache_dir=cache_dir
+        )
+        first = DatabaseScanner(config).scan_database()
+
+        scanner = DatabaseScanner(config)
+        with patch.object(scanner, "_scan_tables") as scan_tables:
+            second = scanner.scan_database()
+
+        scan_tables.assert_not_called()
+        assert second == first
+
+    def test_schema_change_invalidates_cache(self, file_database_url, tmp_path):
+        """Altering the schema forces a fresh reflection."""
+        config = DatabaseConfig(
+            url=file_database_url,
+            type="sqlite",
+            schema_cache_dir=str(tmp_path / "schema_cache")
+        )
+        DatabaseScanner(config).scan_database()
+
+        scanner = DatabaseScanner(config)
+        with scanner.engine.begin() as conn:
+            conn.execute(text("CREATE TABLE orders (id INTEGER PRIMARY KEY)"))
+
+        table_names = [t.name for t in scanner.scan_database().tables]
+        assert "orders" in table_names
+
+    def test_persisted_schema_expires_after_ttl(self, file_database_url, tmp_path):
+        """The disk cache is not trusted beyond schema_cache_ttl."""
+        config = DatabaseConfig(
+            url=file_database_url,
+            type="sqlite",
+            schema_cache_dir=str(tmp_path / "schema_cache"),
+            schema_cache_ttl=60
+        )
+        DatabaseScanner(config).scan_database()
+
+        scanner = DatabaseScanner(config)
+        later = time.time() + 61
+        with patch("database_scanner.time.time", return_value=later), \
+                patch.object(scanner, "_scan_tables", return_value=[]) as scan_tables:
+            scanner.scan_database()
+
+        scan_tables.assert_called_once()
+
+    @pytest.mark.parametrize("backend", sorted(database_scanner._SCHEMA_VERSION_QUERIES))
+    def test_schema_version_probes_take_no_parameters(self, backend):
+        """Literal ':' separators in the probes are not parsed as bind params."""
+        query = text(database_scanner._SCHEMA_VERSION_QUERIES[backend])
+
+        assert query.compile().params == {}
+
+
+class TestConnectorXSampling:
+    """Test cases for the optional ConnectorX sample reader."""
+
+    @pytest.fixture
+    def scanner(self, tmp_path):
+        """Scanner over a SQLite file, so ConnectorX could open it."""
+        db_path = tmp_path / "cx_test.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY)"))
+            conn.execute(text("INSERT INTO users VALUES (1)"))
+        engine.dispose()
+        return DatabaseScanner(DatabaseConfig(url=f"sqlite:///{db_path}", type="sqlite"))
+
+    def test_connectorx_does_not_check_out_a_pool_connection(self, scanner):
+        """A ConnectorX read never touches the SQLAlchemy pool."""
+        fake_cx = Mock()
+        fake_cx.read_sql.return_value = pd.DataFrame({"id": [1]})
+        scanner._sample_table("users", 5)  # reflect before watching the pool
+
+        with patch("database_scanner.cx", fake_cx), \
+                patch.object(scanner.engine, "connect") as connect:
+            result = scanner.query_table_sample("users", limit=5)
+
+        assert result["id"].tolist() == [1]
+        connect.assert_not_called()
+
+    def test_connectorx_errors_fall_back_with_a_warning(self, scanner, caplog):
+        """ConnectorX failures are logged and served by SQLAlchemy."""
+        fake_cx = Mock()
+        fake_cx.read_sql.side_effect = RuntimeError("unsupported type: GEOMETRY")
+
+        with patch("database_scanner.cx", fake_cx):
+            result = scanner.query_table_sample("users", limit=5)
+
+        assert result["id"].tolist() == [1]
+        assert "unsupported type: GEOMETRY" in caplog.text
+
+    @pytest.mark.parametrize("error", [
+        ValueError("bad value"),
+        TypeError("bad type"),
+        type("PanicException", (BaseException,), {})("not implemented"),
+    ])
+    def test_any_connectorx_error_falls_back(self, scanner, error):
+        """Every ConnectorX failure, panics included, uses SQLAlchemy."""
+        fake_cx = Mock()
+        fake_cx.read_sql.side_effect = error
+
+        with patch("database_scanner.cx", fake_cx):
+            result = scanner.query_table_sample("users", limit=5)
+
+        assert result["id"].tolist() == [1]
+
+    def test_interrupts_are_not_swallowed(self, scanner):
+        """KeyboardInterrupt during a ConnectorX read still propagates."""
+        fake_cx = Mock()
+        fake_cx.read_sql.side_effect = KeyboardInterrupt
+
+        with patch("database_scanner.cx", fake_cx):
+            with pytest.raises(KeyboardInterrupt):
+                scanner.query_table_sample("users", limit=5)
+
+
+class TestPipelinedSampling:
+    """Test cases for the psycopg pipeline sample path."""
+
+    class FakePsycopgError(Exception):
+        """Stand-in for psycopg.Error"""
+
+    @pytest.fixture
+    def driver_conn(self):
+        """Mocked psycopg connection returning one row per table."""
+        driver_conn = Mock()
+        driver_conn.pipeline.return_value.__enter__ = Mock()
+        driver_conn.pipeline.return_value.__exit__ = Mock(return_value=False)
+
+        def cursor():
+            cursor = Mock()
+            cursor.description = [Mock(), Mock()]
+            cursor.description[0].name = "id"
+            cursor.description[1].name = "name"
+            cursor.fetchall.return_value = [(1, "x")]
+            return cursor
+
+        driver_conn.cursor.side_effect = cursor
+        return driver_conn
+
+    def run_pipelined(self, scanner, driver_conn):
+        conn = Mock()
+        conn.connection.driver_connection = driver_conn
+        tables = {
+            name: scanner._sample_table(name, 2) for name in ("users", "posts")
+        }
+        fake_psycopg = Mock(Error=self.FakePsycopgError)
+        with patch("database_scanner.psycopg", fake_psycopg):
+            return scanner._query_rows_pipelined(conn, tables, 2)
+
+    def test_rows_are_fetched_after_the_pipeline(
+        self, database_scanner_with_shared_engine, driver_conn
+    ):
+        """Every SELECT is queued in one pipeline and read back per table."""
+        samples = self.run_pipelined(database_scanner_with_shared_engine, driver_conn)
+
+        assert samples == {
+            "users": [{"id": 1, "name": "x"}],
+            "posts": [{"id": 1, "name": "x"}],
+        }
+        driver_conn.pipeline.assert_called_once()
+        assert driver_conn.cursor.call_count == 2
+
+    def test_driver_errors_become_runtime_errors(
+        self, database_scanner_with_shared_engine, driver_conn
+    ):
+        """psycopg errors are translated like SQLAlchemy errors elsewhere."""
+        driver_conn.cursor.side_effect = self.FakePsycopgError("relation is gone")
+
+        with pytest.raises(RuntimeError, match="relation is gone"):
+            self.run_pipelined(database_scanner_with_shared_engine, driver_conn)
@@ -0,0 +1,53 @@
+"""Unit tests for the demo API service."""
+
+import pytest
+
+from demo_api_service import DemoAPIService, _route_natural_language
+
+
+class TestDemoNaturalLanguageToSQL:
+    """Test cases for the demo natural language router."""
+
+    @pytest.fixture
+    def service(self):
+        """Provide an uninitialized demo service."""
+        return DemoAPIService()
+
+    @pytest.mark.parametrize("query, expected", [
+        ("Top customers by revenue",
+         "SELECT * FROM customers ORDER BY total_revenue DESC LIMIT 5"),
+        ("show the LAST orders",
+         "SELECT * FROM orders ORDER BY order_date DESC LIMIT 10"),
+        ("recent orders please",
+         "SELECT * FROM orders ORDER BY order_date DESC LIMIT 10"),
+        ("product price list",
+         "SELECT * FROM products ORDER BY price DESC LIMIT 10"),
+        ("list all customers",
+         "SELECT * FROM customers LIMIT 10"),
+        ("all products",
+         "SELECT * FROM products LIMIT 10"),
+        ("top customers",
+         "SELECT * FROM customers LIMIT 5"),
+        ("something unrelated",
+         "SELECT * FROM customers LIMIT 5"),
+    ])
+    def test_routes(self, service, query, expected):
+        """Queries are routed to the expected demo SQL."""
+        assert service._demo_natural_language_to_sql(query) == expected
+
+    def test_first_matching_route_wins(self, service):
+        """Earlier routes take precedence over later ones."""
+        sql = service._demo_natural_language_to_sql(
+            "all recent orders for top customer revenue"
+        )
+        assert "total_revenue" in sql
+
+    def test_equivalent_queries_share_cache_entry(self, service):
+        """Case and whitespace variants hit the same cached route."""
+        _route_natural_language.cache_clear()
+        service._demo_natural_language_to_sql("all  Products")
+        service._demo_natural_language_to_sql("ALL products ")
+
+        info = _route_natural_language.cache_info()
+        assert info.misses == 1
+        assert info.hits == 1
@@ -0,0 +1,1277 @@
+"""Unit tests for the LLM provider base classes."""
+
+import asyncio
+import dataclasses
+import io
+import json
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import httpx
+import pytest
+import requests
+import urllib3
+
+import llm_providers
+from llm_providers import (
+    BaseEmbeddingProvider, EmbeddingConfig, LLMConfig, LLMProvider,
+    LLMProviderAPIError, create_http_session, iter_json_lines, parse_json,
+    post_json
+)
+
+
+class TestProviderConfigs:
+    """Test cases for the provider configuration dataclasses."""
+
+    def test_configs_are_immutable(self):
+        """Configs cannot be modified after creation."""
+        config = LLMConfig(provider=LLMProvider.OPENAI, model_name="gpt")
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            config.temperature = 1.0
+
+    def test_equal_configs_hash_equal(self):
+        """Equal configs can be used interchangeably as cache keys."""
+        first = EmbeddingConfig(provider=LLMProvider.OLLAMA, model_name="m")
+        second = EmbeddingConfig(provider=LLMProvider.OLLAMA, model_name="m")
+
+        assert first == second
+        assert hash(first) == hash(second)
+        assert not hasattr(first, "__dict__")
+
+
+class TestHTTPSession:
+    """Test cases for the shared provider HTTP session."""
+
+    def test_session_carries_headers(self):
+        """Default headers are sent with every request."""
+        session = create_http_session({"X-Api-Key": "secret"})
+
+        assert session.headers["X-Api-Key"] == "secret"
+
+    def test_session_accepts_supported_compression(self):
+        """Compressed responses are requested, limited to decodable codings."""
+        session = create_http_session({"Content-Type": "application/json"})
+        codings = session.headers["Accept-Encoding"].split(", ")
+
+        assert "gzip" in codings
+        for coding in codings:
+            assert coding in urllib3.util.request.ACCEPT_ENCODING
+
+    def test_session_pools_and_retries(self, monkeypatch):
+        """Both schemes use a pooled adapter that retries transient errors."""
+        monkeypatch.setattr(llm_providers, "httpx", None)
+        session = create_http_session()
+
+        for prefix in ("http://", "https://"):
+            adapter = session.get_adapter(prefix + "example.com")
+            assert adapter._pool_maxsize == 32
+            assert adapter.max_retries.total == 2
+            assert 503 in adapter.max_retries.status_forcelist
+            assert "POST" not in adapter.max_retries.allowed_methods
+
+
+class TestHTTP2Adapter:
+    """Test cases for the optional HTTP/2 transport."""
+
+    @pytest.fixture
+    def clients(self):
+        """(verify, cert, proxy) of every shared client requested"""
+        return []
+
+    @pytest.fixture
+    def session(self, monkeypatch, clients):
+        attempts = {}
+
+        def handler(request):
+            if request.url.path == "/slow":
+                raise httpx.ReadTimeout("slow", request=request)
+            if request.url.path == "/flaky":
+                attempts[request.method] = attempts.get(request.method, 0) + 1
+                if attempts[request.method] < 3:
+                    return httpx.Response(503, headers={"Retry-After": "0"})
+            return httpx.Response(
+                200,
+                headers={"Content-Type": "application/json"},
+                content=b'{"echo": ' + request.content + b'}\n{"done": true}\n'
+            )
+
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+
+        def shared_client(verify=True, cert=None, proxy=None):
+            clients.append((verify, cert, proxy))
+            return client
+
+        monkeypatch.setattr(llm_providers, "httpx", httpx)
+        monkeypatch.setattr(llm_providers, "_shared_httpx_client", shared_client)
+        monkeypatch.setattr(llm_providers.time, "sleep", lambda seconds: None)
+        return create_http_session()
+
+    def test_https_uses_shared_http2_client(self, session):
+        """HTTPS goes through httpx; plain HTTP keeps the urllib3 pool."""
+        assert isinstance(
+            session.get_adapter("https://api.example.com"),
+            llm_providers.HTTP2Adapter
+        )
+        assert not isinstance(
+            session.get_adapter("http://localhost:11434"),
+            llm_providers.HTTP2Adapter
+        )
+
+    def test_responses_behave_like_requests(self, session):
+        """Buffered and streamed responses expose the requests API."""
+        response = post_json(session, "https://api.example.com/x", [1], 5)
+        streamed = post_json(
+            session, "https://api.example.com/x", [2], 5, stream=True
+        )
+
+        assert isinstance(response, requests.Response)
+        assert response.status_code == 200
+        assert response.text.splitlines()[0] == '{"echo": [1]}'
+        assert list(iter_json_lines(streamed)) == [{"echo": [2]}, {"done": True}]
+
+    def test_timeouts_raise_requests_exceptions(self, session):
+        """Callers keep catching requests.exceptions.Timeout."""
+        with pytest.raises(requests.exceptions.Timeout):
+            session.get("https://api.example.com/slow", timeout=1)
+
+    def test_session_tls_and_proxy_settings_are_honored(self, session, clients):
+        """verify, cert and proxies select the client used for the request."""
+        session.verify = "/etc/ssl/corp-ca.pem"
+        session.cert = ("client.pem", "client.key")
+        session.proxies = {"https": "http://proxy.corp:3128"}
+        session.trust_env = False
+
+        session.get("https://api.example.com/x", timeout=1)
+        session.get("https://api.example.com/x", timeout=1, verify=False)
+
+        assert clients == [
+            ("/etc/ssl/corp-ca.pem", ("client.pem", "client.key"), "http://proxy.corp:3128"),
+            (False, ("client.pem", "client.key"), "http://proxy.corp:3128"),
+        ]
+
+    def test_environment_proxies_are_honored(self, session, clients, monkeypatch):
+        """HTTPS_PROXY applies as it does for the urllib3 adapter."""
+        monkeypatch.setenv("HTTPS_PROXY", "http://env-proxy:8080")
+        monkeypatch.delenv("NO_PROXY", raising=False)
+        monkeypatch.delenv("no_proxy", raising=False)
+
+        session.get("https://api.example.com/x", timeout=1)
+
+        assert clients[-1][2] == "http://env-proxy:8080"
+
+    def test_transient_statuses_are_retried(self, session):
+        """Idempotent requests retry 5xx like the http adapter; POST does not."""
+        assert session.get("https://api.example.com/flaky", timeout=1).status_code == 200
+        assert post_json(
+            session, "https://api.example.com/flaky", [1], 5
+        ).status_code == 503
+
+    def test_shared_clients_are_keyed_by_settings(self, monkeypatch):
+        """Different TLS/proxy settings never share a client."""
+        monkeypatch.setattr(llm_providers, "httpx", httpx)
+        monkeypatch.setattr(llm_providers, "_httpx_clients", {})
+
+        default = llm_providers._shared_httpx_client()
+        proxied = llm_providers._shared_httpx_client(True, None, "http://proxy:3128")
+        insecure = llm_providers._shared_httpx_client(False)
+
+        assert default is llm_providers._shared_httpx_client()
+        assert len({id(default), id(proxied), id(insecure)}) == 3
+
+
+class TestJSONHelpers:
+    """Test cases for the JSON request/response helpers."""
+
+    def test_post_json_sends_json_body(self, monkeypatch):
+        """Payloads are serialized with a JSON content type."""
+        calls = []
+
+        class RecordingSession:
+            def post(self, url, **kwargs):
+                calls.append((url, kwargs))
+                return "response"
+
+        payload = {"model": "m", "input": ["a", "b"]}
+        for backend in (None, llm_providers.orjson):
+            monkeypatch.setattr(llm_providers, "orjson", backend)
+            assert post_json(RecordingSession(), "http://x", payload, 5) == "response"
+
+        plain, fast = calls
+        assert plain[1] == {"json": payload, "timeout": 5}
+        if llm_providers.orjson is not None:
+            assert json.loads(fast[1]["data"]) == payload
+            assert fast[1]["headers"]["Content-Type"] == "application/json"
+
+    def test_parse_json_decodes_body(self, monkeypatch):
+        """Responses decode the same with and without orjson."""
+        response = requests.Response()
+        response._content = b'{"data": [{"embedding": [0.5, 1.0]}]}'
+
+        decoded = parse_json(response)
+        monkeypatch.setattr(llm_providers, "orjson", None)
+
+        assert decoded == parse_json(response)
+        assert decoded["data"][0]["embedding"] == [0.5, 1.0]
+
+    def test_read_json_decodes_streamed_body(self, monkeypatch):
+        """Streamed bodies decode whether Content-Length is exact, short or absent."""
+        body = {"data": [{"embedding": [0.5, 1.0]}] * 100}
+        encoded = json.dumps(body).encode()
+
+        for length in (len(encoded), 10, None):
+            for backend in (llm_providers.orjson, None):
+                monkeypatch.setattr(llm_providers, "orjson", backend)
+                response = json_response(body)
+                if length is not None:
+                    response.headers["Content-Length"] = str(length)
+
+                assert llm_providers.read_json(response, chunk_size=64) == body
+
+    def test_iter_json_lines_decodes_ndjson(self):
+        """Streamed NDJSON lines are decoded one object at a time."""
+        response = requests.Response()
+        response.raw = io.BytesIO(
+            b'{"response": "Hel", "done": false}\n\n'
+            b'{"response": "lo", "done": true}\n'
+        )
+
+        chunks = list(iter_json_lines(response))
+
+        assert [chunk["response"] for chunk in chunks] == ["Hel", "lo"]
+        assert chunks[-1]["done"] is True
+
+
+class TestProviderErrors:
+    """Test cases for the shared error translation."""
+
+    @pytest.mark.parametrize("raised, expected, message", [
+        (requests.exceptions.ReadTimeout("slow"),
+         llm_providers.LLMProviderTimeoutError, "Svc request timeout"),
+        (requests.exceptions.ConnectionError("refused"),
+         LLMProviderAPIError, "Svc request error: refused"),
+        (KeyError("choices"),
+         llm_providers.LLMProviderError, "Svc parsing error: 'choices'"),
+    ])
+    def test_translates_errors(self, raised, expected, message):
+        """Transport and unexpected errors become provider errors."""
+        @llm_providers.provider_errors("Svc", "parsing")
+        def call():
+            raise raised
+
+        with pytest.raises(expected) as info:
+            call()
+        assert str(info.value) == message
+        assert info.value.__cause__ is raised
+
+    def test_provider_errors_pass_through_generators(self):
+        """Provider errors keep their type and status; generators can close."""
+        def stream():
+            with llm_providers.provider_errors("Svc", "stream"):
+                yield 1
+                raise LLMProviderAPIError("bad", status_code=400)
+
+        chunks = stream()
+        assert next(chunks) == 1
+        with pytest.raises(LLMProviderAPIError) as info:
+            next(chunks)
+        assert info.value.status_code == 400
+
+        unfinished = stream()
+        next(unfinished)
+        unfinished.close()
+
+
+class FakeEmbeddingProvider(BaseEmbeddingProvider):
+    """Embedding provider that records the batches it receives."""
+
+    def __init__(self, batch_size=2, failures=None, cache_path=None):
+        super().__init__(EmbeddingConfig(
+            provider=LLMProvider.CUSTOM, model_name="fake", batch_size=batch_size,
+            cache_path=cache_path
+        ))
+        self.batches = []
+        self.failures = list(failures or [])
+        self._lock = threading.Lock()
+
+    def initialize(self):
+        self.client = True
+
+    def _embed_batch(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+            if self.failures:
+                failure = self.failures.pop(0)
+                if failure == 413 and len(texts) == 1:
+                    failure = None
+                if failure:
+                    raise LLMProviderAPIError("error", status_code=failure)
+        return [[float(len(text))] for text in texts]
+
+    def _embed_query(self, text):
+        return self._embed_batch([text])[0]
+
+    def is_available(self):
+        return True
+
+
+class TestBaseEmbeddingProvider:
+    """Test cases for batched embed_documents."""
+
+    def test_empty_input(self):
+        """No texts means no requests."""
+        provider = FakeEmbeddingProvider()
+
+        assert provider.embed_documents([]).size == 0
+        assert provider.batches == []
+
+    def test_splits_into_batches_and_keeps_order(self):
+        """Texts are chunked by batch_size and results stay in input order."""
+        provider = FakeEmbeddingProvider(batch_size=2)
+        texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+        embeddings = provider.embed_documents(texts)
+
+        assert embeddings.tolist() == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+        assert sorted(map(len, provider.batches)) == [1, 2, 2]
+
+    def test_embeddings_are_float32_arrays(self):
+        """Results are contiguous float32 rows, not boxed Python floats."""
+        provider = FakeEmbeddingProvider(batch_size=2)
+
+        documents = provider.embed_documents(["a", "bb", "ccc"])
+        query = provider.embed_query("dddd")
+
+        assert documents.dtype == np.float32
+        assert documents.shape == (3, 1)
+        assert query.dtype == np.float32
+        assert query.tolist() == [4.0]
+
+    def test_batches_are_bounded_by_inputs_and_bytes(self, monkeypatch):
+        """Provider caps split batches further than batch_size alone."""
+        provider = FakeEmbeddingProvider(batch_size=10)
+        monkeypatch.setattr(provider, "MAX_BATCH_INPUTS", 3)
+        monkeypatch.setattr(provider, "MAX_BATCH_BYTES", 4)
+
+        assert provider._split_batches(["a", "b", "c", "d", "eeee", "é", "f"]) == [
+            ["a", "b", "c"], ["d"], ["eeee"], ["é", "f"]
+        ]
+        assert provider.embed_documents(["aaaaa", "b"]).tolist() == [[5.0], [1.0]]
+        assert sorted(provider.batches) == [["aaaaa"], ["b"]]
+
+    def test_retries_rate_limited_batch(self, monkeypatch):
+        """A 429 response is retried after backing off."""
+        sleeps = []
+        monkeypatch.setattr(llm_providers.time, "sleep", sleeps.append)
+        monkeypatch.setattr(llm_providers.random, "uniform", lambda low, high: 1.0)
+        provider = FakeEmbeddingProvider(batch_size=10, failures=[429, 429])
+
+        assert provider.embed_documents(["a", "b"]).tolist() == [[1.0], [1.0]]
+        assert len(provider.batches) == 3
+        assert sleeps == [0.5, 1.0]
+
+    def test_retries_server_errors_for_queries(self, monkeypatch):
+        """Transient 5xx responses are retried for queries as well as batches."""
+        monkeypatch.setattr(llm_providers.time, "sleep", lambda _: None)
+        provider = FakeEmbeddingProvider(batch_size=10, failures=[503, 502])
+
+        assert provider.embed_query("abc").tolist() == [3.0]
+        assert provider.embed_documents(["a"]).tolist() == [[1.0]]
+        assert len(provider.batches) == 4
+
+    def test_gives_up_after_max_retries(self, monkeypatch):
+        """Persistent rate limiting surfaces the API error."""
+        monkeypatch.setattr(llm_providers.time, "sleep", lambda _: None)
+        provider = FakeEmbeddingProvider(failures=[429] * 10)
+
+        with pytest.raises(LLMProviderAPIError):
+            provider.embed_documents(["a"])
+        assert len(provider.batches) == provider.MAX_RETRIES + 1
+
+    def test_length_sorted_batches_keep_input_order(self, monkeypatch):
+        """Sorting by length groups similar texts but results keep input order."""
+        provider = FakeEmbeddingProvider(batch_size=2)
+        monkeypatch.setattr(provider, "SORT_BY_LENGTH", True)
+
+        embeddings = provider.embed_documents(["cccc", "a", "ddd", "bb"])
+
+        assert embeddings.tolist() == [[4.0], [1.0], [3.0], [2.0]]
+        assert sorted(provider.batches) == [["a", "bb"], ["ddd", "cccc"]]
+
+    def test_halves_oversize_batch(self):
+        """A 413 response splits the batch in two."""
+        provider = FakeEmbeddingProvider(batch_size=4, failures=[413])
+
+        assert provider.embed_documents(["a", "b", "c", "d"]).tolist() == [[1.0]] * 4
+        assert provider.batches == [["a", "b", "c", "d"], ["a", "b"], ["c", "d"]]
+
+    def test_aembed_documents_matches_sync(self):
+        """The async variant returns the same embeddings."""
+        provider = FakeEmbeddingProvider(batch_size=2)
+        texts = ["a", "bb", "ccc"]
+
+        np.testing.assert_array_equal(
+            asyncio.run(provider.aembed_documents(texts)),
+            provider.embed_documents(texts)
+        )
+
+    def test_aembed_documents_respects_max_in_flight(self):
+        """At most max_in_flight batches are awaited at the same time."""
+        provider = FakeEmbeddingProvider(batch_size=1)
+        active = peak = 0
+
+        async def embed(texts):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0)
+            active -= 1
+            return [[float(len(text))] for text in texts]
+
+        provider._aembed_batch = embed
+        embeddings = asyncio.run(
+            provider.aembed_documents(["a", "bb", "ccc", "dddd"], max_in_flight=2)
+        )
+
+        assert embeddings.tolist() == [[1.0], [2.0], [3.0], [4.0]]
+        assert peak == 2
+
+    def test_cached_texts_are_not_reembedded(self):
+        """Only texts missing from the cache reach the provider."""
+        provider = FakeEmbeddingProvider(batch_size=10)
+
+        provider.embed_documents(["a", "bb"])
+        embeddings = provider.embed_documents(["bb", "ccc", "ccc"])
+
+        assert embeddings.tolist() == [[2.0], [3.0], [3.0]]
+        assert provider.batches == [["a", "bb"], ["ccc"]]
+
+    def test_duplicate_texts_are_embedded_once(self):
+        """Repeats within one call are sent once and scattered back."""
+        provider = FakeEmbeddingProvider(batch_size=10)
+
+        embeddings = provider.embed_documents(["a", "bb", "a", "a", "bb"])
+
+        assert embeddings.tolist() == [[1.0], [2.0], [1.0], [1.0], [2.0]]
+        assert provider.batches == [["a", "bb"]]
+
+    def test_query_embeddings_are_cached(self):
+        """Repeated queries hit the cache."""
+        provider = FakeEmbeddingProvider()
+
+        np.testing.assert_allclose(
+            provider.embed_query("hello"), provider.embed_query("hello"), rtol=1e-6
+        )
+        assert provider.batches == [["hello"]]
+
+    def test_cache_stores_int8_with_scale(self):
+        """Cached vectors are quantized and restored within one step."""
+        provider = FakeEmbeddingProvider()
+        vector = np.array([0.5, -0.25, 0.1, 0.0], dtype=np.float32)
+        key = provider._cache_key("document", "v")
+
+        provider._cache_store({key: vector})
+        quantized, scale = provider._embedding_cache[key]
+        restored = provider._cache_lookup([key])[key]
+
+        assert quantized.dtype == np.int8
+        assert quantized.tolist() == [127, -64, 25, 0]
+        assert restored.dtype == np.float32
+        np.testing.assert_allclose(restored, vector, atol=scale / 2)
+
+    def test_quantize_zero_vector(self):
+        """An all-zero vector round-trips without dividing by zero."""
+        quantized, scale = llm_providers.quantize_embedding(np.zeros(3, np.float32))
+
+        assert scale == 1.0
+        assert llm_providers.dequantize_embedding(quantized, scale).tolist() == [0.0] * 3
+
+    def test_disk_cache_survives_restart(self, tmp_path):
+        """A new provider reads earlier embeddings from the SQLite cache."""
+        path = str(tmp_path / "embeddings.db")
+        first = FakeEmbeddingProvider(batch_size=10, cache_path=path)
+        first.embed_documents(["a", "bb"])
+        first.embed_query("ccc")
+
+        second = FakeEmbeddingProvider(batch_size=10, cache_path=path)
+        documents = second.embed_documents(["bb", "a", "dddd"])
+        query = second.embed_query("ccc")
+
+        np.testing.assert_allclose(documents, [[2.0], [1.0], [4.0]], rtol=1e-2)
+        np.testing.assert_allclose(query, [3.0], rtol=1e-2)
+        assert second.batches == [["dddd"]]
+        assert len(second._embedding_cache) == 4
+
+    def test_disk_cache_is_keyed_by_provider(self, tmp_path):
+        """The same model name under another provider is embedded again."""
+        path = str(tmp_path / "embeddings.db")
+        FakeEmbeddingProvider(cache_path=path).embed_documents(["a"])
+
+        other = FakeEmbeddingProvider(cache_path=path)
+        other.config = dataclasses.replace(other.config, provider=LLMProvider.OLLAMA)
+        other.embed_documents(["a"])
+
+        assert other.batches == [["a"]]
+
+    def test_disk_cache_round_trips_quantized_entries(self, tmp_path):
+        """Stored entries come back with the same int8 values and scale."""
+        cache = llm_providers.EmbeddingDiskCache(str(tmp_path / "e.db"))
+        cache.LOOKUP_CHUNK = 2
+        entries = {
+            bytes([i]): llm_providers.quantize_embedding(
+                np.array([i, -1.0, 0.5], dtype=np.float32)
+            )
+            for i in range(1, 6)
+        }
+
+        cache.put_many(entries)
+        loaded = cache.get_many(list(entries) + [b"missing"])
+
+        assert set(loaded) == set(entries)
+        for key, (quantized, scale) in entries.items():
+            assert loaded[key][0].tolist() == quantized.tolist()
+            assert loaded[key][1] == scale
+        cache.close()
+
+    def test_disk_cache_rolls_back_failed_writes(self, tmp_path):
+        """A failed put_many does not leave its transaction open."""
+        cache = llm_providers.EmbeddingDiskCache(str(tmp_path / "e.db"))
+        entry = llm_providers.quantize_embedding(np.array([1.0, 0.5], dtype=np.float32))
+
+        with pytest.raises(sqlite3.Error):
+            cache.put_many({b"lost": entry, 1j: entry})
+        cache.put_many({b"ok": entry})
+
+        assert cache.get_many([b"lost", b"ok"]).keys() == {b"ok"}
+        cache.close()
+
+    def test_cache_evicts_least_recently_used(self, monkeypatch):
+        """The cache stays within its capacity."""
+        provider = FakeEmbeddingProvider(batch_size=10)
+        monkeypatch.setattr(provider, "EMBEDDING_CACHE_SIZE", 2)
+
+        provider.embed_documents(["a", "b"])
+        provider.embed_documents(["a"])
+        provider.embed_documents(["c"])
+        provider.embed_documents(["a", "b"])
+
+        assert provider.batches == [["a", "b"], ["c"], ["b"]]
+
+    def test_other_errors_are_not_retried(self):
+        """Non-transient API errors are raised immediately."""
+        provider = FakeEmbeddingProvider(failures=[400])
+
+        with pytest.raises(LLMProviderAPIError):
+            provider.embed_documents(["a"])
+        assert len(provider.batches) == 1
+
+
+class FakeLLMProvider(llm_providers.BaseLLMProvider):
+    """Minimal LLM provider for exercising the base class."""
+
+    def initialize(self):
+        self.client = True
+
+    def generate_text(self, prompt, system_prompt=None, **kwargs):
+        return prompt
+
+    def chat_completion(self, messages, **kwargs):
+        return messages[-1]["content"]
+
+    def is_available(self):
+        return True
+
+
+class TestBaseLLMProvider:
+    """Test cases for BaseLLMProvider helpers."""
+
+    def test_batch_generate_keeps_order(self):
+        """Batch results line up with the input prompts."""
+        provider = FakeLLMProvider(LLMConfig(
+            provider=LLMProvider.CUSTOM, model_name="echo"
+        ))
+        prompts = [f"prompt {i}" for i in range(20)]
+
+        assert provider.batch_generate(prompts) == prompts
+        assert provider.batch_generate([]) == []
+
+    def test_abatch_generate_limits_concurrency(self):
+        """No more than max_concurrency requests are in flight."""
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        class SlowProvider(FakeLLMProvider):
+            def generate_text(self, prompt, system_prompt=None, **kwargs):
+                with lock:
+                    active.append(prompt)
+                    peak.append(len(active))
+                time.sleep(0.01)
+                with lock:
+                    active.remove(prompt)
+                return prompt.upper()
+
+        provider = SlowProvider(LLMConfig(
+            provider=LLMProvider.CUSTOM, model_name="slow"
+        ))
+        prompts = [f"p{i}" for i in range(12)]
+
+        results = asyncio.run(provider.abatch_generate(prompts, max_concurrency=3))
+
+        assert results == [p.upper() for p in prompts]
+        assert max(peak) <= 3
+
+    def test_model_info_is_built_once(self):
+        """get_model_info returns the same read-only mapping every call."""
+        provider = FakeLLMProvider(LLMConfig(
+            provider=LLMProvider.OLLAMA, model_name="llama2", temperature=0.2
+        ))
+
+        info = provider.get_model_info()
+
+        assert info is provider.get_model_info()
+        assert dict(info) == {
+            "provider": "ollama",
+            "model": "llama2",
+            "temperature": 0.2,
+            "max_tokens": None,
+        }
+        with pytest.raises(TypeError):
+            info["model"] = "other"
+
+
+def json_response(body, status_code=200):
+    """Build a requests.Response with a JSON body."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(json.dumps(body).encode())
+    return response
+
+
+class RecordingSession:
+    """Session stub that records POSTs and replies with a fixed body."""
+
+    def __init__(self, body):
+        self.body = body
+        self.posts = []
+
+    def post(self, url, **kwargs):
+        payload = kwargs["json"] if "json" in kwargs else json.loads(kwargs["data"])
+        self.posts.append((url, payload))
+        return json_response(self.body)
+
+
+class TestCustomProvider:
+    """Test cases for the custom/enterprise provider."""
+
+    def make_provider(self, body, **extra_params):
+        from llm_providers.custom_provider import CustomProvider
+
+        provider = CustomProvider(LLMConfig(
+            provider=LLMProvider.CUSTOM, model_name="m", max_tokens=64,
+            api_base="http://api", extra_params=extra_params or None
+        ))
+        provider.session = RecordingSession(body)
+        provider.client = True
+        return provider
+
+    def test_openai_format_payload(self):
+        """OpenAI-format requests reuse the precomputed URL and skeleton."""
+        provider = self.make_provider(
+            {"choices": [{"message": {"content": "hi"}}]},
+            format="openai", top_p=0.5
+        )
+
+        assert provider.generate_text("q", system_prompt="s") == "hi"
+        assert provider.generate_text("q2") == "hi"
+
+        (url, first), (_, second) = provider.session.posts
+        assert url == "http://api/v1/chat/completions"
+        assert first == {
+            "model": "m", "temperature": 0.0, "max_tokens": 64, "top_p": 0.5,
+            "messages": [
+                {"role": "system", "content": "s"},
+                {"role": "user", "content": "q"},
+            ],
+        }
+        assert second["messages"] == [{"role": "user", "content": "q2"}]
+        assert "messages" not in provider._base_payload
+
+    def test_prompt_format_without_extra_params(self):
+        """Prompt-format requests default to /generate."""
+        provider = self.make_provider({"response": "ok"})
+
+        assert provider.generate_text("q", system_prompt="s") == "ok"
+
+        url, payload = provider.session.posts[0]
+        assert url == "http://api/generate"
+        assert payload["prompt"] == "System: s\n\nUser: q"
+
+    def test_probe_selects_response_extractor(self):
+        """A successful probe of the request endpoint fixes the extractor."""
+        from llm_providers import custom_provider
+
+        provider = self.make_provider({"text": "plain"})
+        assert provider._extract is custom_provider._extract_generic
+        post = provider.session.post
+
+        def post_only_generate(url, **kwargs):
+            response = post(url, **kwargs)
+            if url != "http://api/generate":
+                response.status_code = 404
+            return response
+
+        provider.session.post = post_only_generate
+        provider._test_minimal_request()
+
+        assert provider._extract is custom_provider._extract_text
+        assert provider.generate_text("q") == "plain"
+
+    def test_generic_extractor_falls_back_to_known_keys(self):
+        """Unprobed providers still understand the less common formats."""
+        provider = self.make_provider({"generated_text": 42})
+
+        assert provider.generate_text("q") == "42"
+
+    def test_chat_completion_flattens_messages(self):
+        """Non-OpenAI chats become a single role-labelled prompt."""
+        provider = self.make_provider({"response": "ok"})
+
+        provider.chat_completion([
+            {"role": "system", "content": "be brief"},
+            {"role": "user", "content": "hi"},
+            {"role": "function", "content": "42"},
+            {"content": "bare"},
+        ])
+
+        assert provider.session.posts[0][1]["prompt"] == (
+            "System: be brief\n\nUser: hi\n\nFunction: 42\n\nUser: bare"
+        )
+
+
+class TestCustomEmbeddingProvider:
+    """Test cases for the custom/enterprise embedding provider."""
+
+    def make_provider(self, body, **extra_params):
+        from llm_providers.custom_provider import CustomEmbeddingProvider
+
+        provider = CustomEmbeddingProvider(EmbeddingConfig(
+            provider=LLMProvider.CUSTOM, model_name="e", api_base="http://api",
+            extra_params=extra_params or None
+        ))
+        provider.session = RecordingSession(body)
+        provider.client = True
+        return provider
+
+    def test_embed_query_sends_single_string(self):
+        """Queries skip the batch path and hit the cache afterwards."""
+        provider = self.make_provider({"data": [{"embedding": [0.5, 1.0]}]})
+
+        first = provider.embed_query("hello")
+        second = provider.embed_query("hello")
+
+        assert first.tolist() == [0.5, 1.0]
+        np.testing.assert_allclose(second, first, rtol=1e-2)
+        assert len(provider.session.posts) == 1
+        assert provider.session.posts[0][1]["input"] == "hello"
+
+    def test_batch_payload_uses_configured_endpoint(self):
+        """Extra params go into the payload, except the endpoint itself."""
+        provider = self.make_provider(
+            {"data": [{"embedding": [1.0]}, {"embedding": [2.0]}]},
+            endpoint="/embed", dimensions=8
+        )
+
+        assert provider.embed_documents(["a", "b"]).tolist() == [[1.0], [2.0]]
+        assert provider.session.posts == [(
+            "http://api/embed",
+            {"model": "e", "dimensions": 8, "input": ["a", "b"]},
+        )]
+
+    def test_embed_query_accepts_flat_vector(self):
+        """A flat embeddings array is treated as the single query vector."""
+        provider = self.make_provider({"embeddings": [0.25, 0.75]})
+
+        assert provider.embed_query("hello").tolist() == [0.25, 0.75]
+
+
+class TestOpenAIEmbeddingProvider:
+    """Test cases for the direct OpenAI embeddings calls."""
+
+    class FakeEmbeddings:
+        def __init__(self, error=None):
+            self.calls = []
+            self.error = error
+
+        def create(self, model, input, **params):
+            self.calls.append(input)
+            self.params = params
+            if self.error:
+                error, self.error = self.error, None
+                raise error
+            texts = [input] if isinstance(input, str) else input
+            data = [
+                type("Item", (), {"index": i, "embedding": [float(len(text))]})
+                for i, text in enumerate(texts)
+            ]
+            return type("Response", (), {"data": data[::-1]})
+
+    class FakeAsyncEmbeddings(FakeEmbeddings):
+        async def create(self, model, input, **params):
+            await asyncio.sleep(0)
+            return TestOpenAIEmbeddingProvider.FakeEmbeddings.create(
+                self, model, input, **params
+            )
+
+    def make_provider(self, error=None, **extra_params):
+        from llm_providers.openai_provider import OpenAIEmbeddingProvider
+
+        provider = OpenAIEmbeddingProvider(EmbeddingConfig(
+            provider=LLMProvider.OPENAI, model_name="text-embedding-3-small",
+            api_key="k", batch_size=2, extra_params=extra_params or None
+        ))
+        provider.client = type("Client", (), {"embeddings": self.FakeEmbeddings(error)})
+        provider.async_client = type(
+            "AsyncClient", (), {"embeddings": self.FakeAsyncEmbeddings(error)}
+        )
+        return provider
+
+    def test_async_batches_use_async_client(self):
+        """aembed_documents awaits the async client and shares the cache."""
+        provider = self.make_provider()
+
+        embeddings = asyncio.run(provider.aembed_documents(["ccc", "a", "bb", "a"]))
+
+        assert embeddings.tolist() == [[3.0], [1.0], [2.0], [1.0]]
+        assert sorted(provider.async_client.embeddings.calls) == [["a", "bb"], ["ccc"]]
+        assert provider.client.embeddings.calls == []
+        assert provider.embed_documents(["bb"]).tolist() == [[2.0]]
+        assert asyncio.run(provider.aembed_query("dddd")).tolist() == [4.0]
+
+    def test_batches_use_embeddings_endpoint(self):
+        """Batches go straight to embeddings.create, reordered by index."""
+        provider = self.make_provider()
+
+        embeddings = provider.embed_documents(["ccc", "a", "bb"])
+
+        assert embeddings.tolist() == [[3.0], [1.0], [2.0]]
+        assert sorted(provider.client.embeddings.calls) == [["a", "bb"], ["ccc"]]
+        assert provider.embed_query("dddd").tolist() == [4.0]
+
+    def test_batch_api_uploads_jsonl_and_restores_order(self, monkeypatch):
+        """Batch API results are matched back to inputs by custom_id."""
+        from types import SimpleNamespace
+
+        class BatchClient:
+            def __init__(self):
+                self.uploaded = None
+                self.statuses = ["validating", "in_progress", "completed"]
+                self.files = SimpleNamespace(create=self.upload, content=self.content)
+                self.batches = SimpleNamespace(create=self.job, retrieve=self.job)
+
+            def upload(self, file, purpose):
+                self.uploaded = [json.loads(line) for line in file[1].splitlines()]
+                return SimpleNamespace(id="file-in")
+
+            def job(self, *args, **kwargs):
+                return SimpleNamespace(
+                    id="batch-1", status=self.statuses.pop(0), output_file_id="file-out"
+                )
+
+            def content(self, file_id):
+                lines = [
+                    json.dumps({"custom_id": request["custom_id"], "response": {
+                        "status_code": 200,
+                        "body": {"data": [
+                            {"index": i, "embedding": [float(len(text))]}
+                            for i, text in enumerate(request["body"]["input"])
+                        ]},
+                    }})
+                    for request in reversed(self.uploaded)
+                ]
+                return SimpleNamespace(text="\n".join(lines))
+
+        sleeps = []
+        monkeypatch.setattr(time, "sleep", sleeps.append)
+        provider = self.make_provider()
+        provider.client = BatchClient()
+
+        embeddings = provider.embed_documents_batch(["ccc", "a", "bb"], poll_interval=5)
+
+        assert embeddings.tolist() == [[3.0], [1.0], [2.0]]
+        assert [r["body"]["input"] for r in provider.client.uploaded] == [["ccc", "a"], ["bb"]]
+        assert sleeps == [5, 5]
+        assert provider.embed_documents(["a"]).tolist() == [[1.0]]
+
+    def test_dimensions_override(self):
+        """A configured dimensions value is reported and sent with requests."""
+        assert self.make_provider().get_embedding_dimension() == 1536
+
+        provider = self.make_provider(dimensions=512)
+        provider.embed_query("a")
+
+        assert provider.get_embedding_dimension() == 512
+        assert provider.client.embeddings.params == {"dimensions": 512}
+
+    def test_status_errors_keep_status_code(self):
+        """Rate limits surface as API errors that the retry loop recognizes."""
+        import openai
+
+        response = httpx.Response(429, request=httpx.Request("POST", "http://api"))
+        provider = self.make_provider(
+            openai.RateLimitError("slow down", response=response, body=None)
+        )
+        provider.MAX_RETRIES = 0
+
+        with pytest.raises(LLMProviderAPIError) as excinfo:
+            provider.embed_documents(["a"])
+        assert excinfo.value.status_code == 429
+
+    def test_transient_errors_are_retried(self, monkeypatch):
+        """A 503 or a dropped connection is retried since the SDK does not retry."""
+        import openai
+
+        monkeypatch.setattr(llm_providers.time, "sleep", lambda _: None)
+        request = httpx.Request("POST", "http://api")
+        provider = self.make_provider(openai.InternalServerError(
+            "unavailable", response=httpx.Response(503, request=request), body=None
+        ))
+
+        assert provider.embed_query("abc").tolist() == [3.0]
+        assert provider.client.embeddings.calls == ["abc", "abc"]
+
+        provider.async_client.embeddings.error = openai.APIConnectionError(request=request)
+        assert asyncio.run(provider.aembed_query("dddd")).tolist() == [4.0]
+        assert provider.async_client.embeddings.calls == ["dddd", "dddd"]
+
+
+class TestOpenAIHTTPClient:
+    """Test cases for the shared OpenAI connection pool."""
+
+    def test_providers_share_one_client_per_api_base(self):
+        """LLM and embedding providers on the same base reuse one httpx pool."""
+        from llm_providers.openai_provider import OpenAIEmbeddingProvider, OpenAIProvider
+
+        llm = OpenAIProvider(LLMConfig(
+            provider=LLMProvider.OPENAI, model_name="gpt-4", api_key="k",
+            api_base="http://shared"
+        ))
+        embeddings = OpenAIEmbeddingProvider(EmbeddingConfig(
+            provider=LLMProvider.OPENAI, model_name="text-embedding-3-small",
+            api_key="k", api_base="http://shared"
+        ))
+        llm.initialize()
+        embeddings.initialize()
+
+        assert llm.client._client is embeddings.client._client
+        assert llm.langchain_llm.http_client is llm.client._client
+
+
+class TestHealthChecks:
+    """Test cases for the initialization circuit breaker and tags cache."""
+
+    @pytest.fixture(autouse=True)
+    def isolated_state(self, monkeypatch):
+        from llm_providers import ollama_provider
+
+        monkeypatch.setattr(llm_providers, "_open_circuits", {})
+        monkeypatch.setattr(ollama_provider._OllamaTagsMixin, "_tags_by_url", {})
+
+    def test_circuit_opens_for_cooldown(self, monkeypatch):
+        """A failure opens the circuit until the cooldown passes."""
+        now = [100.0]
+        monkeypatch.setattr(llm_providers.time, "monotonic", lambda: now[0])
+
+        llm_providers.record_health("http://down", False)
+        assert llm_providers.circuit_open("http://down")
+        assert not llm_providers.circuit_open("http://other")
+
+        now[0] += llm_providers.CIRCUIT_BREAKER_COOLDOWN
+        assert not llm_providers.circuit_open("http://down")
+
+        llm_providers.record_health("http://down", False)
+        llm_providers.record_health("http://down", True)
+        assert not llm_providers.circuit_open("http://down")
+
+    def test_unreachable_custom_api_fails_fast(self):
+        """Once a HEAD health check fails, later inits skip the network."""
+        from llm_providers.custom_provider import CustomProvider
+
+        calls = []
+
+        class DownSession:
+            def head(self, url, **kwargs):
+                calls.append((url, kwargs["timeout"]))
+                raise requests.exceptions.ConnectionError("refused")
+
+        config = LLMConfig(
+            provider=LLMProvider.CUSTOM, model_name="m", api_base="http://down"
+        )
+        for _ in range(2):
+            provider = CustomProvider(config)
+            provider.session = DownSession()
+            with pytest.raises(llm_providers.LLMProviderNotAvailableError):
+                provider.initialize()
+
+        assert calls == [("http://down/health", 2)]
+
+    def test_ollama_tags_are_shared_between_instances(self):
+        """A second provider for the same server reuses the model list."""
+        from llm_providers.ollama_provider import OllamaEmbeddingProvider
+
+        requests_made = []
+
+        class TagsSession:
+            def get(self, url, **kwargs):
+                requests_made.append(url)
+                response = requests.Response()
+                response.status_code = 200
+                response._content = b'{"models": [{"name": "nomic"}]}'
+                return response
+
+        config = EmbeddingConfig(
+            provider=LLMProvider.OLLAMA, model_name="missing", api_base="http://o"
+        )
+        for _ in range(2):
+            provider = OllamaEmbeddingProvider(config)
+            provider.session = TagsSession()
+            with pytest.raises(llm_providers.LLMProviderNotAvailableError, match="nomic"):
+                provider.initialize()
+
+        assert requests_made == ["http://o/api/tags"]
+
+
+class TestResponseCache:
+    """Test cases for the manager-level exact-match cache."""
+
+    def test_lru_eviction_and_stats(self):
+        """Least recently used entries go first; stats count lookups."""
+        from llm_providers.cache import ResponseCache
+
+        cache = ResponseCache(capacity=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert cache.stats() == {
+            "hits": 2, "misses": 1, "hit_rate": 2 / 3, "size": 2, "capacity": 2
+        }
+
+    def test_entries_expire_after_ttl(self, monkeypatch):
+        """Expired entries count as misses and are dropped."""
+        from llm_providers import cache as cache_module
+
+        now = [0.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        cache = cache_module.ResponseCache(capacity=4, ttl=10)
+        cache.put("k", "v")
+
+        now[0] = 9.0
+        assert cache.get("k") == "v"
+        now[0] = 10.0
+        assert cache.get("k") is None
+        assert cache.stats()["size"] == 0
+
+
+class TestSemanticCache:
+    """Test cases for the embedding-similarity cache."""
+
+    def test_similar_prompt_hits_within_namespace(self):
+        """Near-duplicate embeddings reuse the response of the same namespace only."""
+        from llm_providers.cache import SemanticCache
+
+        cache = SemanticCache(threshold=0.9)
+        cache.put("a", [1.0, 0.0], "answer")
+
+        assert cache.get("a", [0.99, 0.05]) == "answer"
+        assert cache.get("a", [0.0, 1.0]) is None
+        assert cache.get("b", [1.0, 0.0]) is None
+        assert cache.stats()["hits"] == 1
+
+    def test_entries_are_stored_as_int8(self):
+        """Stored vectors are int8 and similarity survives quantization."""
+        from llm_providers.cache import SemanticCache
+
+        rng = np.random.default_rng(0)
+        vector = rng.standard_normal(256)
+        cache = SemanticCache(threshold=0.99)
+        cache.put("n", vector, "hit")
+
+        assert cache._vectors.dtype == np.int8
+        assert cache.get("n", vector + rng.standard_normal(256) * 0.01) == "hit"
+        assert cache.get("n", rng.standard_normal(256)) is None
+
+    def test_grows_then_evicts_least_recently_used(self):
+        """Storage grows in chunks up to capacity, then replaces the LRU row."""
+        from llm_providers.cache import SemanticCache
+
+        cache = SemanticCache(threshold=0.99, capacity=3)
+        cache.GROWTH = 2
+        for i in range(3):
+            cache.put("n", np.eye(4)[i], i)
+        cache.get("n", np.eye(4)[0])
+        cache.put("n", np.eye(4)[3], 3)
+
+        assert cache.stats()["size"] == 3
+        assert cache.get("n", np.eye(4)[0]) == 0
+        assert cache.get("n", np.eye(4)[1]) is None
+        assert cache.get("n", np.eye(4)[3]) == 3
+
+
+class TestLLMProviderManager:
+    """Test cases for LLMProviderManager caching."""
+
+    class CountingProvider(FakeLLMProvider):
+        calls = 0
+
+        def generate_text(self, prompt, system_prompt=None, **kwargs):
+            self.calls += 1
+            return f"{system_prompt}:{prompt}:{self.calls}"
+
+    def make_manager(self, temperature=0.0):
+        from llm_providers.provider_manager import LLMProviderManager
+
+        manager = LLMProviderManager()
+        manager.active_llm_provider = self.CountingProvider(LLMConfig(
+            provider=LLMProvider.CUSTOM, model_name="m", temperature=temperature
+        ))
+        return manager
+
+    def test_deterministic_generations_are_cached(self):
+        """Identical temperature-0 prompts are answered from the cache."""
+        manager = self.make_manager()
+
+        first = manager.generate_text("q", "s")
+        assert manager.generate_text("q", "s") == first
+        assert manager.generate_text("q", "other") != first
+        assert manager.active_llm_provider.calls == 2
+        assert manager.cache_stats()["generate_text"]["hits"] == 1
+
+    def test_sampled_generations_bypass_cache(self):
+        """Non-zero temperature and extra kwargs always reach the provider."""
+        manager = self.make_manager(temperature=0.7)
+
+        manager.generate_text("q")
+        manager.generate_text("q")
+        assert manager.active_llm_provider.calls == 2
+        assert manager.cache_stats()["generate_text"]["misses"] == 0
+
+    def test_async_generations_share_exact_cache(self):
+        """agenerate_text and generate_text answer from the same cache."""
+        manager = self.make_manager()
+
+        first = manager.generate_text("q")
+        assert asyncio.run(manager.agenerate_text("q")) == first
+        assert asyncio.run(manager.agenerate_text("other")) != first
+        assert manager.active_llm_provider.calls == 2
+
+    def test_add_providers_initializes_concurrently(self, monkeypatch):
+        """Providers initialize in parallel and register in argument order."""
+        from llm_providers import provider_manager
+
+        barrier = threading.Barrier(3, timeout=5)
+
+        class BlockingLLM(FakeLLMProvider):
+            def initialize(self):
+                barrier.wait()
+                super().initialize()
+
+        class BlockingEmbeddings(FakeEmbeddingProvider):
+            def __init__(self, config):
+                super().__init__()
+
+            def initialize(self):
+                barrier.wait()
+                super().initialize()
+
+        classes = {
+            "OllamaProvider": BlockingLLM,
+            "CustomProvider": BlockingLLM,
+            "CustomEmbeddingProvider": BlockingEmbeddings,
+        }
+        monkeypatch.setattr(provider_manager, "_provider_class", lambda module, name: classes[name])
+        manager = provider_manager.LLMProviderManager()
+
+        manager.add_providers(
+            [(LLMProvider.OLLAMA, LLMConfig(provider=LLMProvider.OLLAMA, model_name="a")),
+             (LLMProvider.CUSTOM, LLMConfig(provider=LLMProvider.CUSTOM, model_name="b"))],
+            [(LLMProvider.CUSTOM, EmbeddingConfig(provider=LLMProvider.CUSTOM, model_name="c"))],
+        )
+
+        assert list(manager.llm_providers) == [LLMProvider.OLLAMA, LLMProvider.CUSTOM]
+        assert all(p.client for p in manager.llm_providers.values())
+        assert manager.embedding_providers[LLMProvider.CUSTOM].client is True
+
+    def test_embeddings_are_float32_arrays(self):
+        """The manager hands provider matrices through without list conversion."""
+        manager = self.make_manager()
+        manager.active_embedding_provider = FakeEmbeddingProvider()
+
+        documents = manager.embed_documents(["a", "bb"])
+        query = manager.embed_query("ccc")
+
+        assert isinstance(documents, np.ndarray) and documents.dtype == np.float32
+        assert documents.shape == (2, 1)
+        assert query.dtype == np.float32
+
+    def test_provider_modules_load_on_first_use(self):
+        """Importing the manager does not import provider implementations."""
+        import pathlib
+        import subprocess
+        import sys
+
+        code = (
+            "import sys; import llm_providers.provider_manager as pm; "
+            "assert 'llm_providers.ollama_provider' not in sys.modules; "
+            "assert pm._provider_class('ollama_provider', 'OllamaProvider').__name__ == 'OllamaProvider'"
+        )
+        src = pathlib.Path(llm_providers.__file__).parents[1]
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=src)
+
+    def test_provider_status_is_snapshotted(self, monkeypatch):
+        """Status polls within the TTL skip availability checks."""
+        manager = self.make_manager()
+        provider = manager.active_llm_provider
+        manager.llm_providers[LLMProvider.CUSTOM] = provider
+        checks = []
+        monkeypatch.setattr(provider, "is_available", lambda: checks.append(1) or True)
+
+        first = manager.list_available_providers()
+        assert manager.list_available_providers() is first
+        assert len(checks) == 1
+        assert first["llm_providers"]["custom"]["active"] is True
+
+        manager._status_snapshot = (float("-inf"),) + manager._status_snapshot[1:]
+        assert manager.list_available_providers() is first
+        assert len(checks) == 2
+
+        manager.active_llm_provider = None
+        assert manager.list_available_providers()["llm_providers"]["custom"]["active"] is False
+
+    def test_paraphrased_prompts_use_semantic_cache(self):
+        """A prompt embedding close to a cached one reuses its response."""
+        from llm_providers.provider_manager import LLMProviderManager
+
+        vectors = {"how many users?": [1.0, 0.0], "number of users?": [0.98, 0.1],
+                   "list tables": [0.0, 1.0]}
+
+        class KeywordEmbeddings(FakeEmbeddingProvider):
+            def _embed_query(self, text):
+                return vectors[text]
+
+        manager = LLMProviderManager(semantic_cache_threshold=0.95)
+        manager.active_llm_provider = self.CountingProvider(LLMConfig(
+            provider=LLMProvider.CUSTOM, model_name="m"
+        ))
+        manager.active_embedding_provider = KeywordEmbeddings()
+
+        first = manager.generate_text("how many users?")
+        assert manager.generate_text("number of users?") == first
+        assert manager.generate_text("list tables") != first
+        assert manager.active_llm_provider.calls == 2
+        assert manager.cache_stats()["semantic"]["hits"] == 1
@@ -0,0 +1,73 @@
+"""
+Unit tests for the schema data models
+"""
+from models import ColumnInfo, DatabaseSchema, ForeignKeyInfo, TableInfo
+
+
+def make_table(name):
+    return TableInfo(
+        name=name,
+        columns=[ColumnInfo("id", "INTEGER", False, True)],
+        primary_keys=["id"],
+        foreign_keys=[ForeignKeyInfo("id", "other", "id")],
+    )
+
+
+class TestDatabaseSchema:
+    """Test cases for DatabaseSchema lookups."""
+
+    def test_get_table_uses_name_index(self):
+        """Lookups return the first table of a name, or None."""
+        first = make_table("users")
+        schema = DatabaseSchema(tables=[first, make_table("orders"), make_table("users")])
+
+        assert schema.get_table("users") is first
+        assert schema.get_table("missing") is None
+        assert schema.get_table_names() == ["users", "orders", "users"]
+
+    def test_reassigning_tables_rebuilds_index(self):
+        """Replacing the table list refreshes lookups and names."""
+        schema = DatabaseSchema(tables=[make_table("users")])
+
+        schema.tables = [make_table("orders")]
+
+        assert schema.get_table("users") is None
+        assert schema.get_table("orders").name == "orders"
+        assert schema.get_table_names() == ["orders"]
+
+    def test_to_text_is_memoized_until_tables_change(self):
+        """Rendering happens once per table list."""
+        schema = DatabaseSchema(tables=[make_table("users")])
+
+        text = schema.to_text()
+
+        assert schema.to_text() is text
+        assert text == (
+            "Table: users\nColumns:\n  - id (INTEGER, not null) (PK)\n"
+            "Primary Keys: id\nForeign Keys:\n  - id -> other.id\n"
+        )
+        schema.tables = [make_table("orders")]
+        assert schema.to_text().startswith("Table: orders\n")
+
+
+class TestTableInfo:
+    """Test cases for TableInfo serialization."""
+
+    def test_to_dict_is_cached_and_round_trips(self):
+        """The dict is built once and rebuilds an equal table."""
+        table = make_table("users")
+
+        data = table.to_dict()
+
+        assert table.to_dict() is data
+        assert TableInfo.from_dict(data) == table
+        assert data["columns"][0] == {
+            "name": "id", "type": "INTEGER", "nullable": False, "primary_key": True
+        }
+
+    def test_models_use_slots(self):
+        """Schema objects carry no per-instance __dict__."""
+        table = make_table("users")
+
+        for obj in (table, table.columns[0], table.foreign_keys[0], DatabaseSchema([table])):
+            assert not hasattr(obj, "__dict__")
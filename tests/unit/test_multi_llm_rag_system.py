@@ -0,0 +1,415 @@
+"""
+Unit tests for MultiLLMDatabaseRAGSystem vectorization helpers
+"""
+import asyncio
+import logging
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from sqlalchemy import text
+
+from config import DatabaseConfig
+from config_multi_llm import RAGConfig
+from database_scanner import DatabaseScanner
+from models import ColumnInfo, DatabaseSchema, ForeignKeyInfo, TableInfo
+from multi_llm_rag_system import MultiLLMDatabaseRAGSystem
+
+
+def make_system(scanner):
+    system = MultiLLMDatabaseRAGSystem.__new__(MultiLLMDatabaseRAGSystem)
+    system.scanner = scanner
+    system.rag_config = RAGConfig()
+    system.sql_agent = None
+    system._status_cache = None
+    system._prep_cache = None
+    return system
+
+
+def make_schema(*names):
+    return DatabaseSchema(tables=[
+        TableInfo(
+            name=name,
+            columns=[ColumnInfo("id", "INTEGER", False, True)],
+            primary_keys=["id"],
+            foreign_keys=[],
+        )
+        for name in names
+    ])
+
+
+class TestPrepareVectorizationData:
+    """Test cases for schema text preparation."""
+
+    def test_samples_are_fetched_per_table(self):
+        """Each table gets its own sample block; failures are skipped."""
+        def rows(table_name, limit):
+            if table_name == "broken":
+                raise RuntimeError("boom")
+            return [{"id": 1, "name": table_name}]
+
+        scanner = Mock()
+        scanner.query_table_rows.side_effect = rows
+        system = make_system(scanner)
+
+        texts, metadatas = zip(*system._prepare_vectorization_data(
+            make_schema("users", "broken")
+        ))
+
+        assert texts[0].endswith(
+            "\nSample data (first few rows):\nid | name\n---------\n1 | users\n"
+        )
+        assert "Sample data" not in texts[1]
+        assert [m["table_name"] for m in metadatas] == ["users", "broken"]
+        assert scanner.query_table_rows.call_count == 2
+
+    def test_sample_fan_out_is_bounded_by_scan_parallelism(self):
+        """No more than scan_parallelism sample queries run at once."""
+        active = peak = 0
+        lock = threading.Lock()
+
+        def rows(table_name, limit):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+            return []
+
+        scanner = Mock()
+        scanner.query_table_rows.side_effect = rows
+        system = make_system(scanner)
+        system.rag_config = RAGConfig(scan_parallelism=2)
+
+        system._fetch_samples(["a", "b", "c", "d", "e"])
+
+        assert peak == 2
+
+    def test_in_memory_sqlite_samples_on_calling_thread(self):
+        """Per-thread in-memory databases would be empty, so sample serially."""
+        scanner = DatabaseScanner(
+            DatabaseConfig(url="sqlite:///:memory:", type="sqlite")
+        )
+        with scanner.engine.begin() as conn:
+            for table in ("a", "b"):
+                conn.execute(text(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY)"))
+                conn.execute(text(f"INSERT INTO {table} VALUES (1)"))
+        system = make_system(scanner)
+
+        assert system._fetch_samples(["a", "b"]) == {
+            "a": [{"id": 1}], "b": [{"id": 1}]
+        }
+
+    def test_schema_text_layout(self):
+        """Columns, flags and foreign keys render one per line."""
+        scanner = Mock()
+        scanner.query_table_rows.return_value = []
+        system = make_system(scanner)
+        schema = DatabaseSchema(tables=[TableInfo(
+            name="orders",
+            columns=[
+                ColumnInfo("id", "INTEGER", False, True),
+                ColumnInfo("user_id", "INTEGER", True, False),
+            ],
+            primary_keys=["id"],
+            foreign_keys=[ForeignKeyInfo("user_id", "users", "id")],
+        )])
+
+        [(text, _)] = system._prepare_vectorization_data(schema)
+
+        assert text == (
+            "Table: orders\n"
+            "Description: Database table orders\n"
+            "Columns:\n"
+            "- id (INTEGER) [primary key]\n"
+            "- user_id (INTEGER) [nullable]\n"
+            "Foreign Keys:\n"
+            "- user_id references users.id\n"
+        )
+
+
+class TestBuildVectorStore:
+    """Test cases for the chunked vector store build."""
+
+    def make_build_system(self, vector_store_path=None):
+        scanner = Mock()
+        scanner.query_table_rows.return_value = []
+        system = make_system(scanner)
+        system.VECTORIZE_CHUNK_SIZE = 2
+        system.rag_config = RAGConfig(
+            vector_store_path=vector_store_path, max_in_flight=1
+        )
+        system.vector_store_manager = Mock()
+
+        def embed(texts, max_in_flight):
+            return [[float(len(text))] for text in texts]
+
+        system.provider_manager = Mock()
+        system.provider_manager.aembed_documents = AsyncMock(side_effect=embed)
+        system.provider_manager.embed_documents.side_effect = embed
+        return system
+
+    def test_chunks_are_embedded_and_appended(self):
+        """The first chunk creates the store, later chunks are appended."""
+        system = self.make_build_system("store")
+        embeddings = object()
+
+        system._build_vector_store(
+            system._prepare_vectorization_data(make_schema("a", "b", "c")), embeddings
+        )
+
+        calls = system.provider_manager.aembed_documents.await_args_list
+        assert [len(call.args[0]) for call in calls] == [2, 1]
+        assert all(call.kwargs == {"max_in_flight": 1} for call in calls)
+        manager = system.vector_store_manager
+        build_args = manager.build_from_embeddings.call_args
+        assert build_args.args[0] == [
+            text for text, _ in system._prepare_vectorization_data(make_schema("a", "b"))
+        ]
+        assert [m["table_name"] for m in build_args.args[2]] == ["a", "b"]
+        assert build_args.args[3] is embeddings
+        assert build_args.kwargs == {"save": False}
+        assert manager.add_embeddings.call_args.args[2][0]["table_name"] == "c"
+        manager.quantize_index.assert_called_once_with()
+        manager.save_vector_store.assert_called_once_with("store", None)
+        system.provider_manager.embed_documents.assert_not_called()
+
+    def test_falls_back_to_sync_inside_event_loop(self):
+        """asyncio.run cannot nest, so a running loop uses the thread fan-out."""
+        system = self.make_build_system()
+
+        async def run():
+            system._build_vector_store([("a", {"table_name": "a"})], object())
+
+        asyncio.run(run())
+
+        system.provider_manager.embed_documents.assert_called_once()
+        system.provider_manager.aembed_documents.assert_not_called()
+        system.vector_store_manager.build_from_embeddings.assert_called_once()
+        system.vector_store_manager.save_vector_store.assert_not_called()
+
+    def test_empty_schema(self):
+        """A schema without tables cannot build a vector store."""
+        system = self.make_build_system()
+
+        with pytest.raises(ValueError, match="Document list is empty"):
+            system._build_vector_store(iter([]), object())
+
+
+class TestSqlAgentFor:
+    """Test cases for SQL agent reuse across provider switches."""
+
+    def test_reuses_agent_and_database(self):
+        """The same LLM keeps its agent; a new LLM shares the reflected db."""
+        system = make_system(Mock())
+        first_llm, second_llm = object(), object()
+
+        with patch("multi_llm_rag_system.SQLAgent") as agent_class:
+            agent_class.from_langchain_llm.side_effect = (
+                lambda llm, scanner, db=None: Mock(llm=llm, db=db or "reflected")
+            )
+            system.sql_agent = system._sql_agent_for(first_llm)
+            assert system._sql_agent_for(first_llm) is system.sql_agent
+            switched = system._sql_agent_for(second_llm)
+
+        assert agent_class.from_langchain_llm.call_count == 2
+        assert switched.llm is second_llm
+        assert switched.db == "reflected"
+
+
+class TestSwitchEmbeddingProvider:
+    """Test cases for switching embedding providers with a built store."""
+
+    def make_switch_system(self, model_name):
+        system = make_system(Mock())
+        system._embedding_signature = ("ollama", "nomic-embed-text")
+        system.vector_store_manager = Mock()
+        system.vector_store_manager.iter_documents.return_value = iter([("a", {})])
+        system.provider_manager = Mock()
+        system.provider_manager.switch_embedding_provider.return_value = True
+        config = system.provider_manager.get_active_embedding_provider.return_value.config
+        config.provider.value = "ollama"
+        config.model_name = model_name
+        system._build_vector_store = Mock()
+        return system
+
+    def test_same_model_swaps_query_embeddings(self):
+        """An unchanged (provider, model) keeps the stored vectors."""
+        system = self.make_switch_system("nomic-embed-text")
+
+        assert system.switch_embedding_provider("ollama")
+
+        system._build_vector_store.assert_not_called()
+        assert system.vector_store_manager._vector_store._embedding is (
+            system.provider_manager.get_langchain_embeddings.return_value
+        )
+
+    def test_new_model_reembeds_documents(self):
+        """A different model rebuilds the store from its own documents."""
+        system = self.make_switch_system("mxbai-embed-large")
+
+        assert system.switch_embedding_provider("ollama")
+
+        documents, embeddings, fingerprint = system._build_vector_store.call_args.args
+        assert documents == [("a", {})]
+        assert fingerprint == system._documents_fingerprint(documents)
+        assert embeddings is system.provider_manager.get_langchain_embeddings.return_value
+        assert system._embedding_signature == ("ollama", "mxbai-embed-large")
+
+
+class TestStatusSnapshot:
+    """Test cases for the cached system status."""
+
+    def test_snapshot_is_reused_until_refresh(self):
+        """Providers and tables are probed once per STATUS_TTL window."""
+        scanner = Mock()
+        scanner.get_table_names.return_value = ["a", "b"]
+        system = make_system(scanner)
+        system.provider_manager = Mock()
+
+        first = system._status_snapshot()
+        assert system._status_snapshot() == first
+        assert first[1] == 2
+        assert system.provider_manager.list_available_providers.call_count == 1
+
+        system._status_snapshot(refresh=True)
+        system._status_cache = (float("-inf"),) + system._status_cache[1:]
+        system._status_snapshot()
+
+        assert system.provider_manager.list_available_providers.call_count == 3
+        assert scanner.get_table_names.call_count == 3
+
+
+class TestSchemaFingerprint:
+    """Test cases for skipping unchanged forced rebuilds."""
+
+    def make_initialize_system(self, tmp_path, stored):
+        system = make_system(Mock())
+        system.scanner.scan_database.return_value = make_schema("a")
+        system.scanner.query_table_rows.return_value = []
+        system.rag_config = RAGConfig(vector_store_path=str(tmp_path))
+        system.provider_manager = Mock()
+        config = system.provider_manager.get_active_embedding_provider.return_value.config
+        config.provider.value = "openai"
+        config.model_name = "text-embedding-3-small"
+        system.vector_store_manager = Mock()
+        system.vector_store_manager.stored_fingerprint.return_value = stored
+        system._sql_agent_for = Mock()
+        system._print_system_status = Mock()
+        system._build_vector_store = Mock()
+        return system
+
+    def current_fingerprint(self, system):
+        return system._documents_fingerprint(
+            system._prepare_vectorization_data(make_schema("a"))
+        )
+
+    def test_fingerprint_covers_model_and_texts(self):
+        """Changing either the embedding model or a text changes the hash."""
+        system = self.make_initialize_system("unused", None)
+        base = system._documents_fingerprint([("a", {}), ("b", {})])
+
+        assert system._documents_fingerprint([("a", {}), ("b", {})]) == base
+        assert system._documents_fingerprint([("a", {}), ("c", {})]) != base
+        system.provider_manager.get_active_embedding_provider.return_value.config.model_name = "other"
+        assert system._documents_fingerprint([("a", {}), ("b", {})]) != base
+
+    def test_unchanged_schema_skips_forced_rebuild(self, tmp_path, monkeypatch):
+        """A matching stored fingerprint loads the index instead of embedding."""
+        monkeypatch.delenv("RAG_FORCE_REEMBED", raising=False)
+        system = self.make_initialize_system(tmp_path, None)
+        system.vector_store_manager.stored_fingerprint.return_value = (
+            self.current_fingerprint(system)
+        )
+
+        with patch("multi_llm_rag_system.RAGQueryProcessor"):
+            assert system.initialize(force_rebuild=True)
+
+        system._build_vector_store.assert_not_called()
+        system.vector_store_manager.load_vector_store.assert_called_once()
+
+    def test_changed_schema_rebuilds_and_stores_fingerprint(self, tmp_path):
+        """A different fingerprint embeds again and saves the new one."""
+        system = self.make_initialize_system(tmp_path, "stale")
+
+        with patch("multi_llm_rag_system.RAGQueryProcessor"):
+            assert system.initialize(force_rebuild=True)
+
+        documents, _, fingerprint = system._build_vector_store.call_args.args
+        assert [m["table_name"] for _, m in documents] == ["a"]
+        assert fingerprint == self.current_fingerprint(system)
+        system.vector_store_manager.load_vector_store.assert_not_called()
+
+    def test_force_reembed_ignores_fingerprint(self, tmp_path, monkeypatch):
+        """RAG_FORCE_REEMBED always embeds again."""
+        monkeypatch.setenv("RAG_FORCE_REEMBED", "1")
+        system = self.make_initialize_system(tmp_path, None)
+        system.vector_store_manager.stored_fingerprint.return_value = (
+            self.current_fingerprint(system)
+        )
+
+        with patch("multi_llm_rag_system.RAGQueryProcessor"):
+            assert system.initialize(force_rebuild=True)
+
+        system._build_vector_store.assert_called_once()
+
+
+class TestInitializeLogging:
+    """Test cases for initialize() failure reporting."""
+
+    def test_failure_logs_traceback_only_at_debug(self, caplog):
+        """Errors are logged; the stack trace needs DEBUG logging."""
+        system = make_system(Mock())
+        system.provider_manager = Mock()
+        system.provider_manager.select_active_llm_provider.side_effect = RuntimeError("boom")
+
+        with caplog.at_level(logging.INFO, logger="multi_llm_rag_system"):
+            assert system.initialize() is False
+        assert "Error during initialization: boom" in caplog.text
+        assert not any(record.exc_info for record in caplog.records)
+
+        caplog.clear()
+        with caplog.at_level(logging.DEBUG, logger="multi_llm_rag_system"):
+            system.initialize()
+        assert any(record.exc_info for record in caplog.records)
+
+
+class TestProviderSelection:
+    """Test cases for provider selection during initialize()."""
+
+    def test_llm_and_embedding_selection_overlap(self):
+        """Both health checks are in flight at the same time."""
+        both_started = threading.Barrier(2, timeout=5)
+        system = make_system(Mock())
+        system.provider_manager = Mock()
+
+        def select():
+            both_started.wait()
+            return None
+
+        system.provider_manager.select_active_llm_provider.side_effect = select
+        system.provider_manager.select_active_embedding_provider.side_effect = select
+
+        assert system.initialize() is False
+        assert not both_started.broken
+
+
+class TestVectorizationDocuments:
+    """Test cases for reusing prepared documents."""
+
+    def test_documents_are_reused_for_the_same_schema(self):
+        """Sample rows are queried again only when the schema changes."""
+        scanner = Mock()
+        scanner.query_table_rows.return_value = []
+        system = make_system(scanner)
+
+        first = system._vectorization_documents(make_schema("a", "b"))
+        again = system._vectorization_documents(make_schema("a", "b"))
+        changed = system._vectorization_documents(make_schema("a", "c"))
+
+        assert again is first
+        assert [m["table_name"] for _, m in changed] == ["a", "c"]
+        assert scanner.query_table_rows.call_count == 4
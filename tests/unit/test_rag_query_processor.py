@@ -0,0 +1,68 @@
+"""Unit tests for RAGQueryProcessor"""
+from unittest.mock import Mock
+
+from langchain_core.documents import Document
+
+from llm_providers.cache import SemanticCache
+from sql_agent import RAGQueryProcessor
+
+
+def make_processor(answer_cache=None, sql_response="42 rows"):
+    vector_store_manager = Mock()
+    vector_store_manager.embed_query.side_effect = lambda question: (
+        [1.0, 0.0] if "orders" in question else [0.0, 1.0]
+    )
+    docs = [Document(page_content="Table: orders", metadata={"table_name": "orders"})]
+    vector_store_manager.search_similar.return_value = docs
+    vector_store_manager.search_similar_by_vector.return_value = docs
+    sql_agent = Mock()
+    sql_agent.query_with_rag.return_value = sql_response
+    return RAGQueryProcessor(Mock(), vector_store_manager, sql_agent, answer_cache)
+
+
+class TestProcessQuestionAnswerCache:
+    def test_without_cache_searches_by_text(self):
+        """No cache keeps the plain text retrieval"""
+        processor = make_processor()
+
+        result = processor.process_question("How many orders?")
+
+        assert result["status"] == "success"
+        processor.vector_store_manager.search_similar.assert_called_once()
+        processor.vector_store_manager.embed_query.assert_not_called()
+
+    def test_similar_question_reuses_answer(self):
+        """A matching question skips retrieval and the SQL agent"""
+        processor = make_processor(SemanticCache(0.95))
+
+        first = processor.process_question("How many orders?")
+        second = processor.process_question("How many orders are there?")
+
+        assert second["question"] == "How many orders are there?"
+        assert second["sql_response"] == first["sql_response"]
+        assert second["relevant_context"] == first["relevant_context"]
+        assert processor.sql_agent.query_with_rag.call_count == 1
+        assert processor.vector_store_manager.embed_query.call_count == 2
+        processor.vector_store_manager.search_similar_by_vector.assert_called_once_with(
+            [1.0, 0.0]
+        )
+
+    def test_dissimilar_question_runs_pipeline(self):
+        """Questions below the threshold are answered again"""
+        processor = make_processor(SemanticCache(0.95))
+
+        processor.process_question("How many orders?")
+        processor.process_question("List customers")
+
+        assert processor.sql_agent.query_with_rag.call_count == 2
+
+    def test_failed_queries_are_not_cached(self):
+        """Agent errors are retried instead of served from the cache"""
+        processor = make_processor(
+            SemanticCache(0.95), sql_response="Error processing query: timeout"
+        )
+
+        processor.process_question("How many orders?")
+        processor.process_question("How many orders?")
+
+        assert processor.sql_agent.query_with_rag.call_count == 2
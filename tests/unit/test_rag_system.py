@@ -0,0 +1,36 @@
+"""Unit tests for the legacy DatabaseRAGSystem helpers"""
+from unittest.mock import Mock
+
+from rag_system import CachedEmbeddings
+
+
+class TestCachedEmbeddings:
+    def make_inner(self):
+        inner = Mock(spec=["embed_query", "embed_documents", "model"])
+        inner.model = "text-embedding-3-small"
+        inner.embed_query.side_effect = lambda text: [float(len(text)), 1.0]
+        inner.embed_documents.side_effect = lambda texts: [[1.0, 0.0] for _ in texts]
+        return inner
+
+    def test_repeated_query_is_embedded_once(self):
+        """Exact repeats are served from the LRU cache"""
+        inner = self.make_inner()
+        embeddings = CachedEmbeddings(inner)
+
+        first = embeddings.embed_query("How many orders?")
+        first.append(99.0)
+        second = embeddings.embed_query("How many orders?")
+
+        assert second == [16.0, 1.0]
+        inner.embed_query.assert_called_once_with("How many orders?")
+
+    def test_documents_are_forwarded_uncached(self):
+        """embed_documents always goes to the wrapped embeddings"""
+        inner = self.make_inner()
+        embeddings = CachedEmbeddings(inner)
+
+        embeddings.embed_documents(["a"])
+        embeddings.embed_documents(["a"])
+
+        assert inner.embed_documents.call_count == 2
+        assert embeddings.model == "text-embedding-3-small"
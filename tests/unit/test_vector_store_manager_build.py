@@ -0,0 +1,286 @@
+"""Testes unitários para a construção do vector store a partir de embeddings"""
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import text
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+
+from vector_store_manager import VectorStoreManager
+from config import DatabaseConfig, RAGConfig
+from database_scanner import DatabaseScanner
+from models import ColumnInfo, DatabaseSchema, TableInfo
+
+
+class FixedEmbeddings(Embeddings):
+    """Embeddings determinísticos que registram as chamadas"""
+
+    def __init__(self):
+        self.document_calls = 0
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.document_calls += 1
+        self.batches.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+class TestVectorStoreManagerBuildFromEmbeddings:
+    """Testes para o método build_from_embeddings"""
+
+    def setup_method(self):
+        """Setup para cada teste"""
+        self.config = Mock(spec=RAGConfig)
+        self.config.vector_store_path = None
+        self.config.embedding_cache_path = None
+        self.config.hnsw_m = 0
+        self.manager = VectorStoreManager(self.config)
+
+    def test_build_from_embeddings_skips_document_embedding(self):
+        """Deve indexar os vetores fornecidos sem reembedar os textos"""
+        embeddings = FixedEmbeddings()
+        vectors = np.array([[1.0, 1.0], [4.0, 1.0]], dtype=np.float32)
+
+        store = self.manager.build_from_embeddings(
+            ["a", "bbbb"], vectors, [{"table_name": "a"}, {"table_name": "b"}], embeddings
+        )
+
+        assert embeddings.document_calls == 0
+        result = store.similarity_search("cccc", k=1)[0]
+        assert result.page_content == "bbbb"
+        assert result.metadata == {"table_name": "b"}
+
+    def test_build_from_embeddings_empty(self):
+        """Deve falhar com lista vazia"""
+        with pytest.raises(ValueError, match="Document list is empty"):
+            self.manager.build_from_embeddings(
+                [], np.empty((0, 2), dtype=np.float32), None, FixedEmbeddings()
+            )
+
+    def test_build_from_embeddings_row_mismatch(self):
+        """Deve falhar quando há mais textos que vetores"""
+        with pytest.raises(ValueError, match="Expected 2 embedding rows"):
+            self.manager.build_from_embeddings(
+                ["a", "b"], np.ones((1, 2), dtype=np.float32), None, FixedEmbeddings()
+            )
+
+    def test_add_embeddings_appends_to_store(self):
+        """Deve acrescentar vetores ao vector store existente"""
+        embeddings = FixedEmbeddings()
+        self.manager.build_from_embeddings(
+            ["a"], np.array([[1.0, 1.0]]), [{"table_name": "a"}], embeddings, save=False
+        )
+
+        store = self.manager.add_embeddings(
+            ["bbbb"], np.array([[4.0, 1.0]]), [{"table_name": "b"}]
+        )
+
+        assert store.index.ntotal == 2
+        assert store.similarity_search("cccc", k=1)[0].metadata == {"table_name": "b"}
+
+    def test_add_embeddings_without_store(self):
+        """Deve falhar quando o vector store ainda não existe"""
+        with pytest.raises(ValueError, match="Vector store not created yet"):
+            self.manager.add_embeddings(["a"], np.array([[1.0, 1.0]]))
+
+    def test_iter_documents_in_index_order(self):
+        """Deve devolver textos e metadados na ordem do índice"""
+        self.manager.build_from_embeddings(
+            ["a", "bbbb"],
+            np.array([[1.0, 1.0], [4.0, 1.0]]),
+            [{"table_name": "a"}, {"table_name": "b"}],
+            FixedEmbeddings()
+        )
+
+        assert list(self.manager.iter_documents()) == [
+            ("a", {"table_name": "a"}), ("bbbb", {"table_name": "b"})
+        ]
+
+    def test_quantize_index_keeps_results(self):
+        """Deve trocar o índice por um quantizado em 8 bits sem mudar a busca"""
+        import faiss
+
+        self.manager.build_from_embeddings(
+            ["a", "bbbb", "cc"],
+            np.array([[1.0, 1.0], [4.0, 1.0], [2.0, 1.0]]),
+            None,
+            FixedEmbeddings()
+        )
+
+        self.manager.quantize_index()
+
+        store = self.manager._vector_store
+        assert isinstance(store.index, faiss.IndexScalarQuantizer)
+        assert store.index.ntotal == 3
+        assert [d.page_content for d in store.similarity_search("dddd", k=2)] == [
+            "bbbb", "cc"
+        ]
+
+    def test_fingerprint_round_trip(self, tmp_path):
+        """Deve gravar a impressão digital junto aos metadados do índice"""
+        path = str(tmp_path / "store")
+        self.manager.build_from_embeddings(
+            ["a"], np.array([[1.0, 1.0]]), None, FixedEmbeddings()
+        )
+
+        self.manager.save_vector_store(path, "abc123")
+
+        assert self.manager.stored_fingerprint(path) == "abc123"
+        assert self.manager.stored_fingerprint(str(tmp_path / "missing")) is None
+
+    def test_build_vector_store_embeds_in_batches(self):
+        """Deve embedar os documentos em lotes e manter a ordem"""
+        embeddings = FixedEmbeddings()
+        self.manager.EMBED_BATCH_SIZE = 2
+        documents = [
+            Document(page_content=text, metadata={"n": i})
+            for i, text in enumerate(["a", "bb", "ccc", "dddd", "eeeee"])
+        ]
+
+        store = self.manager.build_vector_store(documents, embeddings)
+
+        assert sorted(map(len, embeddings.batches)) == [1, 2, 2]
+        assert list(self.manager.iter_documents()) == [
+            (d.page_content, d.metadata) for d in documents
+        ]
+        assert store.similarity_search("xxxx", k=1)[0].page_content == "dddd"
+
+    def test_build_vector_store_reuses_cached_embeddings(self, tmp_path):
+        """Deve reenviar apenas textos novos quando o cache está configurado"""
+        self.config.embedding_cache_path = str(tmp_path / "embeddings.sqlite")
+        documents = [Document(page_content=text) for text in ["a", "bb", "ccc"]]
+        VectorStoreManager(self.config).build_vector_store(documents, FixedEmbeddings())
+
+        embeddings = FixedEmbeddings()
+        manager = VectorStoreManager(self.config)
+        store = manager.build_vector_store(
+            documents + [Document(page_content="dddd")], embeddings
+        )
+
+        assert embeddings.batches == [["dddd"]]
+        assert store.similarity_search("ccc", k=1)[0].page_content == "ccc"
+
+    def test_load_vector_store_memory_maps_index(self, tmp_path):
+        """Deve abrir o index.faiss com IO_FLAG_MMAP quando configurado"""
+        self.manager.build_vector_store(
+            [Document(page_content=text) for text in ["a", "bb", "ccc"]],
+            FixedEmbeddings()
+        )
+        self.manager.save_vector_store(str(tmp_path))
+        self.config.mmap_faiss = True
+        faiss = dependable_faiss_import()
+
+        with patch.object(faiss, "read_index", wraps=faiss.read_index) as read_index:
+            store = VectorStoreManager(self.config).load_vector_store(
+                str(tmp_path), FixedEmbeddings()
+            )
+
+        assert read_index.call_args.args[1] == faiss.IO_FLAG_MMAP
+        assert store.similarity_search("bb", k=1)[0].page_content == "bb"
+
+    def test_build_with_hnsw_index(self):
+        """Deve construir um índice HNSW e ampliar efSearch conforme k"""
+        self.config.hnsw_m = 16
+        faiss = dependable_faiss_import()
+        vectors = np.array([[1.0, 1.0], [4.0, 1.0], [9.0, 1.0]], dtype=np.float32)
+
+        self.manager.build_from_embeddings(
+            ["a", "bbbb", "c" * 9], vectors, None, FixedEmbeddings()
+        )
+        results = self.manager.search_similar("ccc", k=2)
+
+        index = self.manager._vector_store.index
+        assert isinstance(index, faiss.IndexHNSWFlat)
+        assert index.hnsw.efConstruction == VectorStoreManager.HNSW_EF_CONSTRUCTION
+        assert index.hnsw.efSearch >= 2 * VectorStoreManager.HNSW_EF_PER_RESULT
+        assert [doc.page_content for doc in results] == ["bbbb", "a"]
+
+
+class TestVectorStoreManagerDocumentsFromData:
+    """Testes para o método create_documents_from_data"""
+
+    def setup_method(self):
+        """Setup para cada teste"""
+        self.config = Mock(spec=RAGConfig)
+        self.config.table_sample_limit = 10
+        self.manager = VectorStoreManager(self.config)
+
+    def test_documents_follow_schema_order_and_skip_failures(self):
+        """Deve amostrar as tabelas em paralelo mantendo a ordem do schema"""
+        tables = [
+            TableInfo(name, [ColumnInfo("id", "INTEGER", False, True)], ["id"], [])
+            for name in ["a", "broken", "empty", "b"]
+        ]
+
+        def query_table_sample(table_name, limit):
+            if table_name == "broken":
+                raise RuntimeError("connection lost")
+            if table_name == "empty":
+                return pd.DataFrame({"id": []})
+            return pd.DataFrame({"id": [1, 2]})
+
+        scanner = Mock()
+        scanner.query_table_sample.side_effect = query_table_sample
+
+        documents = self.manager.create_documents_from_data(
+            scanner, DatabaseSchema(tables)
+        )
+
+        assert [(d.metadata["table_name"], d.metadata["type"]) for d in documents] == [
+            ("a", "table_statistics"), ("a", "data_sample"),
+            ("b", "table_statistics"), ("b", "data_sample"),
+        ]
+        assert scanner.query_table_sample.call_count == 4
+
+    def test_in_memory_sqlite_is_sampled_serially(self):
+        """Deve amostrar no thread atual quando o SQLite é em memória"""
+        scanner = DatabaseScanner(
+            DatabaseConfig(url="sqlite:///:memory:", type="sqlite")
+        )
+        with scanner.engine.begin() as conn:
+            for table in ("a", "b"):
+                conn.execute(text(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY)"))
+                conn.execute(text(f"INSERT INTO {table} VALUES (1)"))
+
+        documents = self.manager.create_documents_from_data(
+            scanner, scanner.scan_database()
+        )
+
+        assert [d.metadata["table_name"] for d in documents] == ["a", "a", "b", "b"]
+
+    def test_table_statistics_text(self):
+        """Deve manter o texto de estatísticas por tipo de coluna"""
+        df = pd.DataFrame({
+            "id": [1, 2, 3],
+            "price": [1.5, None, 2.0],
+            "status": pd.Series(["new", "paid", "new"], dtype=object),
+        })
+
+        text = self.manager._create_table_statistics("orders", df)
+
+        assert text.splitlines()[4:] == [
+            "  - id:", "    * Data type: int64", "    * Null values: 0",
+            "    * Min: 1", "    * Max: 3", "    * Mean: 2.00",
+            "  - price:", "    * Data type: float64", "    * Null values: 1",
+            "    * Min: 1.5", "    * Max: 2.0", "    * Mean: 1.75",
+            "  - status:", "    * Data type: object", "    * Null values: 0",
+            "    * Unique values: 2", "    * Sample values: ['new', 'paid']",
+        ]
+
+    def test_data_sample_text_keeps_column_types(self):
+        """Deve listar até 5 linhas sem converter inteiros em float"""
+        df = pd.DataFrame({"id": range(1, 8), "price": [1.5] * 7})
+
+        text = self.manager._create_data_sample("orders", df)
+
+        lines = text.splitlines()
+        assert lines[:5] == [
+            "Data Sample from orders:", "", "Row 1:", "  - id: 1", "  - price: 1.5"
+        ]
+        assert "Row 5:" in lines and "Row 6:" not in lines
@@ -1,4 +1,5 @@
 """Testes unitários para o método save_vector_store após correção"""
+import hashlib
 import os
 import tempfile
 import pytest
@@ -135,3 +136,24 @@ class TestVectorStoreManagerSave:
             assert os.path.exists(os.path.join(vector_store_dir, "index.faiss")), "index.faiss deve existir"
             assert os.path.exists(os.path.join(vector_store_dir, "index.pkl")), "index.pkl deve existir"
             self.mock_vector_store.save_local.assert_called_once_with(vector_store_dir)
+
+    def test_calculate_file_checksum_matches_sha256(self, tmp_path):
+        """Deve produzir o mesmo SHA-256 da leitura completa do arquivo"""
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        file_path = tmp_path / "index.faiss"
+        file_path.write_bytes(data)
+
+        checksum = self.manager._calculate_file_checksum(str(file_path))
+
+        assert checksum == hashlib.sha256(data).hexdigest()
+
+    def test_calculate_file_checksum_without_file_digest(self, tmp_path, monkeypatch):
+        """Deve calcular o mesmo SHA-256 no Python 3.10, sem file_digest"""
+        data = os.urandom(2 * 1024 * 1024 + 5)
+        file_path = tmp_path / "index.faiss"
+        file_path.write_bytes(data)
+        monkeypatch.delattr(hashlib, "file_digest", raising=False)
+
+        checksum = self.manager._calculate_file_checksum(str(file_path))
+
+        assert checksum == hashlib.sha256(data).hexdigest()